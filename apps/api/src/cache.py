@@ -2,8 +2,12 @@ from __future__ import annotations
 
 import json
 import hashlib
+import threading
+import time
+from collections import OrderedDict
 from typing import Any, Optional
 import socket
+import uuid
 
 import redis
 
@@ -11,58 +15,196 @@ from .settings import Settings
 
 
 _redis_client: Optional[redis.Redis] = None
+_raw_client: Optional[redis.Redis] = None
 _cache_disabled: bool = False
 
+# Pub/sub channel carrying key prefixes to drop from every process's L1 tier
+INVALIDATION_CHANNEL = "cache:invalidate"
 
-def _get_client() -> redis.Redis:
-    global _redis_client
-    if _redis_client is not None:
-        return _redis_client
+# Keys are namespaced by a generation counter (cachegen:<namespace>) so a whole
+# namespace is invalidated with one INCR; entries of old generations expire by TTL.
+# Each process re-reads a namespace's generation at most this often, and at once
+# when an invalidation message for it arrives.
+GENERATION_CHECK_SECONDS = 1.0
+_generations: dict[str, tuple[int, float]] = {}
+
+
+class _L1Cache:
+    """Bounded in-process LRU with per-entry expiry, sized in (approximate) bytes.
+
+    Sits in front of Redis for hot keys. Values are kept as returned to callers
+    (decoded JSON objects or raw bytes), so a hit is a dict lookup; callers must
+    treat them as read-only. Entries live at most ``max_ttl`` seconds, which
+    bounds staleness if a pub/sub invalidation is missed.
+    """
+
+    def __init__(self, max_bytes: int, max_ttl: float):
+        self.max_bytes = max_bytes
+        self.max_ttl = max_ttl
+        self.size = 0
+        self._entries: OrderedDict[str, tuple[float, Any, int]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                return None
+            if item[0] <= time.monotonic():
+                self._pop(key)
+                return None
+            self._entries.move_to_end(key)
+            return item[1]
+
+    def set(self, key: str, value: Any, nbytes: int, ttl_secs: Optional[int] = None) -> None:
+        if nbytes > self.max_bytes // 4:
+            # One large value should not flush the hot set
+            self.delete(key)
+            return
+        ttl = min(self.max_ttl, ttl_secs) if ttl_secs and ttl_secs > 0 else self.max_ttl
+        with self._lock:
+            self._pop(key)
+            self._entries[key] = (time.monotonic() + ttl, value, nbytes)
+            self.size += nbytes
+            while self.size > self.max_bytes and self._entries:
+                self._pop(next(iter(self._entries)))
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._pop(key)
+
+    def delete_prefix(self, prefix: str) -> int:
+        with self._lock:
+            keys = [k for k in self._entries if k.startswith(prefix)]
+            for k in keys:
+                self._pop(k)
+            return len(keys)
+
+    def _pop(self, key: str) -> None:
+        item = self._entries.pop(key, None)
+        if item is not None:
+            self.size -= item[2]
+
+
+_l1: Optional[_L1Cache] = None
+_l1_configured = False
+_listener: Optional[threading.Thread] = None
+_listener_stop = threading.Event()
+
+
+def _get_l1() -> Optional[_L1Cache]:
+    global _l1, _l1_configured
+    if not _l1_configured:
+        settings = Settings()
+        mb = settings.api_l1_cache_mb
+        max_bytes = int((32 if mb is None else mb) * 1024 * 1024)
+        if max_bytes > 0:
+            _l1 = _L1Cache(max_bytes, float(settings.api_l1_cache_ttl_seconds or 30))
+        _l1_configured = True
+    return _l1
+
+
+def _connect(decode_responses: bool) -> redis.Redis:
     settings = Settings()
     # Configure small timeouts so missing Redis doesn’t stall local dev
     common_kwargs = dict(
-        decode_responses=True,
+        decode_responses=decode_responses,
         socket_connect_timeout=0.1,
         socket_timeout=0.2,
         retry_on_timeout=False,
         health_check_interval=0,
     )
     if settings.redis_url:
-        _redis_client = redis.from_url(settings.redis_url, **common_kwargs)
-    else:
-        host = settings.redis_host or "localhost"
-        port = int(settings.redis_port or 6379)
-        # Optional best-effort DNS probe to avoid long getaddrinfo delays
-        try:
-            socket.getaddrinfo(host, port)
-        except Exception:
-            raise ConnectionError(f"Redis host not resolvable: {host}")
-        _redis_client = redis.Redis(
-            host=host,
-            port=port,
-            db=int(settings.redis_db or 0),
-            password=settings.redis_password or None,
-            **common_kwargs,
-        )
+        return redis.from_url(settings.redis_url, **common_kwargs)
+    host = settings.redis_host or "localhost"
+    port = int(settings.redis_port or 6379)
+    # Optional best-effort DNS probe to avoid long getaddrinfo delays
+    try:
+        socket.getaddrinfo(host, port)
+    except Exception:
+        raise ConnectionError(f"Redis host not resolvable: {host}")
+    return redis.Redis(
+        host=host,
+        port=port,
+        db=int(settings.redis_db or 0),
+        password=settings.redis_password or None,
+        **common_kwargs,
+    )
+
+
+def _get_client() -> redis.Redis:
+    global _redis_client
+    if _redis_client is None:
+        _redis_client = _connect(decode_responses=True)
     return _redis_client
 
 
+def _get_raw_client() -> redis.Redis:
+    """Client without response decoding, for binary values (compressed HTTP bodies)."""
+    global _raw_client
+    if _raw_client is None:
+        _raw_client = _connect(decode_responses=False)
+    return _raw_client
+
+
 def make_key(prefix: str, params: dict[str, Any]) -> str:
-    """Create a stable cache key based on a prefix and params dict."""
+    """Create a stable cache key based on a prefix and params dict.
+
+    The prefix's first segment is its namespace; the namespace's current
+    generation is embedded after it (``grades:g3:<digest>``), so
+    ``invalidate_namespace("grades")`` orphans every existing grades key.
+    """
     # Sort keys for stability and hash long payloads
     items = sorted((k, params[k]) for k in params)
     raw = json.dumps(items, separators=(",", ":"), ensure_ascii=False)
     digest = hashlib.md5(raw.encode("utf-8")).hexdigest()
-    return f"{prefix}:{digest}"
+    namespace, _, rest = prefix.partition(":")
+    versioned = f"{namespace}:g{namespace_generation(namespace)}"
+    return f"{versioned}:{rest}:{digest}" if rest else f"{versioned}:{digest}"
+
+
+def namespace_generation(namespace: str) -> int:
+    global _cache_disabled
+    if _cache_disabled:
+        return 0
+    now = time.monotonic()
+    known = _generations.get(namespace)
+    if known is not None and now - known[1] < GENERATION_CHECK_SECONDS:
+        return known[0]
+    try:
+        generation = int(_get_client().get(f"cachegen:{namespace}") or 0)
+    except Exception:
+        _cache_disabled = True
+        return known[0] if known is not None else 0
+    _generations[namespace] = (generation, now)
+    return generation
+
+
+def _forget(prefix: str) -> None:
+    """Drop local state for an invalidated prefix: L1 entries and the cached generation."""
+    _generations.pop(prefix.partition(":")[0], None)
+    if _l1 is not None:
+        _l1.delete_prefix(prefix)
 
 
 def get_json(key: str) -> Optional[Any]:
+    """Read a JSON value; hot keys come from the in-process L1 tier (treat as read-only)."""
     global _cache_disabled
     if _cache_disabled:
         return None
+    l1 = _get_l1()
+    if l1 is not None:
+        hit = l1.get(key)
+        if hit is not None:
+            return hit
     try:
         val = _get_client().get(key)
-        return json.loads(val) if val else None
+        if not val:
+            return None
+        value = json.loads(val)
+        if l1 is not None:
+            l1.set(key, value, len(val))
+        return value
     except Exception:
         # Disable cache for the remainder of the process to avoid repeated stalls
         _cache_disabled = True
@@ -79,14 +221,81 @@ def set_json(key: str, value: Any, ttl_secs: Optional[int] = None) -> None:
             _get_client().setex(key, ttl_secs, payload)
         else:
             _get_client().set(key, payload)
+        l1 = _get_l1()
+        if l1 is not None:
+            # Keep the round-tripped form so L1 and Redis hits look the same
+            l1.set(key, json.loads(payload), len(payload), ttl_secs)
     except Exception:
         _cache_disabled = True
         # best-effort cache; ignore failures
         pass
 
 
+def get_bytes(key: str, skip_l1: bool = False) -> Optional[bytes]:
+    """Read a binary value; ``skip_l1`` goes to Redis (and refreshes L1) even on an L1 hit."""
+    global _cache_disabled
+    if _cache_disabled:
+        return None
+    l1 = _get_l1()
+    if l1 is not None and not skip_l1:
+        hit = l1.get(key)
+        if hit is not None:
+            return hit
+    try:
+        val = _get_raw_client().get(key)
+        if val and l1 is not None:
+            l1.set(key, val, len(val))
+        return val
+    except Exception:
+        _cache_disabled = True
+        return None
+
+
+def set_bytes(key: str, value: bytes, ttl_secs: Optional[int] = None) -> None:
+    global _cache_disabled
+    if _cache_disabled:
+        return
+    try:
+        if ttl_secs and ttl_secs > 0:
+            _get_raw_client().setex(key, ttl_secs, value)
+        else:
+            _get_raw_client().set(key, value)
+        l1 = _get_l1()
+        if l1 is not None:
+            l1.set(key, value, len(value), ttl_secs)
+    except Exception:
+        _cache_disabled = True
+
+
+def invalidate_namespace(namespace: str) -> int:
+    """Invalidate every key of a namespace in O(1); returns the new generation.
+
+    Bumps ``cachegen:<namespace>`` and tells every API process (L1 tiers and
+    cached generations) over the invalidation channel. Old entries are not
+    deleted; they are no longer addressed and expire with their TTL.
+    """
+    if _cache_disabled:
+        return 0
+    try:
+        client = _get_client()
+        generation = int(client.incr(f"cachegen:{namespace}"))
+        _forget(f"{namespace}:")
+        _generations[namespace] = (generation, time.monotonic())
+        client.publish(INVALIDATION_CHANNEL, f"{namespace}:")
+        return generation
+    except Exception:
+        return 0
+
+
 def invalidate_prefix(prefix: str) -> int:
-    """Delete keys starting with a given prefix. Returns number of keys deleted."""
+    """Delete keys starting with a given prefix. Returns number of keys deleted.
+
+    Walks the keyspace with SCAN, so its cost grows with the cache; prefer
+    ``invalidate_namespace`` for whole namespaces.
+
+    Also drops the prefix from this process's L1 tier and tells every other
+    API process to do the same over the invalidation channel.
+    """
     if _cache_disabled:
         return 0
     try:
@@ -101,11 +310,86 @@ def invalidate_prefix(prefix: str) -> int:
                 total += client.delete(*keys)
             if cursor == 0:
                 break
+        # After the delete, so no process refills its L1 from the old Redis values
+        _forget(prefix)
+        client.publish(INVALIDATION_CHANNEL, prefix)
         return total
     except Exception:
         return 0
 
 
+# Delete the lock only if we still own it (it may have expired and been re-taken)
+_RELEASE_LOCK = "if redis.call('get', KEYS[1]) == ARGV[1] then return redis.call('del', KEYS[1]) else return 0 end"
+
+
+def acquire_lock(name: str, ttl_ms: int) -> Optional[str]:
+    """Try to take a short-lived Redis lock; returns an owner token, or None if another owner holds it.
+
+    When Redis is unavailable the token is returned without locking, so callers
+    simply proceed without cross-process exclusion.
+    """
+    token = uuid.uuid4().hex
+    if _cache_disabled:
+        return token
+    try:
+        if not _get_client().set(name, token, nx=True, px=max(1, int(ttl_ms))):
+            return None
+    except Exception:
+        pass
+    return token
+
+
+def release_lock(name: str, token: str) -> None:
+    if _cache_disabled:
+        return
+    try:
+        _get_client().eval(_RELEASE_LOCK, 1, name, token)
+    except Exception:
+        pass
+
+
+def _listen_for_invalidations() -> None:
+    backoff = 1.0
+    while not _listener_stop.is_set():
+        pubsub = None
+        try:
+            pubsub = _connect(decode_responses=True).pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(INVALIDATION_CHANNEL)
+            backoff = 1.0
+            while not _listener_stop.is_set():
+                message = pubsub.get_message(timeout=1.0)
+                if message:
+                    _forget(str(message["data"]))
+        except Exception:
+            # Redis went away: L1 entries expire on their own; retry the subscription
+            if _l1 is not None:
+                _l1.delete_prefix("")
+            _listener_stop.wait(backoff)
+            backoff = min(backoff * 2, 30.0)
+        finally:
+            if pubsub is not None:
+                try:
+                    pubsub.close()
+                except Exception:
+                    pass
+
+
+def start_invalidation_listener() -> bool:
+    """Subscribe this process's L1 tier to prefix invalidations (daemon thread)."""
+    global _listener
+    if _get_l1() is None or _cache_disabled:
+        return False
+    if _listener is None or not _listener.is_alive():
+        _listener_stop.clear()
+        _listener = threading.Thread(target=_listen_for_invalidations, name="cache-invalidation", daemon=True)
+        _listener.start()
+    return True
+
+
+def stop_invalidation_listener() -> None:
+    _listener_stop.set()
+
+
 def ping_redis() -> bool:
     """Best-effort ping to Redis with small timeouts.
 
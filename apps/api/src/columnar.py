@@ -0,0 +1,229 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import date
+from typing import Any, Callable, Iterable, Iterator, Optional, Sequence
+
+from sqlalchemy import (
+    BigInteger,
+    Boolean,
+    Date,
+    DateTime,
+    Float,
+    Integer,
+    SmallInteger,
+    String,
+    Text,
+    cast,
+    select,
+)
+
+from apps.common.src.models import (
+    DimDate,
+    DimFinMetric,
+    DimScoreType,
+    DimSource,
+    DimStock,
+    DimStyle,
+    FactFinFundamental,
+    FactScoreHistory,
+    FactScreenerRank,
+    FactTechnicalIndicator,
+)
+
+try:  # optional – columnar export needs pyarrow
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except Exception:  # pragma: no cover - handled by the export router (501)
+    pa = None  # type: ignore
+    pq = None  # type: ignore
+
+FORMATS = {
+    "arrow": "application/vnd.apache.arrow.stream",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+
+# -----------------------------------------------------------------------------
+#   Export datasets – one flat, typed select per fact table
+#   Numerics are cast to float8 and UUIDs to text in SQL, so rows map straight
+#   onto Arrow arrays without per-value Python conversion.
+# -----------------------------------------------------------------------------
+@dataclass(frozen=True)
+class Dataset:
+    name: str
+    fact: Any
+    columns: Callable[[], list]
+    joins: Callable[[Any], Any]
+
+
+def _date_and_symbol(fact) -> list:
+    return [
+        fact.date_key.label("date_key"),
+        DimDate.full_date.label("as_of_date"),
+        DimStock.symbol.label("symbol"),
+    ]
+
+
+DATASETS: dict[str, Dataset] = {
+    "score_history": Dataset(
+        "score_history",
+        FactScoreHistory,
+        lambda: _date_and_symbol(FactScoreHistory) + [
+            DimScoreType.score_type_name.label("score_type"),
+            DimSource.source_name.label("source"),
+            cast(FactScoreHistory.score, Float).label("score"),
+        ],
+        lambda q: q.join(DimScoreType, DimScoreType.score_type_key == FactScoreHistory.score_type_key)
+        .join(DimSource, DimSource.source_key == FactScoreHistory.source_key),
+    ),
+    "technicals": Dataset(
+        "technicals",
+        FactTechnicalIndicator,
+        lambda: _date_and_symbol(FactTechnicalIndicator) + [
+            FactTechnicalIndicator.indicator_code.label("indicator_code"),
+            cast(FactTechnicalIndicator.value, Float).label("value"),
+        ],
+        lambda q: q,
+    ),
+    "fundamentals": Dataset(
+        "fundamentals",
+        FactFinFundamental,
+        lambda: _date_and_symbol(FactFinFundamental) + [
+            DimFinMetric.metric_code.label("metric_code"),
+            FactFinFundamental.fiscal_year.label("fiscal_year"),
+            FactFinFundamental.fiscal_period.label("fiscal_period"),
+            cast(FactFinFundamental.metric_value, Float).label("metric_value"),
+            FactFinFundamental.restated.label("restated"),
+            FactFinFundamental.ttm_flag.label("ttm_flag"),
+            DimSource.source_name.label("source"),
+        ],
+        lambda q: q.join(DimFinMetric, DimFinMetric.metric_key == FactFinFundamental.metric_key)
+        .join(DimSource, DimSource.source_key == FactFinFundamental.source_key),
+    ),
+    "screener_ranks": Dataset(
+        "screener_ranks",
+        FactScreenerRank,
+        lambda: _date_and_symbol(FactScreenerRank) + [
+            DimStyle.style_name.label("style"),
+            DimSource.source_name.label("source"),
+            FactScreenerRank.rank_value.label("rank_value"),
+            cast(FactScreenerRank.screening_runid, Text).label("screening_runid"),
+        ],
+        lambda q: q.outerjoin(DimStyle, DimStyle.style_key == FactScreenerRank.style_key)
+        .join(DimSource, DimSource.source_key == FactScreenerRank.source_key),
+    ),
+}
+
+
+def date_key(d: date) -> int:
+    return d.year * 10000 + d.month * 100 + d.day
+
+
+def build_query(dataset: Dataset, start: date, end: date, symbols: Optional[Sequence[str]] = None):
+    """Select for *dataset* between *start* and *end* (inclusive), optionally by symbol.
+
+    The range is applied to the fact table's own date_key so Postgres prunes
+    partitions; rows come back in (date_key, symbol) order.
+    """
+    fact = dataset.fact
+    q = (
+        select(*dataset.columns())
+        .select_from(fact)
+        .join(DimDate, DimDate.date_key == fact.date_key)
+        .join(DimStock, DimStock.stock_key == fact.stock_key)
+    )
+    q = dataset.joins(q).where(fact.date_key >= date_key(start), fact.date_key <= date_key(end))
+    if symbols:
+        q = q.where(DimStock.symbol.in_([s.upper() for s in symbols]))
+    return q.order_by(fact.date_key, DimStock.symbol)
+
+
+# -----------------------------------------------------------------------------
+#   Arrow encoding
+# -----------------------------------------------------------------------------
+def arrow_type(sa_type) -> Any:
+    if isinstance(sa_type, Boolean):
+        return pa.bool_()
+    if isinstance(sa_type, SmallInteger):
+        return pa.int16()
+    if isinstance(sa_type, BigInteger):
+        return pa.int64()
+    if isinstance(sa_type, Integer):
+        return pa.int32()
+    if isinstance(sa_type, Float):
+        return pa.float64()
+    if isinstance(sa_type, DateTime):
+        return pa.timestamp("us")
+    if isinstance(sa_type, Date):
+        return pa.date32()
+    if isinstance(sa_type, (String, Text)):
+        return pa.string()
+    return pa.string()
+
+
+def arrow_schema(query) -> Any:
+    return pa.schema([pa.field(c.name, arrow_type(c.type)) for c in query.selected_columns])
+
+
+class _ChunkSink:
+    """Write-only file object that hands out what pyarrow wrote since the last drain."""
+
+    def __init__(self) -> None:
+        self._chunks: list[bytes] = []
+        self._pos = 0
+        self.closed = False
+
+    def write(self, data) -> int:
+        b = bytes(data)
+        self._chunks.append(b)
+        self._pos += len(b)
+        return len(b)
+
+    def tell(self) -> int:
+        return self._pos
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+    def writable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return False
+
+    def drain(self) -> bytes:
+        out = b"".join(self._chunks)
+        self._chunks.clear()
+        return out
+
+
+def encode_batches(schema, batches: Iterable[Sequence[Sequence[Any]]], fmt: str) -> Iterator[bytes]:
+    """Encode row batches as an Arrow IPC stream or Parquet file, chunk by chunk.
+
+    Each input batch becomes one record batch (Arrow) or row group (Parquet) and
+    is yielded as soon as it is written, so memory holds one batch at a time.
+    """
+    sink = _ChunkSink()
+    if fmt == "parquet":
+        writer = pq.ParquetWriter(sink, schema, compression="zstd")
+    else:
+        writer = pa.ipc.new_stream(sink, schema)
+    try:
+        for rows in batches:
+            if not rows:
+                continue
+            cols = list(zip(*rows))
+            arrays = [pa.array(col, type=field.type) for col, field in zip(cols, schema)]
+            writer.write_batch(pa.RecordBatch.from_arrays(arrays, schema=schema))
+            chunk = sink.drain()
+            if chunk:
+                yield chunk
+    finally:
+        writer.close()
+    tail = sink.drain()
+    if tail:
+        yield tail
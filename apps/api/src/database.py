@@ -1,18 +1,33 @@
-from typing import Generator
+
+from typing import Any, AsyncGenerator, Generator, Optional
 
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, Session
 
 from apps.common.src.logging import get_logger
-from .settings import Settings 
-from apps.common.src.models import Base               
+from .settings import Settings
+from apps.common.src.models import Base
 
 settings = Settings()
+
+
+def _pool_options(s: Settings) -> dict[str, Any]:
+    """Pool sizing shared by the sync and async engines (per API worker process)."""
+    return dict(
+        pool_size=int(s.api_db_pool_size or 10),
+        max_overflow=int(s.api_db_max_overflow if s.api_db_max_overflow is not None else 20),
+        pool_recycle=int(s.api_db_pool_recycle_seconds or 1800),
+        pool_timeout=int(s.api_db_pool_timeout_seconds or 30),
+        pool_pre_ping=True,
+    )
+
+
 engine = create_engine(
     f"postgresql+psycopg2://{settings.db_username}:{settings.password}"
     f"@{settings.host}:{settings.port}/{settings.database_name}",
-    pool_pre_ping=True,
     future=True,
+    **_pool_options(settings),
 )
 
 # Classic scoped session factory
@@ -31,3 +46,60 @@ def get_db() -> Generator[Session, None, None]:
         raise
     finally:
         db.close()
+
+
+# -------------------------------------------------------------------------
+#   Async engine (asyncpg) for `async def` routers: a request waiting on
+#   Postgres yields the event loop instead of holding a threadpool worker.
+#   Created on first use so importing this module never needs asyncpg.
+# -------------------------------------------------------------------------
+_async_engine: Optional[AsyncEngine] = None
+_AsyncSessionLocal: Optional[async_sessionmaker[AsyncSession]] = None
+
+
+def get_async_engine() -> AsyncEngine:
+    global _async_engine, _AsyncSessionLocal
+    if _async_engine is None:
+        # asyncpg keeps a per-connection LRU of prepared statements; set 0 behind pgbouncer
+        # (transaction pooling), where a statement prepared on one backend is gone on the next
+        cache_size = settings.api_db_statement_cache_size
+        cache_size = 100 if cache_size is None else int(cache_size)
+        _async_engine = create_async_engine(
+            f"postgresql+asyncpg://{settings.db_username}:{settings.password}"
+            f"@{settings.host}:{settings.port}/{settings.database_name}"
+            f"?prepared_statement_cache_size={cache_size}",
+            connect_args={"statement_cache_size": cache_size},
+            **_pool_options(settings),
+        )
+        _AsyncSessionLocal = async_sessionmaker(
+            _async_engine, autoflush=False, expire_on_commit=False
+        )
+        get_logger("api").info(
+            f"Async DB engine created (pool_size={_async_engine.pool.size()}, statement_cache={cache_size})"
+        )
+    return _async_engine
+
+
+def async_session_factory() -> async_sessionmaker[AsyncSession]:
+    get_async_engine()
+    assert _AsyncSessionLocal is not None
+    return _AsyncSessionLocal
+
+
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    """FastAPI dependency – async counterpart of `get_db` on the asyncpg pool."""
+    async with async_session_factory()() as db:
+        try:
+            yield db
+            await db.commit()
+        except Exception:
+            await db.rollback()
+            raise
+
+
+async def dispose_async_engine() -> None:
+    global _async_engine, _AsyncSessionLocal
+    if _async_engine is not None:
+        await _async_engine.dispose()
+        _async_engine = None
+        _AsyncSessionLocal = None
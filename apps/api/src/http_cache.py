@@ -1,14 +1,29 @@
 from __future__ import annotations
 
+import asyncio
+import gzip
+import hashlib
 import json
-from typing import Callable
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Optional
 
 from fastapi import Request
 from starlette.middleware.base import BaseHTTPMiddleware, RequestResponseEndpoint
-from starlette.responses import Response, JSONResponse
+from starlette.responses import Response
 
+try:  # optional: brotli-compressed entries when HTTP_CACHE_COMPRESSION=br
+    import brotli  # type: ignore
+except Exception:  # pragma: no cover
+    brotli = None  # type: ignore
+
+from apps.common.src.logging import get_logger
 from .settings import Settings
-from .cache import make_key, get_json, set_json, ping_redis, is_cache_disabled
+from .cache import make_key, get_bytes, set_bytes, ping_redis, is_cache_disabled, acquire_lock, release_lock
+
+
+# Waiters on another pod's fill re-check Redis this often
+LOCK_POLL_SECONDS = 0.05
 
 
 def _ttl_for_path(path: str, settings: Settings) -> int:
@@ -26,19 +41,184 @@ def _ttl_for_path(path: str, settings: Settings) -> int:
     return int(getattr(settings, "cache_ttl_default", None) or 180)
 
 
+# Stale-while-revalidate windows (seconds) by path prefix: once an entry is older
+# than its TTL it is still served for this long while one background request
+# recomputes it. Longest matching prefix wins; 0 turns it off for that prefix.
+# Override or extend with HTTP_CACHE_STALE_SECONDS='{"/api/v1/...": 600}'.
+DEFAULT_STALE_SECONDS: dict[str, int] = {
+    "/api/v1/grading/grades": 3600,
+    "/api/v1/grading/sectors": 86400,
+    "/api/v1/grading/asset/": 3600,
+    "/api/v1/signals/leaderboard": 3600,
+    "/api/v1/screener/": 3600,
+    "/api/v1/ai-analysis": 1800,
+}
+
+
+def _stale_for_path(path: str, settings: Settings) -> int:
+    windows = {**DEFAULT_STALE_SECONDS, **(getattr(settings, "http_cache_stale_seconds", None) or {})}
+    matches = [prefix for prefix in windows if path.startswith(prefix)]
+    return max(0, int(windows[max(matches, key=len)])) if matches else 0
+
+
+# Stored entry: MAGIC, one JSON metadata line, then the (possibly compressed) body bytes
+ENTRY_MAGIC = b"RAHC1\n"
+
+# Handler headers not stored with an entry: framing the cache sets itself,
+# per-response values, and CORS (added per Origin by the outer CORSMiddleware)
+_UNSTORED_HEADERS = {
+    "content-length", "content-encoding", "content-type", "etag", "transfer-encoding",
+    "connection", "date", "server", "set-cookie", "vary",
+}
+
+
+def _replayable(headers: Any) -> dict[str, str]:
+    return {
+        k.lower(): v
+        for k, v in headers.items()
+        if k.lower() not in _UNSTORED_HEADERS and not k.lower().startswith("access-control-")
+    }
+
+
+@dataclass
+class CachedBody:
+    content_type: str
+    encoding: str  # "identity", "gzip" or "br"
+    fresh_until: float
+    body: bytes
+    etag: str = ""  # validator of the uncompressed body
+    headers: dict[str, str] = field(default_factory=dict)  # handler headers safe to replay
+
+    @property
+    def stale(self) -> bool:
+        return time.time() >= self.fresh_until
+
+    def pack(self) -> bytes:
+        meta = {
+            "ct": self.content_type,
+            "enc": self.encoding,
+            "fresh_until": self.fresh_until,
+            "etag": self.etag,
+            "h": self.headers,
+        }
+        return ENTRY_MAGIC + json.dumps(meta, separators=(",", ":")).encode("utf-8") + b"\n" + self.body
+
+    @classmethod
+    def unpack(cls, raw: Optional[bytes]) -> Optional["CachedBody"]:
+        """Decode a stored entry; anything else (missing, older JSON-text format) is a miss."""
+        if not raw or not raw.startswith(ENTRY_MAGIC):
+            return None
+        try:
+            meta_line, body = raw[len(ENTRY_MAGIC):].split(b"\n", 1)
+            meta = json.loads(meta_line)
+            return cls(
+                meta["ct"], meta["enc"], float(meta["fresh_until"]), body, meta.get("etag", ""), meta.get("h") or {}
+            )
+        except Exception:
+            return None
+
+    def decoded(self) -> bytes:
+        if self.encoding == "gzip":
+            return gzip.decompress(self.body)
+        if self.encoding == "br" and brotli is not None:
+            return brotli.decompress(self.body)
+        return self.body
+
+
+def _compress(body: bytes, method: str, min_bytes: int) -> tuple[bytes, str]:
+    """Compress a body for storage; small bodies and method "none" stay identity."""
+    if method == "none" or len(body) < min_bytes:
+        return body, "identity"
+    if method == "br" and brotli is not None:
+        return brotli.compress(body, quality=5), "br"
+    return gzip.compress(body, compresslevel=6), "gzip"
+
+
+def make_etag(body: bytes) -> str:
+    """Weak validator from the uncompressed body, so it holds across content encodings."""
+    return f'W/"{hashlib.blake2b(body, digest_size=12).hexdigest()}"'
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """Weak comparison of an If-None-Match header against an ETag (RFC 9110 13.1.2)."""
+    if not if_none_match or not etag:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque for tag in if_none_match.split(","))
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag, "Vary": "Accept-Encoding"})
+
+
+def _qvalue(params: list[str]) -> float:
+    """q-value of one Accept-Encoding element; malformed values count as "not acceptable"."""
+    for param in params:
+        name, _, value = param.partition("=")
+        if name.strip() == "q":
+            try:
+                q = float(value.strip())
+            except ValueError:
+                return 0.0
+            return q if 0.0 <= q <= 1.0 else 0.0
+    return 1.0
+
+
+def _accepts(accept_encoding: str, encoding: str) -> bool:
+    """Whether Accept-Encoding allows ``encoding``; an explicit coding beats ``*`` (RFC 9110 12.5.3)."""
+    explicit: Optional[float] = None
+    wildcard: Optional[float] = None
+    for part in accept_encoding.lower().split(","):
+        token, *params = part.split(";")
+        token = token.strip()
+        if token == encoding:
+            explicit = max(explicit or 0.0, _qvalue(params))
+        elif token == "*":
+            wildcard = max(wildcard or 0.0, _qvalue(params))
+    q = explicit if explicit is not None else wildcard
+    return q is not None and q > 0
+
+
 class RedisHTTPCacheMiddleware(BaseHTTPMiddleware):
     """Simple read‑through cache for idempotent GET endpoints.
 
     - Caches JSON 200 responses in Redis keyed by method+path+sorted query.
     - Honors per‑path TTLs; default TTL if none specified.
     - Skips caching if the client sends Cache-Control: no-cache.
+    - Skips storing responses sent with Cache-Control: no-store (e.g. cursor pages).
     - Skips caching for refresh/invalidation endpoints.
+    - Coalesces misses (single-flight): concurrent requests for one key in this
+      process await a single handler call, and a short Redis lock makes other
+      pods poll for the filled key instead of running the handler as well.
+    - Stale-while-revalidate: each entry carries a soft expiry (the path TTL)
+      and lives in Redis until TTL + the prefix's stale window. Past the soft
+      expiry the stale body is served at once and a single background request
+      (one per key across pods) recomputes it.
+    - Entries are the handler's raw body bytes (gzip/brotli-compressed above a
+      size threshold) plus content type; hits are sent as stored when the
+      client accepts the encoding, without any JSON decoding or re-encoding.
+    - Every JSON 200 GET carries a weak ETag hashed from its body; a matching
+      If-None-Match gets 304. For cached paths the ETag is stored with the
+      entry, so a revalidating poll is answered from Redis alone.
     """
 
     def __init__(self, app):
         super().__init__(app)
         self.settings = Settings()
         self.enabled = bool(getattr(self.settings, "http_cache_enabled", True))
+        self.single_flight = bool(getattr(self.settings, "http_cache_single_flight", True))
+        self.lock_ttl_ms = int(getattr(self.settings, "http_cache_lock_ttl_ms", None) or 15000)
+        self.lock_wait_ms = int(getattr(self.settings, "http_cache_lock_wait_ms", None) or 10000)
+        self.compression = (getattr(self.settings, "http_cache_compression", None) or "gzip").lower()
+        self.compress_min_bytes = int(getattr(self.settings, "http_cache_compress_min_bytes", None) or 1024)
+        # key -> future resolved with the cached entry (None: not cacheable, run your own)
+        self._inflight: dict[str, asyncio.Future] = {}
+        # Keys with a background revalidation running in this process, and their tasks
+        self._revalidating: set[str] = set()
+        self._tasks: set[asyncio.Task] = set()
+        self.logger = get_logger("api")
         if self.enabled:
             # tiny health probe – if Redis not reachable, disable middleware
             try:
@@ -48,15 +228,16 @@ class RedisHTTPCacheMiddleware(BaseHTTPMiddleware):
                 self.enabled = False
 
     async def dispatch(self, request: Request, call_next: RequestResponseEndpoint) -> Response:
-        # Allow disabling via env for local dev
-        if not self.enabled or is_cache_disabled():
-            return await call_next(request)
         # Only cache GETs and allow opt-out
         if request.method != "GET":
             return await call_next(request)
 
+        # Allow disabling via env for local dev; responses still get validators
+        if not self.enabled or is_cache_disabled():
+            return await self._conditional(request, await call_next(request))
+
         if "no-cache" in request.headers.get("Cache-Control", "").lower():
-            return await call_next(request)
+            return await self._conditional(request, await call_next(request))
 
         # Skip caching for refresh endpoint (explicit invalidation path)
         if request.url.path.startswith("/api/v1/grading/refresh"):
@@ -66,33 +247,199 @@ class RedisHTTPCacheMiddleware(BaseHTTPMiddleware):
         params = dict(sorted(request.query_params.multi_items()))
         key = make_key(f"httpcache:{request.method}:{request.url.path}", params)
 
-        cached = get_json(key)
-        if cached is not None:
-            # Assume JSON payload and 200 OK
-            return JSONResponse(content=cached, status_code=200)
+        entry = CachedBody.unpack(get_bytes(key))
+        if entry is not None and entry.stale:
+            # The stale copy may be this worker's L1 while another pod has already
+            # revalidated: check Redis itself before recomputing
+            entry = CachedBody.unpack(get_bytes(key, skip_l1=True)) or entry
+            if entry.stale:
+                self._revalidate_in_background(request, key)
+        if entry is not None:
+            return self._respond(request, entry)
+
+        if not self.single_flight:
+            response, _ = await self._fill(request, call_next, key)
+            return response
 
-        # No cache – execute request
+        flight = self._inflight.get(key)
+        if flight is not None:
+            # Same key already being computed in this process: share its result
+            shared = await asyncio.shield(flight)
+            if shared is not None:
+                return self._respond(request, shared)
+            return await self._conditional(request, await call_next(request))
+
+        flight = asyncio.get_running_loop().create_future()
+        self._inflight[key] = flight
+        filled: Optional[CachedBody] = None
+        try:
+            response, filled = await self._fill_once_across_pods(request, call_next, key)
+            return response
+        finally:
+            self._inflight.pop(key, None)
+            if not flight.done():
+                flight.set_result(filled)
+
+    def _respond(self, request: Request, entry: CachedBody) -> Response:
+        """Send a stored entry as-is when the client accepts its encoding, else decoded."""
+        if etag_matches(request.headers.get("If-None-Match", ""), entry.etag):
+            return not_modified(entry.etag)
+        headers = dict(entry.headers)
+        if entry.etag:
+            headers["ETag"] = entry.etag
+        if entry.encoding == "identity":
+            return Response(content=entry.body, status_code=200, media_type=entry.content_type, headers=headers)
+        headers["Vary"] = "Accept-Encoding"
+        if _accepts(request.headers.get("Accept-Encoding", ""), entry.encoding):
+            headers["Content-Encoding"] = entry.encoding
+            return Response(content=entry.body, status_code=200, media_type=entry.content_type, headers=headers)
+        return Response(content=entry.decoded(), status_code=200, media_type=entry.content_type, headers=headers)
+
+    async def _conditional(self, request: Request, response: Response) -> Response:
+        """Add an ETag to an uncached JSON 200 response and answer 304 if the client has it."""
+        ctype = response.media_type or response.headers.get("content-type", "")
+        if (
+            response.status_code != 200
+            or "application/json" not in ctype.lower()
+            or "content-encoding" in response.headers
+            or "etag" in response.headers
+        ):
+            return response
+        body_bytes = getattr(response, "body", None)
+        if body_bytes is None:
+            body_bytes = b"".join([chunk async for chunk in response.body_iterator])  # type: ignore[attr-defined]
+        etag = make_etag(body_bytes)
+        if etag_matches(request.headers.get("If-None-Match", ""), etag):
+            return not_modified(etag)
+        headers = {k: v for k, v in response.headers.items() if k.lower() != "content-length"}
+        headers["ETag"] = etag
+        return Response(content=body_bytes, status_code=200, headers=headers, media_type=ctype)
+
+    async def _fill_once_across_pods(
+        self, request: Request, call_next: RequestResponseEndpoint, key: str
+    ) -> tuple[Response, Optional[CachedBody]]:
+        lock = f"lock:{key}"
+        token = acquire_lock(lock, self.lock_ttl_ms)
+        if token is None:
+            # Another pod holds the fill lock: wait for its entry, then fall back to running ourselves
+            loop = asyncio.get_running_loop()
+            deadline = loop.time() + self.lock_wait_ms / 1000.0
+            while loop.time() < deadline:
+                await asyncio.sleep(LOCK_POLL_SECONDS)
+                entry = CachedBody.unpack(get_bytes(key))
+                if entry is not None:
+                    return self._respond(request, entry), entry
+            token = acquire_lock(lock, self.lock_ttl_ms)
+        try:
+            return await self._fill(request, call_next, key)
+        finally:
+            if token is not None:
+                release_lock(lock, token)
+
+    async def _fill(
+        self, request: Request, call_next: RequestResponseEndpoint, key: str
+    ) -> tuple[Response, Optional[CachedBody]]:
+        """Run the handler; store and return the entry when the response is cacheable."""
         response = await call_next(request)
 
-        # Cache only JSON 200 responses
-        ctype = (response.media_type or "").lower()
-        if response.status_code == 200 and "application/json" in ctype:
-            try:
-                # JSONResponse has .body bytes available
-                body_bytes = response.body
-                if body_bytes is None:
-                    # Consume body_iterator if needed
-                    body_chunks = [chunk async for chunk in response.body_iterator]  # type: ignore[attr-defined]
-                    body_bytes = b"".join(body_chunks)
-                    # rebuild response so it can be sent to client
-                    response = Response(content=body_bytes, media_type=response.media_type, status_code=response.status_code)
-
-                payload = json.loads(body_bytes.decode("utf-8")) if body_bytes else None
-                if payload is not None:
-                    ttl = _ttl_for_path(request.url.path, self.settings)
-                    set_json(key, payload, ttl_secs=ttl)
-            except Exception:
-                # ignore cache errors and continue
-                pass
+        # Cache only JSON 200 responses the handler did not mark no-store. call_next
+        # returns a streaming wrapper without media_type, so read the header
+        ctype = response.media_type or response.headers.get("content-type", "")
+        no_store = "no-store" in response.headers.get("Cache-Control", "").lower()
+        encoded = "content-encoding" in response.headers
+        if response.status_code != 200 or "application/json" not in ctype.lower() or no_store or encoded:
+            return await self._conditional(request, response), None
+        try:
+            # JSONResponse has .body bytes available; the call_next wrapper has to be drained
+            body_bytes = getattr(response, "body", None)
+            if body_bytes is None:
+                body_chunks = [chunk async for chunk in response.body_iterator]  # type: ignore[attr-defined]
+                body_bytes = b"".join(body_chunks)
+            entry = self._store(key, request.url.path, body_bytes, ctype, _replayable(response.headers))
+        except Exception:
+            # ignore cache errors and continue
+            return response, None
+        if entry is None:
+            out = Response(content=body_bytes, status_code=200, media_type=ctype)
+        else:
+            out = self._respond(request, entry)
+        # Keep every other header the handler set (e.g. cookies) on this response
+        present = {k for k, _ in out.raw_headers} | {b"content-length", b"content-encoding"}
+        out.raw_headers.extend((k, v) for k, v in response.raw_headers if k.lower() not in present)
+        return out, entry
+
+    def _store(
+        self,
+        key: str,
+        path: str,
+        body_bytes: Optional[bytes],
+        content_type: str,
+        headers: Optional[dict[str, str]] = None,
+    ) -> Optional[CachedBody]:
+        if not body_bytes:
+            return None
+        ttl = _ttl_for_path(path, self.settings)
+        stale = _stale_for_path(path, self.settings)
+        body, encoding = _compress(body_bytes, self.compression, self.compress_min_bytes)
+        entry = CachedBody(content_type, encoding, time.time() + ttl, body, make_etag(body_bytes), headers or {})
+        set_bytes(key, entry.pack(), ttl_secs=ttl + stale)
+        return entry
+
+    def _revalidate_in_background(self, request: Request, key: str) -> None:
+        if key in self._revalidating:
+            return
+        lock = f"revalidate:{key}"
+        token = acquire_lock(lock, self.lock_ttl_ms)
+        if token is None:
+            # Another pod is already recomputing this entry
+            return
+        self._revalidating.add(key)
+        task = asyncio.create_task(self._revalidate(dict(request.scope), key, lock, token))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _revalidate(self, scope: dict[str, Any], key: str, lock: str, token: str) -> None:
+        """Re-run the downstream app for a stale entry (outside any client request) and store it."""
+        status = 0
+        headers: dict[str, str] = {}
+        chunks: list[bytes] = []
+        sent = False
+
+        async def receive() -> dict[str, Any]:
+            nonlocal sent
+            if not sent:
+                sent = True
+                return {"type": "http.request", "body": b"", "more_body": False}
+            # Nobody disconnects a background request
+            await asyncio.Event().wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message: dict[str, Any]) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                headers.update((k.decode("latin-1").lower(), v.decode("latin-1")) for k, v in message.get("headers", []))
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
 
-        return response
+        start = time.perf_counter()
+        try:
+            scope["state"] = {}
+            await self.app(scope, receive, send)
+            ctype = headers.get("content-type", "")
+            cacheable = (
+                status == 200
+                and "application/json" in ctype.lower()
+                and "no-store" not in headers.get("cache-control", "").lower()
+                and "content-encoding" not in headers
+            )
+            if cacheable:
+                self._store(key, scope["path"], b"".join(chunks), ctype, _replayable(headers))
+            self.logger.debug(
+                f"Revalidated {scope['path']} ({status}) in {(time.perf_counter() - start) * 1000:.0f} ms"
+            )
+        except Exception as exc:
+            self.logger.warning(f"Background revalidation of {scope.get('path')} failed: {exc}")
+        finally:
+            self._revalidating.discard(key)
+            release_lock(lock, token)
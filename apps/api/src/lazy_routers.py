@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+import threading
+import time
+from typing import Any, Callable, Iterable
+
+from fastapi import APIRouter, FastAPI
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from apps.common.src.logging import get_logger
+
+
+def crud_classes(base) -> list[Any]:
+    """Mapped classes that get a generic CRUD router (skips relationship-only helpers)."""
+    return [m.class_ for m in base.registry.mappers if getattr(m.class_, "__table__", None) is not None]
+
+
+class LazyCrudRouters:
+    """Builds each table's generic CRUD router on the first request to its prefix.
+
+    Eagerly generating Pydantic models and routes for every mapped class costs
+    most of the API's import time and memory; most pods only ever serve a few
+    of those tables. Routers are appended to the app's route table on demand,
+    and the OpenAPI document builds the rest the first time it is requested.
+    """
+
+    def __init__(self, app: FastAPI, classes: Iterable[Any], build: Callable[[Any], APIRouter]) -> None:
+        self.app = app
+        self.build = build
+        self._pending = {c.__tablename__: c for c in classes}
+        self._lock = threading.Lock()
+        self.logger = get_logger("api")
+        self._openapi = app.openapi
+        app.openapi = self._openapi_with_all_routers  # type: ignore[method-assign]
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    def ensure(self, tablename: str) -> bool:
+        """Mount the router for *tablename* if it is still pending; True if mounted now."""
+        if tablename not in self._pending:
+            return False
+        with self._lock:
+            sa_cls = self._pending.pop(tablename, None)
+            if sa_cls is None:
+                return False
+            start = time.perf_counter()
+            try:
+                self.app.include_router(self.build(sa_cls))
+            except Exception:
+                self._pending[tablename] = sa_cls
+                raise
+            # Routes changed; regenerate the schema next time it is asked for
+            self.app.openapi_schema = None
+        self.logger.debug(f"Mounted CRUD router /{tablename} in {(time.perf_counter() - start) * 1000:.1f} ms")
+        return True
+
+    def ensure_all(self) -> None:
+        for tablename in list(self._pending):
+            self.ensure(tablename)
+
+    def _openapi_with_all_routers(self) -> dict[str, Any]:
+        if self._pending:
+            self.ensure_all()
+        return self._openapi()
+
+
+class LazyRouterMiddleware:
+    """ASGI middleware: mount a pending CRUD router before its first request is routed."""
+
+    def __init__(self, app: ASGIApp, routers: LazyCrudRouters) -> None:
+        self.app = app
+        self.routers = routers
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http" and self.routers.pending:
+            head = scope.get("path", "/").lstrip("/").split("/", 1)[0]
+            if head:
+                self.routers.ensure(head)
+        await self.app(scope, receive, send)
@@ -1,16 +1,18 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy.orm import DeclarativeMeta
 
 from apps.common.src.models import Base                                    # ← your huge registry
 from .settings import Settings
 from .router_factory import build_router
+from .lazy_routers import LazyCrudRouters, LazyRouterMiddleware, crud_classes
 from .http_cache import RedisHTTPCacheMiddleware
 from .request_logging import RequestLoggingMiddleware
-from .cache import ping_redis, disable_cache_globally
+from .cache import ping_redis, disable_cache_globally, start_invalidation_listener, stop_invalidation_listener
+from .database import dispose_async_engine
 from apps.common.src.logging import get_logger
 from .routers import grading, signals, backtest, pipeline, ai_analysis, screener
 from .routers import technicals
+from .routers import export
 
 app = FastAPI(
     title="RankAlpha Data‑Lake",
@@ -30,16 +32,7 @@ if _s.log_level:
     except Exception:
         logger.setLevel(_logging.INFO)
 
-# Add CORS middleware for frontend (env-driven with sensible defaults)
 settings = Settings()
-default_origins = ["http://localhost:3000", "http://localhost:3001"]
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=settings.cors_origins or default_origins,
-    allow_credentials=settings.cors_allow_credentials,
-    allow_methods=settings.cors_allow_methods or ["*"],
-    allow_headers=settings.cors_allow_headers or ["*"],
-)
 
 # Request logging and global GET cache (Redis)
 app.add_middleware(RequestLoggingMiddleware)
@@ -53,6 +46,7 @@ app.include_router(pipeline.router)
 app.include_router(ai_analysis.router)
 app.include_router(screener.router)
 app.include_router(technicals.router)
+app.include_router(export.router)
 
 # Startup health probe for Redis cache – disables cache if unreachable
 @app.on_event("startup")
@@ -63,17 +57,40 @@ async def _startup_health():
             logger.warning("HTTP cache disabled: Redis not reachable in startup probe")
         else:
             logger.info("HTTP cache enabled: Redis reachable")
+            if start_invalidation_listener():
+                logger.info("L1 cache enabled: listening for Redis invalidations")
     except Exception:
         disable_cache_globally()
         logger.warning("HTTP cache disabled: Redis probe raised exception")
 
+
+# Close pooled asyncpg connections and the L1 invalidation listener on worker shutdown
+@app.on_event("shutdown")
+async def _shutdown_db():
+    stop_invalidation_listener()
+    await dispose_async_engine()
+
 # -------------------------------------------------------------------------
-#   Dynamically build + mount a router for **every** SQLAlchemy class
-#   – views come out read‑only; ordinary tables get full CRUD.
+#   Generic CRUD router for **every** SQLAlchemy class
+#   – views come out read‑only; ordinary tables get full CRUD.
+#   Lazy (default): each router is built on the first request to its
+#   /<table> prefix, or when /openapi.json is first generated.
 # -------------------------------------------------------------------------
-for mapper in Base.registry.mappers:
-    sa_cls: DeclarativeMeta = mapper.class_
-    # skip the synthetic relationship‑only helpers (no __table__)
-    if getattr(sa_cls, "__table__", None) is None:
-        continue
-    app.include_router(build_router(sa_cls))
+if getattr(settings, "api_lazy_crud_routers", True):
+    crud_routers = LazyCrudRouters(app, crud_classes(Base), build_router)
+    app.add_middleware(LazyRouterMiddleware, routers=crud_routers)
+else:
+    for sa_cls in crud_classes(Base):
+        app.include_router(build_router(sa_cls))
+
+# Add CORS middleware for frontend (env-driven with sensible defaults). Added
+# last so it is outermost: cache hits and 304s from RedisHTTPCacheMiddleware
+# get CORS headers too
+default_origins = ["http://localhost:3000", "http://localhost:3001"]
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=settings.cors_origins or default_origins,
+    allow_credentials=settings.cors_allow_credentials,
+    allow_methods=settings.cors_allow_methods or ["*"],
+    allow_headers=settings.cors_allow_headers or ["*"],
+)
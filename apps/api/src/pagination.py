@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+import base64
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Optional, Sequence
+from uuid import UUID
+
+from fastapi import HTTPException, Query, status
+from sqlalchemy import Column, Table, and_, or_, tuple_
+
+
+# -----------------------------------------------------------------------------
+#   Cursor tokens – the last row's primary key, JSON + urlsafe base64
+# -----------------------------------------------------------------------------
+def json_default(value: Any) -> Any:
+    """`json.dumps` fallback for the column types our tables use."""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, UUID):
+        return str(value)
+    if isinstance(value, (bytes, memoryview)):
+        return bytes(value).hex()
+    return str(value)
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    raw = json.dumps(list(values), default=json_default, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def _coerce(col: Column, value: Any) -> Any:
+    if value is None:
+        return None
+    try:
+        typ = col.type.python_type
+    except NotImplementedError:
+        return value
+    if typ is datetime:
+        return datetime.fromisoformat(value)
+    if typ is date:
+        return date.fromisoformat(value)
+    if typ is UUID:
+        return UUID(str(value))
+    if typ is Decimal:
+        return Decimal(str(value))
+    return typ(value)
+
+
+def decode_cursor(token: str, key_cols: Sequence[Column]) -> tuple[Any, ...]:
+    """Decode a cursor into typed key values; 400 on anything malformed."""
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        values = json.loads(raw)
+        if not isinstance(values, list) or len(values) != len(key_cols):
+            raise ValueError("cursor does not match the table key")
+        return tuple(_coerce(c, v) for c, v in zip(key_cols, values))
+    except Exception:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+
+def after_key(key_cols: Sequence[Column], values: Sequence[Any]):
+    """WHERE clause for rows strictly after `values` in key order.
+
+    A single row-value comparison lets Postgres seek the primary-key index;
+    the expanded OR form is only needed when a key value is NULL.
+    """
+    if len(key_cols) == 1:
+        return key_cols[0] > values[0]
+    if all(v is not None for v in values):
+        return tuple_(*key_cols) > tuple_(*values)
+    terms = []
+    for i, col in enumerate(key_cols):
+        prefix = [key_cols[j] == values[j] for j in range(i)]
+        terms.append(and_(*prefix, col > values[i]))
+    return or_(*terms)
+
+
+# -----------------------------------------------------------------------------
+#   Projection and date_key range (partition pruning on the fact tables)
+# -----------------------------------------------------------------------------
+def parse_fields(fields: Optional[str], table: Table) -> Optional[list[Column]]:
+    """Columns named in a comma-separated `fields` parameter, in table order."""
+    if not fields:
+        return None
+    wanted = {f.strip() for f in fields.split(",") if f.strip()}
+    unknown = wanted - set(table.columns.keys())
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown fields: {', '.join(sorted(unknown))}",
+        )
+    return [c for c in table.columns if c.name in wanted]
+
+
+def date_key_range(
+    date_key_from: Optional[int] = Query(None, description="Inclusive lower bound (YYYYMMDD)"),
+    date_key_to: Optional[int] = Query(None, description="Inclusive upper bound (YYYYMMDD)"),
+) -> tuple[Optional[int], Optional[int]]:
+    if date_key_from is not None and date_key_to is not None and date_key_from > date_key_to:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="date_key_from is after date_key_to"
+        )
+    return date_key_from, date_key_to
+
+
+def no_date_key_range() -> tuple[Optional[int], Optional[int]]:
+    """Stand-in dependency for tables without a date_key column."""
+    return None, None
+
+
+def date_key_filters(table: Table, bounds: tuple[Optional[int], Optional[int]]) -> list:
+    col = table.columns.get("date_key")
+    if col is None:
+        return []
+    lo, hi = bounds
+    out = []
+    if lo is not None:
+        out.append(col >= lo)
+    if hi is not None:
+        out.append(col <= hi)
+    return out
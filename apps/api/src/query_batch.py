@@ -0,0 +1,60 @@
+from __future__ import annotations
+
+import asyncio
+from typing import Any, Callable, Optional
+
+from sqlalchemy.engine import Result
+from sqlalchemy.sql import Executable
+
+
+# Connections one gather_queries call holds at once
+MAX_FANOUT = 3
+
+# How each query's Result is materialised before its session goes back to the pool
+SHAPES: dict[str, Callable[[Result], Any]] = {
+    "all": lambda r: r.all(),
+    "first": lambda r: r.first(),
+    "one_or_none": lambda r: r.one_or_none(),
+    "scalar": lambda r: r.scalar(),
+    "scalar_one_or_none": lambda r: r.scalar_one_or_none(),
+    "scalars": lambda r: r.scalars().all(),
+}
+
+
+async def gather_queries(
+    *queries: tuple[Executable, str],
+    session_factory: Optional[Callable[[], Any]] = None,
+    release: Optional[Any] = None,
+    max_concurrency: int = MAX_FANOUT,
+) -> list[Any]:
+    """Run independent read queries concurrently, each on its own pooled async session.
+
+    Each query is a ``(statement, shape)`` pair where *shape* is a key of
+    ``SHAPES``; results come back in the same order. A composite endpoint then
+    waits for its slowest query instead of the sum of all of them. ORM rows are
+    loaded before their session closes and stay usable (sessions do not expire
+    on close).
+
+    At most ``max_concurrency`` queries of one call hold a connection at a time.
+    Pass the request's session as ``release``: it is committed first so it
+    returns its connection to the pool instead of holding it while the fan-out
+    waits for more (which can exhaust the pool under load). The session stays
+    usable afterwards; loaded objects are not expired.
+    """
+    for _, shape in queries:
+        if shape not in SHAPES:
+            raise ValueError(f"Unknown result shape '{shape}'")
+    if session_factory is None:
+        from .database import async_session_factory
+
+        session_factory = async_session_factory()
+    if release is not None:
+        await release.commit()
+    limit = asyncio.Semaphore(max(1, max_concurrency))
+
+    async def run(stmt: Executable, shape: str) -> Any:
+        async with limit:
+            async with session_factory() as session:
+                return SHAPES[shape](await session.execute(stmt))
+
+    return list(await asyncio.gather(*(run(stmt, shape) for stmt, shape in queries)))
@@ -0,0 +1,179 @@
+from __future__ import annotations
+
+import functools
+import inspect
+import json
+from collections import Counter, defaultdict
+from contextvars import ContextVar
+from typing import Any, Callable, Iterable, Optional
+
+from fastapi import Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.params import Depends
+from pydantic import TypeAdapter
+from pydantic.fields import FieldInfo
+
+from apps.common.src.logging import get_logger
+from .cache import make_key, get_bytes, set_bytes, invalidate_namespace, namespace_generation
+from .settings import Settings
+
+
+# Data domains routes tag their entries with; /grading/refresh bumps them all
+# after a pipeline run. A route's key embeds each tag's generation, so one INCR
+# per tag invalidates every route that reads that data.
+DATA_TAGS = ("scores", "prices", "screener", "ai")
+
+logger = get_logger("api")
+_settings: Optional[Settings] = None
+_bypass: ContextVar[bool] = ContextVar("route_cache_bypass", default=False)
+_stats: defaultdict[str, Counter] = defaultdict(Counter)
+
+
+def _get_settings() -> Settings:
+    global _settings
+    if _settings is None:
+        _settings = Settings()
+    return _settings
+
+
+def _ttl(name: str, default: int, ttl_setting: Optional[str]) -> int:
+    settings = _get_settings()
+    overrides = getattr(settings, "api_route_cache_ttl_seconds", None) or {}
+    if name in overrides:
+        return int(overrides[name])
+    if ttl_setting:
+        return int(getattr(settings, ttl_setting, None) or default)
+    return default
+
+
+async def honor_no_cache(request: Request) -> None:
+    """Router dependency: ``Cache-Control: no-cache`` recomputes (and re-stores) instead of reading."""
+    _bypass.set("no-cache" in request.headers.get("Cache-Control", "").lower())
+
+
+def cache_stats() -> dict[str, dict[str, int]]:
+    """Per-route hit/miss/error counters for this worker."""
+    return {name: dict(counts) for name, counts in sorted(_stats.items())}
+
+
+def invalidate_tags(*tags: str) -> dict[str, int]:
+    """Invalidate every route entry carrying any of these tags; returns the new generations."""
+    return {tag: invalidate_namespace(f"tag.{tag}") for tag in tags}
+
+
+class _Codec:
+    """Typed (de)serialization: pydantic's Rust JSON encoder/validator for a model, plain JSON otherwise."""
+
+    def __init__(self, model: Any = None):
+        self.adapter = TypeAdapter(model) if model is not None else None
+
+    def dumps(self, value: Any) -> bytes:
+        if self.adapter is not None:
+            # Handlers may return the model or an equivalent dict
+            return self.adapter.dump_json(value, warnings=False)
+        return json.dumps(jsonable_encoder(value), separators=(",", ":")).encode("utf-8")
+
+    def loads(self, raw: bytes) -> Any:
+        if self.adapter is not None:
+            return self.adapter.validate_json(raw)
+        return json.loads(raw)
+
+
+def cached(
+    name: str,
+    *,
+    model: Any = None,
+    ttl: int = 180,
+    ttl_setting: Optional[str] = None,
+    tags: Iterable[str] = (),
+    normalize: Optional[dict[str, Callable[[Any], Any]]] = None,
+):
+    """Cache-aside decorator for router functions (sync or async).
+
+    The key is ``name`` plus the call's validated parameters (dependencies such
+    as the DB session are skipped; Pydantic bodies are dumped), with each tag's
+    generation mixed in. ``normalize`` maps parameter names to functions applied
+    for the key only (e.g. ``{"symbol": str.upper}``). ``model`` is the return
+    type used to encode and decode entries; hits return that type. TTL comes
+    from ``API_ROUTE_CACHE_TTL_SECONDS[name]``, then the ``ttl_setting``
+    attribute of Settings, then ``ttl``. Exceptions (404s included) are not cached.
+    """
+    tags = tuple(tags)
+    normalize = normalize or {}
+    codec = _Codec(model)
+
+    def decorator(func: Callable[..., Any]) -> Callable[..., Any]:
+        signature = inspect.signature(func)
+        key_params = [
+            param.name
+            for param in signature.parameters.values()
+            if not isinstance(param.default, Depends)
+        ]
+
+        def key_for(args: tuple, kwargs: dict) -> str:
+            bound = signature.bind_partial(*args, **kwargs)
+            bound.apply_defaults()
+            params: dict[str, Any] = {}
+            for pname in key_params:
+                value = bound.arguments.get(pname)
+                if isinstance(value, FieldInfo):
+                    # Called directly (not through FastAPI): use the Query default
+                    value = value.get_default(call_default_factory=True)
+                if pname in normalize and value is not None:
+                    value = normalize[pname](value)
+                params[pname] = jsonable_encoder(value)
+            if tags:
+                params["_tags"] = [namespace_generation(f"tag.{tag}") for tag in tags]
+            return make_key(f"route.{name}", params)
+
+        def lookup(key: str) -> tuple[bool, Any]:
+            if _bypass.get():
+                _stats[name]["bypass"] += 1
+                return False, None
+            raw = get_bytes(key)
+            if raw is None:
+                _stats[name]["miss"] += 1
+                return False, None
+            try:
+                value = codec.loads(raw)
+            except Exception as exc:
+                # Entry from an older shape of the model: recompute and overwrite
+                _stats[name]["error"] += 1
+                logger.debug(f"Discarding cached {name} entry: {exc}")
+                return False, None
+            _stats[name]["hit"] += 1
+            return True, value
+
+        def store(key: str, value: Any) -> None:
+            try:
+                set_bytes(key, codec.dumps(value), ttl_secs=_ttl(name, ttl, ttl_setting))
+            except Exception as exc:
+                _stats[name]["error"] += 1
+                logger.debug(f"Could not cache {name}: {exc}")
+
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                key = key_for(args, kwargs)
+                hit, value = lookup(key)
+                if hit:
+                    return value
+                value = await func(*args, **kwargs)
+                store(key, value)
+                return value
+
+            return async_wrapper
+
+        @functools.wraps(func)
+        def sync_wrapper(*args, **kwargs):
+            key = key_for(args, kwargs)
+            hit, value = lookup(key)
+            if hit:
+                return value
+            value = func(*args, **kwargs)
+            store(key, value)
+            return value
+
+        return sync_wrapper
+
+    return decorator
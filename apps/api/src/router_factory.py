@@ -1,13 +1,44 @@
 from __future__ import annotations
 
-from typing import Any, Callable, Sequence, Tuple, Type
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+import json
+from typing import Any, Callable, Iterator, Optional, Sequence, Tuple, Type
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, StreamingResponse
 from sqlalchemy.orm import Session
 from sqlalchemy import select, update, delete, exc
 
-from .database import get_db
+from .database import engine, get_db
+from .pagination import (
+    after_key,
+    date_key_filters,
+    date_key_range,
+    decode_cursor,
+    encode_cursor,
+    json_default,
+    no_date_key_range,
+    parse_fields,
+)
 from .schemas import make_pydantic_pair
 
+# Rows fetched per round-trip from the server-side cursor in NDJSON exports
+EXPORT_BATCH_ROWS = 2000
+
+
+def _ndjson_rows(stmt, batch_rows: int = EXPORT_BATCH_ROWS) -> Iterator[bytes]:
+    """Stream *stmt* as NDJSON from a server-side cursor, one batch in memory at a time.
+
+    Uses its own connection: the request's session is closed before a
+    StreamingResponse body is sent.
+    """
+    with engine.connect() as conn:
+        result = conn.execution_options(stream_results=True, max_row_buffer=batch_rows).execute(stmt)
+        for part in result.mappings().partitions(batch_rows):
+            yield b"".join(
+                json.dumps(dict(row), default=json_default, separators=(",", ":")).encode("utf-8") + b"\n"
+                for row in part
+            )
+
 def build_router(sa_cls) -> APIRouter:
     """Generate an APIRouter with full CRUD for *sa_cls*.
 
@@ -17,17 +48,73 @@ def build_router(sa_cls) -> APIRouter:
     router = APIRouter(tags=[sa_cls.__tablename__], prefix=f"/{sa_cls.__tablename__}")
 
     ModelIn, ModelOut = make_pydantic_pair(sa_cls)
-    pk_cols = [c for c in sa_cls.__table__.columns if c.primary_key]
+    table = sa_cls.__table__
+    pk_cols = [c for c in table.columns if c.primary_key]
+    pk_attrs = [sa_cls.__mapper__.get_property_by_column(c).key for c in pk_cols]
     read_only = sa_cls.__tablename__.startswith(("v_", "vw_")) or sa_cls.__name__.startswith("V")
+    # date_key bounds let Postgres prune the partitions of the large fact tables
+    date_range = date_key_range if "date_key" in table.columns else no_date_key_range
 
-    # ---- GET many (with basic paging) ----------------------------------------
+    def _projection(fields: Optional[str]):
+        cols = parse_fields(fields, table)
+        if cols is None:
+            return None
+        # Key columns always come back so the next cursor can be built
+        return [c for c in table.columns if c in cols or c.primary_key]
+
+    def _keyset(stmt, cursor: Optional[str], bounds):
+        where = date_key_filters(table, bounds)
+        if cursor and pk_cols:
+            where.append(after_key(pk_cols, decode_cursor(cursor, pk_cols)))
+        if where:
+            stmt = stmt.where(*where)
+        return stmt.order_by(*pk_cols) if pk_cols else stmt
+
+    # ---- GET many (keyset paging, projection, date_key range) --------------
     @router.get("/", response_model=list[ModelOut])
     def list_items(
+        response: Response,
         db: Session = Depends(get_db),
-        skip: int = Query(0, ge=0),
-        limit: int = Query(100, le=500),
+        skip: int = Query(0, ge=0, description="Offset paging; ignored when cursor is given"),
+        limit: int = Query(100, ge=1, le=500),
+        cursor: Optional[str] = Query(None, description="X-Next-Cursor from the previous page"),
+        fields: Optional[str] = Query(None, description="Comma-separated columns to return"),
+        bounds: tuple = Depends(date_range),
+    ):
+        cols = _projection(fields)
+        stmt = _keyset(select(*cols) if cols else select(sa_cls), cursor, bounds)
+        if skip and not cursor:
+            stmt = stmt.offset(skip)
+        stmt = stmt.limit(limit)
+        if cols:
+            rows = [{c.name: r._mapping[c] for c in cols} for r in db.execute(stmt)]
+            last_key = [rows[-1][c.name] for c in pk_cols] if rows else None
+        else:
+            rows = db.scalars(stmt).all()
+            last_key = [getattr(rows[-1], a) for a in pk_attrs] if rows else None
+        headers = {}
+        if pk_cols and len(rows) == limit:
+            headers["X-Next-Cursor"] = encode_cursor(last_key)
+            # A page is only meaningful with its cursor; keep it out of the HTTP cache
+            headers["Cache-Control"] = "no-store"
+        if cols:
+            return JSONResponse(content=jsonable_encoder(rows), headers=headers)
+        response.headers.update(headers)
+        return rows
+
+    # ---- Bulk export as NDJSON (server-side cursor) -------------------------
+    @router.get("/export.ndjson", response_class=StreamingResponse)
+    def export_ndjson(
+        limit: Optional[int] = Query(None, ge=1, description="Stop after this many rows"),
+        cursor: Optional[str] = Query(None, description="Resume after this key (see X-Next-Cursor)"),
+        fields: Optional[str] = Query(None, description="Comma-separated columns to return"),
+        bounds: tuple = Depends(date_range),
     ):
-        return db.scalars(select(sa_cls).offset(skip).limit(limit)).all()
+        cols = _projection(fields) or list(table.columns)
+        stmt = _keyset(select(*cols), cursor, bounds)
+        if limit:
+            stmt = stmt.limit(limit)
+        return StreamingResponse(_ndjson_rows(stmt), media_type="application/x-ndjson")
 
     # ---- GET by PK (only if single‑key) -------------------------------------
     if len(pk_cols) == 1:
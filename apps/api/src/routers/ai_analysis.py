@@ -5,11 +5,12 @@ from datetime import date, datetime
 from uuid import UUID
 
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, and_, desc, asc, func
 from pydantic import BaseModel, Field
 
-from ..database import get_db
+from ..database import get_async_db
+from ..route_cache import cached, honor_no_cache
 from apps.common.src.models import VwAiAnalysisFull, DimStock
 
 
@@ -77,12 +78,13 @@ class AiAnalysisList(BaseModel):
     page_size: int
 
 
-router = APIRouter(tags=["ai-analysis"], prefix="/api/v1/ai-analysis")
+router = APIRouter(tags=["ai-analysis"], prefix="/api/v1/ai-analysis", dependencies=[Depends(honor_no_cache)])
 
 
 @router.get("", response_model=AiAnalysisList)
-def list_ai_analyses(
-    db: Session = Depends(get_db),
+@cached("ai.list", model=AiAnalysisList, ttl=300, ttl_setting="cache_ttl_top_performers", tags=("ai",))
+async def list_ai_analyses(
+    db: AsyncSession = Depends(get_async_db),
     symbol: Optional[str] = Query(None, description="Filter by symbol"),
     date_from: Optional[str] = Query(None, description="YYYY-MM-DD inclusive"),
     date_to: Optional[str] = Query(None, description="YYYY-MM-DD inclusive"),
@@ -118,39 +120,48 @@ def list_ai_analyses(
     )
 
     # Proper COUNT(*) with same filters (ignore ordering/pagination)
-    total_count = db.execute(
+    total_count = (await db.execute(
         select(func.count())
         .select_from(VwAiAnalysisFull)
         .join(DimStock, DimStock.symbol == VwAiAnalysisFull.symbol)
         .where(*(criteria + [DimStock.is_active.is_(True)]))
-    ).scalar() or 0
+    )).scalar() or 0
 
-    rows = db.execute(q).scalars().all()
+    rows = (await db.execute(q)).scalars().all()
     items = [AiAnalysisItem(**_row_to_dict(r)) for r in rows]
     return AiAnalysisList(items=items, total_count=total_count, page=skip // limit + 1, page_size=limit)
 
 
 @router.get("/{symbol}", response_model=AiAnalysisItem)
-def get_latest_for_symbol(symbol: str, db: Session = Depends(get_db)):
-    row = db.execute(
+@cached(
+    "ai.latest",
+    model=AiAnalysisItem,
+    ttl=600,
+    ttl_setting="cache_ttl_stock_detail",
+    tags=("ai",),
+    normalize={"symbol": str.upper},
+)
+async def get_latest_for_symbol(symbol: str, db: AsyncSession = Depends(get_async_db)):
+    row = (await db.execute(
         select(VwAiAnalysisFull)
         .join(DimStock, DimStock.symbol == VwAiAnalysisFull.symbol)
         .where(VwAiAnalysisFull.symbol == symbol.upper(), DimStock.is_active.is_(True))
         .order_by(desc(VwAiAnalysisFull.as_of_date))
         .limit(1)
-    ).scalar_one_or_none()
+    )).scalar_one_or_none()
     if not row:
         raise HTTPException(status_code=404, detail=f"No AI analysis for {symbol}")
     return AiAnalysisItem(**_row_to_dict(row))
 
 
 @router.get("/id/{analysis_id}", response_model=AiAnalysisItem)
-def get_by_id(analysis_id: UUID, db: Session = Depends(get_db)):
-    row = db.execute(
+@cached("ai.by_id", model=AiAnalysisItem, ttl=3600, tags=("ai",))
+async def get_by_id(analysis_id: UUID, db: AsyncSession = Depends(get_async_db)):
+    row = (await db.execute(
         select(VwAiAnalysisFull)
         .join(DimStock, DimStock.symbol == VwAiAnalysisFull.symbol)
         .where(VwAiAnalysisFull.analysis_id == analysis_id, DimStock.is_active.is_(True))
-    ).scalar_one_or_none()
+    )).scalar_one_or_none()
     if not row:
         raise HTTPException(status_code=404, detail="analysis_id not found")
     return AiAnalysisItem(**_row_to_dict(row))
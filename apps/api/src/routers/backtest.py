@@ -11,6 +11,7 @@ from sqlalchemy import select, func, and_, or_, desc, asc
 from pydantic import BaseModel, Field
 
 from ..database import get_db
+from ..route_cache import cached, honor_no_cache
 from apps.common.src.models import (
     DimStock, 
     FactScoreHistory,
@@ -52,7 +53,7 @@ class QuickBacktestResult(BaseModel):
     trades_count: int
 
 
-router = APIRouter(tags=["backtest"], prefix="/api/v1/backtest")
+router = APIRouter(tags=["backtest"], prefix="/api/v1/backtest", dependencies=[Depends(honor_no_cache)])
 
 
 def calculate_performance_metrics(equity_curve: List[float], trades: List[Dict]) -> Dict[str, float]:
@@ -103,6 +104,7 @@ def calculate_performance_metrics(equity_curve: List[float], trades: List[Dict])
 
 
 @router.post("/quick", response_model=QuickBacktestResult)
+@cached("backtest.quick", model=QuickBacktestResult, ttl=3600, tags=("scores", "prices"))
 def run_quick_backtest(
     request: BacktestRequest,
     db: Session = Depends(get_db)
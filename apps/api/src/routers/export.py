@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+from datetime import date, timedelta
+from typing import Any, Iterator, Optional
+
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
+
+from ..database import engine
+from ..columnar import DATASETS, FORMATS, arrow_schema, build_query, encode_batches, pa
+
+
+router = APIRouter(tags=["export"], prefix="/api/v1/export")
+
+# Rows per record batch / Parquet row group, fetched per server-side cursor round-trip
+BATCH_ROWS = 50_000
+
+
+def _row_batches(query, batch_rows: int = BATCH_ROWS) -> Iterator[list[Any]]:
+    # Own connection: the response body is streamed after the request scope ends
+    with engine.connect() as conn:
+        result = conn.execution_options(stream_results=True, max_row_buffer=batch_rows).execute(query)
+        for part in result.partitions(batch_rows):
+            yield part
+
+
+@router.get("/datasets")
+def list_datasets() -> dict[str, Any]:
+    return {
+        "datasets": {
+            name: [c.name for c in ds.columns()] for name, ds in DATASETS.items()
+        },
+        "formats": list(FORMATS),
+        "available": pa is not None,
+    }
+
+
+@router.get("/{dataset}.{fmt}")
+def export_dataset(
+    dataset: str,
+    fmt: str,
+    start: Optional[date] = Query(None, description="First date (inclusive); default one year before end"),
+    end: Optional[date] = Query(None, description="Last date (inclusive); default today"),
+    symbols: Optional[str] = Query(None, description="Comma-separated symbols; default all"),
+) -> StreamingResponse:
+    """Stream a fact table as Arrow IPC (`.arrow`) or Parquet (`.parquet`).
+
+    Rows come from a server-side cursor and are encoded batch by batch, so a
+    year-long panel is one download with bounded memory on the API pod.
+    """
+    ds = DATASETS.get(dataset)
+    if ds is None:
+        raise HTTPException(status_code=404, detail=f"Unknown dataset '{dataset}'")
+    if fmt not in FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unsupported format '{fmt}' (use arrow or parquet)")
+    if pa is None:
+        raise HTTPException(status_code=501, detail="Columnar export requires pyarrow on the API server")
+    end = end or date.today()
+    start = start or (end - timedelta(days=365))
+    if start > end:
+        raise HTTPException(status_code=400, detail="start is after end")
+    syms = [s.strip() for s in symbols.split(",") if s.strip()] if symbols else None
+
+    query = build_query(ds, start, end, syms)
+    filename = f"{ds.name}_{start:%Y%m%d}_{end:%Y%m%d}.{fmt}"
+    return StreamingResponse(
+        encode_batches(arrow_schema(query), _row_batches(query), fmt),
+        media_type=FORMATS[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import asyncio
 from typing import List, Optional, Dict, Any
 from datetime import date, datetime, timedelta
 from decimal import Decimal
@@ -7,11 +8,14 @@ from uuid import UUID
 
 from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func, and_, or_, desc, asc, text, case, literal_column, literal
 from pydantic import BaseModel, Field
 
-from ..database import get_db
-from ..cache import make_key, get_json, set_json, invalidate_prefix
+from ..database import get_db, get_async_db
+from ..query_batch import gather_queries
+from ..cache import invalidate_namespace
+from ..route_cache import DATA_TAGS, cached, honor_no_cache, invalidate_tags
 from apps.common.src.models import (
     DimStock, 
     FactScoreHistory,
@@ -29,7 +33,6 @@ from apps.common.src.models import (
     VwAiAnalysisFull,
     MvLatestGrades,
 )
-from ..settings import Settings
 
 
 class StockGrade(BaseModel):
@@ -62,7 +65,7 @@ class AssetDetail(BaseModel):
     ai_analysis: Optional[Dict[str, Any]] = None
 
 
-router = APIRouter(tags=["grading"], prefix="/api/v1/grading")
+router = APIRouter(tags=["grading"], prefix="/api/v1/grading", dependencies=[Depends(honor_no_cache)])
 
 
 def calculate_letter_grade(
@@ -131,24 +134,24 @@ def calculate_letter_grade(
 
 
 @router.get("/sectors", response_model=List[str])
-def list_sectors(db: Session = Depends(get_db)) -> List[str]:
+@cached("sectors", model=List[str], ttl=3600, ttl_setting="cache_ttl_sectors", tags=("scores",))
+async def list_sectors(db: AsyncSession = Depends(get_async_db)) -> List[str]:
     """Return distinct active sectors sorted alphabetically."""
     rows = (
-        db.execute(
+        await db.execute(
             select(DimStock.sector)
             .where(DimStock.is_active.is_(True), DimStock.sector.isnot(None))
             .distinct()
             .order_by(DimStock.sector.asc())
         )
-        .scalars()
-        .all()
-    )
+    ).scalars().all()
     return [s for s in rows if s]
 
 
 @router.get("/grades", response_model=GradeLeaderboard)
-def get_stock_grades(
-    db: Session = Depends(get_db),
+@cached("grades", model=GradeLeaderboard, ttl=300, ttl_setting="cache_ttl_rankings", tags=("scores",))
+async def get_stock_grades(
+    db: AsyncSession = Depends(get_async_db),
     skip: int = Query(0, ge=0),
     limit: int = Query(50, le=200),
     min_grade: Optional[str] = Query(None, regex="^[A-F]$"),
@@ -162,25 +165,6 @@ def get_stock_grades(
     Get stock grades with filtering and pagination, optimized to avoid N+1 queries.
     Computes momentum/value/sentiment in one SQL and sorts/paginates in the DB.
     """
-    # Attempt cache first
-    cache_settings = Settings()
-    cache_ttl = int(cache_settings.cache_ttl_rankings or 300)
-    cache_key = make_key(
-        "grades",
-        {
-            "skip": skip,
-            "limit": limit,
-            "min_grade": min_grade or "",
-            "max_grade": max_grade or "",
-            "sector": sector or "",
-            "sort_by": sort_by,
-            "sort_order": sort_order,
-        },
-    )
-    cached = get_json(cache_key)
-    if cached:
-        return cached
-
     # Resolve latest date + date_key once to enable partition pruning
     # Try fast path using materialized view if available
     try:
@@ -227,7 +211,7 @@ def get_stock_grades(
             .offset(skip)
             .limit(limit)
         )
-        rows = db.execute(sub).all()
+        rows = (await db.execute(sub)).all()
         total_count = int(rows[0]._total_count) if rows else 0
         stocks: list[StockGrade] = []
         for r in rows:
@@ -255,24 +239,17 @@ def get_stock_grades(
             page=skip // limit + 1,
             page_size=limit,
         )
-        payload = {
-            "stocks": [s.model_dump() for s in result.stocks],
-            "total_count": result.total_count,
-            "page": result.page,
-            "page_size": result.page_size,
-        }
-        set_json(cache_key, payload, ttl_secs=cache_ttl)
-        return payload
+        return result
     except Exception:
-        # Fall back to on-the-fly computation
-        pass
+        # Fall back to on-the-fly computation; a failed MV query aborts the transaction
+        await db.rollback()
 
-    latest = db.execute(
+    latest = (await db.execute(
         select(DimDate.date_key, DimDate.full_date)
         .join(FactScoreHistory, FactScoreHistory.date_key == DimDate.date_key)
         .order_by(DimDate.full_date.desc())
         .limit(1)
-    ).one_or_none()
+    )).one_or_none()
     if not latest:
         return GradeLeaderboard(stocks=[], total_count=0, page=1, page_size=limit)
     latest_date_key, latest_date = latest
@@ -281,9 +258,9 @@ def get_stock_grades(
         return GradeLeaderboard(stocks=[], total_count=0, page=1, page_size=limit)
 
     # Identify momentum score_type_key to hit partitioned fact table directly (faster than view)
-    linreg200 = db.execute(
+    linreg200 = (await db.execute(
         select(DimScoreType.score_type_key).where(DimScoreType.score_type_name == "linear regression 200")
-    ).scalar_one_or_none()
+    )).scalar_one_or_none()
 
     # Subquery: momentum (raw slope) at latest date from fact table (partition-pruned)
     if linreg200 is not None:
@@ -499,7 +476,7 @@ def get_stock_grades(
         func.count().over().label("_total_count"),
     ).select_from(filtered).order_by(*order_cols).offset(skip).limit(limit)
 
-    rows = db.execute(outer).all()
+    rows = (await db.execute(outer)).all()
     total_count = int(rows[0]._total_count) if rows else 0
 
     stocks: list[StockGrade] = []
@@ -530,43 +507,34 @@ def get_stock_grades(
         page=skip // limit + 1,
         page_size=limit,
     )
-    # Cache serialized payload
-    payload = {
-        "stocks": [s.model_dump() for s in result.stocks],
-        "total_count": result.total_count,
-        "page": result.page,
-        "page_size": result.page_size,
-    }
-    set_json(cache_key, payload, ttl_secs=cache_ttl)
-    return payload
+    return result
 
 
 @router.get("/grades/{symbol}", response_model=StockGrade)
-def get_stock_grade(symbol: str, db: Session = Depends(get_db)):
+@cached(
+    "grade",
+    model=StockGrade,
+    ttl=600,
+    ttl_setting="cache_ttl_stock_detail",
+    tags=("scores", "ai"),
+    normalize={"symbol": str.upper},
+)
+async def get_stock_grade(symbol: str, db: AsyncSession = Depends(get_async_db)):
     """
     Get grade for a specific stock.
     """
-    stock = db.execute(
+    stock = (await db.execute(
         select(DimStock).where(func.upper(DimStock.symbol) == symbol.upper(), DimStock.is_active.is_(True))
-    ).scalar_one_or_none()
+    )).scalar_one_or_none()
     
     if not stock:
         raise HTTPException(status_code=404, detail=f"Stock {symbol} not found")
     
-    # Cache lookup
-    cache_settings = Settings()
-    grade_ttl = int((cache_settings.cache_ttl_stock_detail or 600))
-    cache_key = make_key("grade", {"symbol": symbol.upper()})
-    cached = get_json(cache_key)
-    if cached:
-        # Return as model for reuse within API
-        return StockGrade(**cached)
-
     # Get latest date
-    latest_date_result = db.execute(
+    latest_date_result = (await db.execute(
         select(func.max(DimDate.full_date))
         .join(FactScoreHistory, FactScoreHistory.date_key == DimDate.date_key)
-    ).scalar()
+    )).scalar()
     
     if not latest_date_result:
         raise HTTPException(status_code=404, detail="No data available")
@@ -576,20 +544,22 @@ def get_stock_grade(symbol: str, db: Session = Depends(get_db)):
     value_score = None
     sentiment_score = None
     
-    # Get momentum (raw slope) and winsorize to 0–100 using today's distribution
-    momentum_result = db.execute(
-        select(VwScoreHistory.score)
-        .where(
-            and_(
-                VwScoreHistory.symbol == stock.symbol,
-                VwScoreHistory.score_type_name == "linear regression 200",
-                VwScoreHistory.as_of_date == latest_date_result,
+    # Momentum, its distribution for winsorizing and the AI view are independent: fetch at
+    # once, after handing the request session's connection back to the pool
+    momentum_result, pcts, ai_view = await gather_queries(
+        (
+            select(VwScoreHistory.score)
+            .where(
+                and_(
+                    VwScoreHistory.symbol == stock.symbol,
+                    VwScoreHistory.score_type_name == "linear regression 200",
+                    VwScoreHistory.as_of_date == latest_date_result,
+                )
             )
-        )
-        .limit(1)
-    ).scalar()
-    if momentum_result is not None:
-        pcts = db.execute(
+            .limit(1),
+            "scalar",
+        ),
+        (
             select(
                 func.percentile_cont(0.05).within_group(VwScoreHistory.score),
                 func.percentile_cont(0.95).within_group(VwScoreHistory.score),
@@ -599,24 +569,30 @@ def get_stock_grade(symbol: str, db: Session = Depends(get_db)):
                     VwScoreHistory.score_type_name == "linear regression 200",
                     VwScoreHistory.as_of_date == latest_date_result,
                 )
+            ),
+            "one_or_none",
+        ),
+        # AI analysis via consolidated view (latest for the date)
+        (
+            select(VwAiAnalysisFull)
+            .where(
+                and_(
+                    VwAiAnalysisFull.symbol == stock.symbol,
+                    VwAiAnalysisFull.as_of_date == latest_date_result,
+                )
             )
-        ).one_or_none()
+            .limit(1),
+            "scalar_one_or_none",
+        ),
+        release=db,
+    )
+
+    # Winsorize raw slope to 0–100 using today's distribution
+    if momentum_result is not None:
         if pcts and pcts[0] is not None and pcts[1] is not None and float(pcts[1]) != float(pcts[0]):
             p05, p95 = float(pcts[0]), float(pcts[1])
             momentum_score = max(0.0, min(100.0, (float(momentum_result) - p05) / (p95 - p05) * 100.0))
     
-    # Get AI analysis via consolidated view (latest for the date)
-    ai_view = db.execute(
-        select(VwAiAnalysisFull)
-        .where(
-            and_(
-                VwAiAnalysisFull.symbol == stock.symbol,
-                VwAiAnalysisFull.as_of_date == latest_date_result,
-            )
-        )
-        .limit(1)
-    ).scalar_one_or_none()
-    
     if ai_view:
         # Prefer value from AI factor scores in the view
         if ai_view.value_score is not None:
@@ -630,7 +606,7 @@ def get_stock_grade(symbol: str, db: Session = Depends(get_db)):
         # Calculate the date 30 days ago
         thirty_days_ago = latest_date_result - timedelta(days=30)
         
-        sentiment_result = db.execute(
+        sentiment_result = (await db.execute(
             select(func.avg(FactNewsSentiment.sentiment_score))
             .join(FactNewsArticles, FactNewsArticles.article_id == FactNewsSentiment.article_id)
             .join(DimDate, DimDate.date_key == FactNewsArticles.article_date)
@@ -640,7 +616,7 @@ def get_stock_grade(symbol: str, db: Session = Depends(get_db)):
                     DimDate.full_date >= thirty_days_ago
                 )
             )
-        ).scalar()
+        )).scalar()
         
         if sentiment_result:
             sentiment_score = float((sentiment_result + 1) * 50)
@@ -662,40 +638,36 @@ def get_stock_grade(symbol: str, db: Session = Depends(get_db)):
         grade_explanation=explanation,
         confidence="High" if ai_view else "Medium" if momentum_score else "Low"
     )
-    # Populate cache for future calls
-    set_json(cache_key, grade_obj.model_dump(), ttl_secs=grade_ttl)
     return grade_obj
 
 
 @router.get("/asset/{symbol}", response_model=AssetDetail)
-def get_asset_detail(
+@cached(
+    "asset",
+    model=AssetDetail,
+    ttl=600,
+    ttl_setting="cache_ttl_stock_detail",
+    tags=("scores", "ai"),
+    normalize={"symbol": str.upper},
+)
+async def get_asset_detail(
     symbol: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     days: int = Query(90, ge=1, le=365)
 ):
     """
     Get detailed information for a specific asset including history.
     """
-    stock = db.execute(
+    stock = (await db.execute(
         select(DimStock).where(func.upper(DimStock.symbol) == symbol.upper(), DimStock.is_active.is_(True))
-    ).scalar_one_or_none()
+    )).scalar_one_or_none()
     
     if not stock:
         raise HTTPException(status_code=404, detail=f"Stock {symbol} not found")
     
-    # Cache: asset detail by symbol and days
-    cache_settings = Settings()
-    asset_ttl = int((cache_settings.cache_ttl_stock_detail or 600))
-    cache_key = make_key("asset", {"symbol": symbol.upper(), "days": days})
-    cached = get_json(cache_key)
-    if cached:
-        return cached
-
-    # Get current grade (includes its own cache)
-    current_grade = get_stock_grade(symbol, db)
-    
-    # Get score history
-    score_history_result = db.execute(
+    # Current grade (includes its own cache), score history and the latest AI view are
+    # independent: run them concurrently so the page waits only for the slowest
+    history_query = (
         select(
             DimDate.full_date,
             DimScoreType.score_type_name,
@@ -710,7 +682,21 @@ def get_asset_detail(
             )
         )
         .order_by(DimDate.full_date.desc())
-    ).all()
+    )
+    # AI analysis summary via the consolidated view (latest)
+    ai_query = (
+        select(VwAiAnalysisFull)
+        .where(VwAiAnalysisFull.symbol == stock.symbol)
+        .order_by(VwAiAnalysisFull.as_of_date.desc())
+        .limit(1)
+    )
+    # Release the request session's connection before fanning out: the grade
+    # re-acquires one for its own lookups and releases it again before its fan-out
+    await db.commit()
+    current_grade, (score_history_result, ai_view) = await asyncio.gather(
+        get_stock_grade(symbol, db),
+        gather_queries((history_query, "all"), (ai_query, "scalar_one_or_none")),
+    )
     
     score_history = [
         {
@@ -721,14 +707,6 @@ def get_asset_detail(
         for date, score_type, score in score_history_result
     ]
     
-    # Get AI analysis summary via the consolidated view (latest)
-    ai_view = db.execute(
-        select(VwAiAnalysisFull)
-        .where(VwAiAnalysisFull.symbol == stock.symbol)
-        .order_by(VwAiAnalysisFull.as_of_date.desc())
-        .limit(1)
-    ).scalar_one_or_none()
-    
     recent_news = []
     if ai_view and ai_view.headline_risks:
         # Use aggregated headline_risks from the view
@@ -798,7 +776,6 @@ def get_asset_detail(
         recent_news=recent_news,
         ai_analysis=ai_analysis_data
     )
-    set_json(cache_key, asset_detail.model_dump(), ttl_secs=asset_ttl)
     return asset_detail
 
 
@@ -815,13 +792,6 @@ def refresh_grading_cache(db: Session = Depends(get_db)):
         .join(FactScoreHistory, FactScoreHistory.date_key == DimDate.date_key)
     ).scalar()
     
-    # Invalidate cached pages so the frontend picks up fresh data
-    invalidated = {
-        "grades": invalidate_prefix("grades:"),
-        "grade": invalidate_prefix("grade:"),
-        "asset": invalidate_prefix("asset:"),
-        "httpcache": invalidate_prefix("httpcache:"),
-    }
     # Attempt to refresh materialized view for latest grades (no-op if absent)
     try:
         db.execute(text("REFRESH MATERIALIZED VIEW CONCURRENTLY rankalpha.mv_latest_grades"))
@@ -835,11 +805,18 @@ def refresh_grading_cache(db: Session = Depends(get_db)):
         except Exception:
             mv_refreshed = False
 
+    # Invalidate cached pages so the frontend picks up fresh data. After the MV
+    # refresh, so requests in between cannot re-cache the old grades. One INCR
+    # per data tag (every route reading that data) and for the HTTP cache;
+    # orphaned entries expire by TTL
+    generations = invalidate_tags(*DATA_TAGS)
+    generations["httpcache"] = invalidate_namespace("httpcache")
+
     return {
         "status": "success",
         "message": "Grading cache refreshed",
         "latest_data_date": str(latest_date) if latest_date else None,
         "timestamp": datetime.utcnow().isoformat(),
-        "invalidated_keys": invalidated,
+        "cache_generations": generations,
         "mv_latest_grades_refreshed": mv_refreshed,
     }
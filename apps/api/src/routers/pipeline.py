@@ -1,14 +1,18 @@
 from __future__ import annotations
 
+import os
 from typing import List, Optional, Dict, Any
 from datetime import date, datetime, timedelta, timezone
 
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import JSONResponse
 from sqlalchemy.orm import Session
 from sqlalchemy import select, func, and_, desc
 from pydantic import BaseModel, Field
 
 from ..database import get_db
+from ..query_batch import gather_queries
+from ..route_cache import cache_stats
 from apps.common.src.models import (
     DimDate,
     FactScoreHistory,
@@ -47,16 +51,18 @@ class PipelineHealth(BaseModel):
 router = APIRouter(tags=["pipeline"], prefix="/api/v1/pipeline")
 
 
-def check_data_freshness(db: Session, table_name: str, date_column: str, fact_table: Any) -> DataFreshness:
-    """
-    Check data freshness for a specific table.
-    """
-    # Get latest date in table
-    latest_date_result = db.execute(
+def latest_date_query(fact_table: Any, date_column: str):
+    """Latest calendar date present in a fact table (via its date key)."""
+    return (
         select(func.max(DimDate.full_date))
         .join(fact_table, getattr(fact_table, date_column) == DimDate.date_key)
-    ).scalar()
-    
+    )
+
+
+def check_data_freshness(table_name: str, latest_date_result: Optional[date]) -> DataFreshness:
+    """
+    Classify data freshness for a specific table from its latest date.
+    """
     if not latest_date_result:
         return DataFreshness(
             table=table_name,
@@ -82,24 +88,55 @@ def check_data_freshness(db: Session, table_name: str, date_column: str, fact_ta
     )
 
 
+# Tables checked for freshness on the health page: (name, date column, model)
+FRESHNESS_TABLES = [
+    ("fact_score_history", "date_key", FactScoreHistory),
+    ("fact_news_articles", "article_date", FactNewsArticles),
+    ("fact_screener_rank", "date_key", FactScreenerRank),
+]
+
+
 @router.get("/health", response_model=PipelineHealth)
-def get_pipeline_health(db: Session = Depends(get_db)):
+async def get_pipeline_health():
     """
     Get overall pipeline health status and data freshness.
     """
     components = []
+    since = date.today() - timedelta(days=1)
     
-    # Check Ingestion component
-    ingestion_last_run = db.execute(
-        select(func.max(FactScoreHistory.load_ts))
-    ).scalar()
-    
-    ingestion_records = db.execute(
-        select(func.count(FactScoreHistory.fact_id))
-        .join(DimDate, DimDate.date_key == FactScoreHistory.date_key)
-        .where(DimDate.full_date >= date.today() - timedelta(days=1))
-    ).scalar()
+    # Every aggregate below is independent: run them concurrently, each on its own
+    # pooled connection, so the page waits only for the slowest one
+    (
+        ingestion_last_run,
+        ingestion_records,
+        scorer_records,
+        sentiment_last_run,
+        sentiment_records,
+        *latest_dates,
+    ) = await gather_queries(
+        (select(func.max(FactScoreHistory.load_ts)), "scalar"),
+        (
+            select(func.count(FactScoreHistory.fact_id))
+            .join(DimDate, DimDate.date_key == FactScoreHistory.date_key)
+            .where(DimDate.full_date >= since),
+            "scalar",
+        ),
+        (
+            select(func.count(func.distinct(FactScoreHistory.stock_key)))
+            .join(DimDate, DimDate.date_key == FactScoreHistory.date_key)
+            .where(DimDate.full_date >= since),
+            "scalar",
+        ),
+        (select(func.max(FactAiStockAnalysis.load_ts)), "scalar"),
+        (
+            select(func.count(FactAiStockAnalysis.analysis_id))
+            .where(FactAiStockAnalysis.news_sentiment_30d.is_not(None)),
+            "scalar",
+        ),
+        *((latest_date_query(model, column), "scalar") for _, column, model in FRESHNESS_TABLES),
+    )
     
+    # Check Ingestion component
     if ingestion_last_run:
         # Make datetime comparison timezone-aware
         now = datetime.now(timezone.utc) if ingestion_last_run.tzinfo else datetime.now()
@@ -126,16 +163,8 @@ def get_pipeline_health(db: Session = Depends(get_db)):
         message=ingestion_message
     ))
     
-    # Check Scorer component
-    scorer_last_run = db.execute(
-        select(func.max(FactScoreHistory.load_ts))
-    ).scalar()
-    
-    scorer_records = db.execute(
-        select(func.count(func.distinct(FactScoreHistory.stock_key)))
-        .join(DimDate, DimDate.date_key == FactScoreHistory.date_key)
-        .where(DimDate.full_date >= date.today() - timedelta(days=1))
-    ).scalar()
+    # Check Scorer component (same load timestamp as ingestion)
+    scorer_last_run = ingestion_last_run
     
     if scorer_last_run:
         # Make datetime comparison timezone-aware
@@ -161,15 +190,6 @@ def get_pipeline_health(db: Session = Depends(get_db)):
     ))
     
     # Check Sentiment component (AI Analysis)
-    sentiment_last_run = db.execute(
-        select(func.max(FactAiStockAnalysis.load_ts))
-    ).scalar()
-    
-    sentiment_records = db.execute(
-        select(func.count(FactAiStockAnalysis.analysis_id))
-        .where(FactAiStockAnalysis.news_sentiment_30d.is_not(None))
-    ).scalar()
-    
     if sentiment_last_run:
         # Make datetime comparison timezone-aware
         now = datetime.now(timezone.utc) if sentiment_last_run.tzinfo else datetime.now()
@@ -195,9 +215,8 @@ def get_pipeline_health(db: Session = Depends(get_db)):
     
     # Check data freshness for key tables
     freshness_checks = [
-        check_data_freshness(db, "fact_score_history", "date_key", FactScoreHistory),
-        check_data_freshness(db, "fact_news_articles", "article_date", FactNewsArticles),
-        check_data_freshness(db, "fact_screener_rank", "date_key", FactScreenerRank),
+        check_data_freshness(name, latest)
+        for (name, _, _), latest in zip(FRESHNESS_TABLES, latest_dates)
     ]
     
     # Determine overall status
@@ -323,6 +342,18 @@ def get_component_status(
         }
 
 
+@router.get("/cache-stats")
+def get_cache_stats():
+    """
+    Route cache hit/miss counters of the worker serving this request.
+    """
+    # no-store keeps the HTTP cache from freezing the counters
+    return JSONResponse(
+        {"worker_pid": os.getpid(), "routes": cache_stats()},
+        headers={"Cache-Control": "no-store"},
+    )
+
+
 @router.get("/airflow-status")
 def get_airflow_status():
     """
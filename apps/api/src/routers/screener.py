@@ -4,11 +4,12 @@ from typing import List, Optional
 from datetime import date
 
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, desc, and_
 from pydantic import BaseModel
 
-from ..database import get_db
+from ..database import get_async_db
+from ..route_cache import cached, honor_no_cache
 from apps.common.src.models import VLatestScreenerConsensus, DimStock
 
 
@@ -37,12 +38,20 @@ class ScreenerConsensusList(BaseModel):
     page_size: int
 
 
-router = APIRouter(tags=["screener"], prefix="/api/v1/screener")
+router = APIRouter(tags=["screener"], prefix="/api/v1/screener", dependencies=[Depends(honor_no_cache)])
 
 
 @router.get("/consensus", response_model=ScreenerConsensusList)
-def list_screener_consensus(
-    db: Session = Depends(get_db),
+@cached(
+    "screener.consensus",
+    model=ScreenerConsensusList,
+    ttl=300,
+    ttl_setting="cache_ttl_rankings",
+    tags=("screener",),
+    normalize={"symbol": str.upper},
+)
+async def list_screener_consensus(
+    db: AsyncSession = Depends(get_async_db),
     symbol: Optional[str] = Query(None, description="Filter by symbol (exact)"),
     appearances_min: int = Query(0, ge=0),
     styles_min: int = Query(0, ge=0),
@@ -63,7 +72,7 @@ def list_screener_consensus(
     q = q.order_by(desc(VLatestScreenerConsensus.consensus_score))
 
     # Note: simple total_count; if large, consider COUNT(*) subquery
-    total_count = db.execute(q).scalars().all()
+    total_count = (await db.execute(q)).scalars().all()
     rows = total_count[skip : skip + limit]
     items = [
         ScreenerConsensusItem(
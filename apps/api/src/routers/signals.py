@@ -5,11 +5,12 @@ from datetime import date, datetime, timedelta
 from decimal import Decimal
 
 from fastapi import APIRouter, Depends, HTTPException, Query, status
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func, and_, or_, desc, asc
 from pydantic import BaseModel, Field
 
-from ..database import get_db
+from ..database import get_async_db
+from ..route_cache import cached, honor_no_cache
 from apps.common.src.models import (
     DimStock, 
     FactScoreHistory,
@@ -48,12 +49,19 @@ class SignalComparison(BaseModel):
     recommendation: str
 
 
-router = APIRouter(tags=["signals"], prefix="/api/v1/signals")
+router = APIRouter(tags=["signals"], prefix="/api/v1/signals", dependencies=[Depends(honor_no_cache)])
 
 
 @router.get("/leaderboard", response_model=SignalsLeaderboard)
-def get_signals_leaderboard(
-    db: Session = Depends(get_db),
+@cached(
+    "signals.leaderboard",
+    model=SignalsLeaderboard,
+    ttl=300,
+    ttl_setting="cache_ttl_rankings",
+    tags=("scores", "screener"),
+)
+async def get_signals_leaderboard(
+    db: AsyncSession = Depends(get_async_db),
     signal_type: str = Query("LINREG_200", description="Type of signal/score"),
     skip: int = Query(0, ge=0),
     limit: int = Query(50, le=500),
@@ -73,10 +81,10 @@ def get_signals_leaderboard(
             raise HTTPException(status_code=400, detail="Invalid date format. Use YYYY-MM-DD")
     else:
         # Get latest date
-        latest_date_result = db.execute(
+        latest_date_result = (await db.execute(
             select(func.max(DimDate.full_date))
             .join(FactScoreHistory, FactScoreHistory.date_key == DimDate.date_key)
-        ).scalar()
+        )).scalar()
         
         if not latest_date_result:
             raise HTTPException(status_code=404, detail="No data available")
@@ -84,15 +92,15 @@ def get_signals_leaderboard(
         target_date = latest_date_result
     
     # Get score type
-    score_type = db.execute(
+    score_type = (await db.execute(
         select(DimScoreType).where(DimScoreType.score_type_name == signal_type)
-    ).scalar_one_or_none()
+    )).scalar_one_or_none()
     
     if not score_type:
         # Get available score types
-        available_types = db.execute(
+        available_types = (await db.execute(
             select(DimScoreType.score_type_name).distinct()
-        ).scalars().all()
+        )).scalars().all()
         
         raise HTTPException(
             status_code=404, 
@@ -131,16 +139,16 @@ def get_signals_leaderboard(
     
     # Get total count before pagination
     count_query = select(func.count()).select_from(query.subquery())
-    total_count = db.execute(count_query).scalar()
+    total_count = (await db.execute(count_query)).scalar()
     
     # Apply sorting and pagination
     query = query.order_by(desc(FactScoreHistory.score))
     query = query.offset(skip).limit(limit)
     
-    results = db.execute(query).all()
+    results = (await db.execute(query)).all()
     
     # Calculate ranks and percentiles
-    all_scores = db.execute(
+    all_scores = (await db.execute(
         select(FactScoreHistory.score)
         .join(DimDate, DimDate.date_key == FactScoreHistory.date_key)
         .where(
@@ -150,7 +158,7 @@ def get_signals_leaderboard(
             )
         )
         .order_by(desc(FactScoreHistory.score))
-    ).scalars().all()
+    )).scalars().all()
     
     signals = []
     for i, (symbol, company_name, sector_name, score, date_val) in enumerate(results):
@@ -182,8 +190,15 @@ def get_signals_leaderboard(
 
 
 @router.get("/compare", response_model=List[SignalComparison])
-def compare_signals(
-    db: Session = Depends(get_db),
+@cached(
+    "signals.compare",
+    model=List[SignalComparison],
+    ttl=300,
+    ttl_setting="cache_ttl_rankings",
+    tags=("scores", "screener"),
+)
+async def compare_signals(
+    db: AsyncSession = Depends(get_async_db),
     symbols: str = Query(..., description="Comma-separated list of symbols"),
     signal_types: Optional[str] = Query(None, description="Comma-separated signal types")
 ):
@@ -199,10 +214,10 @@ def compare_signals(
         signal_type_list = ["LINREG_200", "LINREG_90", "LINREG_50", "LINREG_30", "SMA_200"]
     
     # Get latest date
-    latest_date_result = db.execute(
+    latest_date_result = (await db.execute(
         select(func.max(DimDate.full_date))
         .join(FactScoreHistory, FactScoreHistory.date_key == DimDate.date_key)
-    ).scalar()
+    )).scalar()
     
     if not latest_date_result:
         raise HTTPException(status_code=404, detail="No data available")
@@ -210,9 +225,9 @@ def compare_signals(
     comparisons = []
     
     for symbol in symbol_list:
-        stock = db.execute(
+        stock = (await db.execute(
             select(DimStock).where(func.upper(DimStock.symbol) == symbol)
-        ).scalar_one_or_none()
+        )).scalar_one_or_none()
         
         if not stock:
             continue
@@ -220,14 +235,14 @@ def compare_signals(
         signals_dict = {}
         
         for signal_type in signal_type_list:
-            score_type = db.execute(
+            score_type = (await db.execute(
                 select(DimScoreType).where(DimScoreType.score_type_name == signal_type)
-            ).scalar_one_or_none()
+            )).scalar_one_or_none()
             
             if not score_type:
                 continue
             
-            score_result = db.execute(
+            score_result = (await db.execute(
                 select(FactScoreHistory.score)
                 .join(DimDate, DimDate.date_key == FactScoreHistory.date_key)
                 .where(
@@ -237,7 +252,7 @@ def compare_signals(
                         DimDate.full_date == latest_date_result
                     )
                 )
-            ).scalar()
+            )).scalar()
             
             if score_result:
                 signals_dict[signal_type] = float(score_result)
@@ -268,31 +283,32 @@ def compare_signals(
 
 
 @router.get("/historical/{symbol}")
-def get_signal_history(
+@cached("signals.historical", ttl=600, ttl_setting="cache_ttl_stock_detail", tags=("scores",))
+async def get_signal_history(
     symbol: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     signal_type: str = Query("LINREG_200"),
     days: int = Query(90, ge=1, le=365)
 ):
     """
     Get historical signal data for a specific stock.
     """
-    stock = db.execute(
+    stock = (await db.execute(
         select(DimStock).where(func.upper(DimStock.symbol) == symbol.upper(), DimStock.is_active.is_(True))
-    ).scalar_one_or_none()
+    )).scalar_one_or_none()
     
     if not stock:
         raise HTTPException(status_code=404, detail=f"Stock {symbol} not found")
     
-    score_type = db.execute(
+    score_type = (await db.execute(
         select(DimScoreType).where(DimScoreType.score_type_name == signal_type)
-    ).scalar_one_or_none()
+    )).scalar_one_or_none()
     
     if not score_type:
         raise HTTPException(status_code=404, detail=f"Signal type {signal_type} not found")
     
     # Get historical data
-    history = db.execute(
+    history = (await db.execute(
         select(
             DimDate.full_date,
             FactScoreHistory.score
@@ -306,7 +322,7 @@ def get_signal_history(
             )
         )
         .order_by(DimDate.full_date)
-    ).all()
+    )).all()
     
     return {
         "symbol": symbol,
@@ -319,8 +335,9 @@ def get_signal_history(
 
 
 @router.get("/universe")
-def get_signal_universe(
-    db: Session = Depends(get_db),
+@cached("signals.universe", ttl=300, ttl_setting="cache_ttl_rankings", tags=("scores", "screener"))
+async def get_signal_universe(
+    db: AsyncSession = Depends(get_async_db),
     date_str: Optional[str] = None
 ):
     """
@@ -333,10 +350,10 @@ def get_signal_universe(
             raise HTTPException(status_code=400, detail="Invalid date format. Use YYYY-MM-DD")
     else:
         # Get latest date
-        latest_date_result = db.execute(
+        latest_date_result = (await db.execute(
             select(func.max(DimDate.full_date))
             .join(FactScoreHistory, FactScoreHistory.date_key == DimDate.date_key)
-        ).scalar()
+        )).scalar()
         
         if not latest_date_result:
             raise HTTPException(status_code=404, detail="No data available")
@@ -344,7 +361,7 @@ def get_signal_universe(
         target_date = latest_date_result
     
     # Get unique stocks with scores on target date
-    stocks_with_scores = db.execute(
+    stocks_with_scores = (await db.execute(
         select(
             DimStock.symbol,
             DimStock.company_name,
@@ -356,10 +373,10 @@ def get_signal_universe(
         .where(and_(DimDate.full_date == target_date, DimStock.is_active.is_(True)))
         .group_by(DimStock.symbol, DimStock.company_name, DimStock.sector)
         .order_by(DimStock.symbol)
-    ).all()
+    )).all()
     
     # Get sector breakdown
-    sector_breakdown = db.execute(
+    sector_breakdown = (await db.execute(
         select(
             DimStock.sector,
             func.count(func.distinct(DimStock.stock_key)).label('count')
@@ -368,7 +385,7 @@ def get_signal_universe(
         .join(DimDate, DimDate.date_key == FactScoreHistory.date_key)
         .where(and_(DimDate.full_date == target_date, DimStock.is_active.is_(True)))
         .group_by(DimStock.sector)
-    ).all()
+    )).all()
     
     return {
         "as_of_date": str(target_date),
@@ -4,10 +4,11 @@ from typing import List, Optional, Dict, Any
 from datetime import date, timedelta, datetime
 
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, and_, desc
 
-from ..database import get_db
+from ..database import get_async_db
+from ..route_cache import cached, honor_no_cache
 from apps.common.src.models import (
     FactTechnicalIndicator,
     VwLatestTechnicals,
@@ -16,27 +17,41 @@ from apps.common.src.models import (
 )
 
 
-router = APIRouter(tags=["technicals"], prefix="/api/v1/technicals")
+router = APIRouter(tags=["technicals"], prefix="/api/v1/technicals", dependencies=[Depends(honor_no_cache)])
 
 
 @router.get("/latest")
-def latest_snapshot(symbol: str, db: Session = Depends(get_db)) -> Dict[str, Any]:
-    row = db.execute(
+@cached(
+    "technicals.latest",
+    ttl=600,
+    ttl_setting="cache_ttl_stock_detail",
+    tags=("prices",),
+    normalize={"symbol": str.upper},
+)
+async def latest_snapshot(symbol: str, db: AsyncSession = Depends(get_async_db)) -> Dict[str, Any]:
+    row = (await db.execute(
         select(VwLatestTechnicals)
         .join(DimStock, DimStock.symbol == VwLatestTechnicals.symbol)
         .where(VwLatestTechnicals.symbol == symbol.upper(), DimStock.is_active.is_(True))
-    ).scalar_one_or_none()
+    )).scalar_one_or_none()
     if not row:
         raise HTTPException(status_code=404, detail="No latest technicals found for symbol")
     return _snap_to_dict(row)
 
 
 @router.get("/series")
-def series(
+@cached(
+    "technicals.series",
+    ttl=600,
+    ttl_setting="cache_ttl_stock_detail",
+    tags=("prices",),
+    normalize={"symbol": str.upper},
+)
+async def series(
     symbol: str,
     indicators: Optional[str] = Query(None, description="Comma-separated indicator codes (e.g., SMA20,RSI14)"),
     days: int = Query(120, ge=1, le=2000),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ) -> Dict[str, Any]:
     codes: Optional[List[str]] = None
     if indicators:
@@ -45,7 +60,7 @@ def series(
     # Resolve date range using DimDate
     cutoff = date.today() - timedelta(days=days)
     # Find stock_key
-    stock = db.execute(select(DimStock).where(DimStock.symbol == symbol.upper(), DimStock.is_active.is_(True))).scalar_one_or_none()
+    stock = (await db.execute(select(DimStock).where(DimStock.symbol == symbol.upper(), DimStock.is_active.is_(True)))).scalar_one_or_none()
     if not stock:
         raise HTTPException(status_code=404, detail="Symbol not found")
 
@@ -58,7 +73,7 @@ def series(
     if codes:
         q = q.where(FactTechnicalIndicator.indicator_code.in_(codes))
     q = q.order_by(DimDate.full_date.asc())
-    rows = db.execute(q).all()
+    rows = (await db.execute(q)).all()
 
     out: Dict[str, List[Dict[str, Any]]] = {}
     for fti, full_date in rows:
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 from decimal import Decimal
+from functools import lru_cache
 from uuid import UUID
 from datetime import date, datetime
 from typing import Any, Dict, Mapping, Tuple, Type, Union, Callable, cast
@@ -34,6 +35,7 @@ def _python_type(sqlalchemy_column) -> Any:
 #       • FooIn   – for POST/PUT (no PK, all optional)
 #       • FooOut  – for GET      (all DB columns, read‑only)
 # -----------------------------------------------------------------------------
+@lru_cache(maxsize=None)
 def make_pydantic_pair(sa_cls: DeclarativeMeta) -> Tuple[Type[BaseModel], Type[BaseModel]]:
     name_base = sa_cls.__name__
     # cast to Table so Pylance knows what .columns is
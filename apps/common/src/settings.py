@@ -54,11 +54,44 @@ class Settings(BaseSettings):
     # Sentiment tool behavior
     sentiment_fetch_max_length: Optional[int] = None
     sentiment_tool_cache: bool = True
-    sentiment_tool_cache_ttl_seconds: Optional[int] = None
+    sentiment_tool_cache_ttl_seconds: Optional[int] = None  # default TTL (24h)
+    sentiment_tool_cache_search_ttl_seconds: Optional[int] = None  # search/news/quotes (1h)
+    sentiment_tool_cache_filing_ttl_seconds: Optional[int] = None  # EDGAR filings and PDFs (30d)
+    sentiment_tool_cache_memory_mb: Optional[int] = None  # in-process LRU budget (64MB)
+    sentiment_tool_cache_disk_mb: Optional[int] = None  # SQLite tier budget (1GB)
+    sentiment_tool_cache_path: Optional[str] = None  # default DATA_DIR/cache/tool_cache.sqlite
+    # Function calls within one model turn run concurrently, capped per MCP server
+    sentiment_tool_concurrency_per_server: Optional[int] = None  # default 4
+    sentiment_tool_call_timeout_seconds: Optional[int] = None  # per call; default 120
+    # Token budgets that cap each model step (tool outputs are BM25-compacted to fit)
+    sentiment_context_compaction: bool = True
+    sentiment_context_turn_token_budget: Optional[int] = None  # all tool outputs in one turn; default 12000
+    sentiment_context_message_token_budget: Optional[int] = None  # one prompt; default 32000
+    # Record/replay of OpenAI + MCP traffic (record | replay); trace defaults to DATA_DIR/traces
+    sentiment_trace_mode: Optional[str] = None
+    sentiment_trace_file: Optional[str] = None
+    sentiment_replay_latency_ms: Optional[int] = None  # fixed delay per replayed call
+    sentiment_replay_latency_scale: Optional[float] = None  # multiplier on recorded latency
+    # Per-analysis telemetry -> fact_ai_analysis_telemetry + JSONL (default DATA_DIR/telemetry/analysis_telemetry.jsonl)
+    sentiment_telemetry: bool = True
+    sentiment_telemetry_file: Optional[str] = None
+    # Stream Responses API output: dispatch tool calls as their arguments complete
+    sentiment_openai_stream: bool = False
+    # Reject report_writer file writes whose JSON would not parse/insert
+    sentiment_validate_report_writes: bool = True
+    # Incremental re-analysis from the previous run's research snapshot
+    sentiment_research_reuse: bool = True
+    sentiment_research_snapshot_dir: Optional[str] = None
+    sentiment_research_snapshot_max_age_days: int = 30
     # Planner/orchestrator tuning
     sentiment_orchestrator_timeout_seconds: Optional[int] = None
     # PDF extraction size cap for EDGAR/generic fetches (characters)
     sentiment_pdf_extract_max_chars: Optional[int] = None
+    # PDF -> markdown conversion runs in a process pool off the event loop
+    sentiment_pdf_workers: Optional[int] = None  # default 2
+    sentiment_pdf_timeout_seconds: Optional[int] = None  # per document; default 90
+    sentiment_pdf_max_pages: Optional[int] = None  # unset = no page cap (char budget still applies)
+    sentiment_pdf_prioritize_sections: bool = True  # MD&A, risk factors, financials first
 
     # Redis cache configuration (for sentiment tool cache)
     redis_url: Optional[str] = None
@@ -67,8 +100,31 @@ class Settings(BaseSettings):
     redis_db: Optional[int] = None
     redis_password: Optional[str] = None
 
+    # Build generic CRUD routers on first use instead of at API import
+    api_lazy_crud_routers: bool = True
+    # API DB pools, per worker; applies to both the psycopg2 and asyncpg engines
+    api_db_pool_size: Optional[int] = None  # default 10
+    api_db_max_overflow: Optional[int] = None  # default 20
+    api_db_pool_recycle_seconds: Optional[int] = None  # default 1800
+    api_db_pool_timeout_seconds: Optional[int] = None  # wait for a free connection; default 30
+    api_db_statement_cache_size: Optional[int] = None  # asyncpg prepared statements; 0 behind pgbouncer; default 100
+
     # API HTTP cache toggle
     http_cache_enabled: bool = True
+    # Coalesce concurrent misses per key (in-process futures + short Redis fill lock)
+    http_cache_single_flight: bool = True
+    http_cache_lock_ttl_ms: Optional[int] = None  # lock expiry if the filling pod dies; default 15000
+    http_cache_lock_wait_ms: Optional[int] = None  # other pods poll this long before computing; default 10000
+    # Stale-while-revalidate window per path prefix, merged over http_cache.DEFAULT_STALE_SECONDS
+    http_cache_stale_seconds: Optional[dict[str, int]] = None
+    # Stored bodies are compressed once and served as-is to clients accepting the encoding
+    http_cache_compression: Optional[str] = None  # gzip | br (needs brotli) | none; default gzip
+    http_cache_compress_min_bytes: Optional[int] = None  # smaller bodies stay uncompressed; default 1024
+    # In-process L1 tier in front of Redis (apps/api/src/cache.py), cleared via Redis pub/sub
+    api_l1_cache_mb: Optional[int] = None  # per worker; 0 disables; default 32
+    api_l1_cache_ttl_seconds: Optional[int] = None  # upper bound on an L1 entry's life; default 30
+    # Per-route TTL overrides for route_cache.cached, by route name (e.g. {"signals.leaderboard": 600})
+    api_route_cache_ttl_seconds: Optional[dict[str, int]] = None
 
     # API cache TTLs (seconds)
     cache_ttl_default: Optional[int] = None
@@ -93,6 +149,19 @@ class Settings(BaseSettings):
     # Skip re-analysis if there is a recent analysis within N days (default 1 = same-day only)
     sentiment_skip_if_within_days: int = 1
 
+    # Sentiment analysis scheduler
+    sentiment_analysis_concurrency: int = 1  # analyses in flight at once
+    sentiment_analysis_timeout_seconds: Optional[int] = None  # per analysis; default orchestrator timeout + 120s
+    sentiment_batch_deadline_seconds: Optional[int] = None  # cancel outstanding work after this long
+    # Per-provider budgets shared by all concurrent analyses (unset = unlimited)
+    sentiment_openai_rpm: Optional[int] = None
+    sentiment_openai_tpm: Optional[int] = None
+    # Shared DB pool for the sentiment service (max defaults to concurrency + 2)
+    sentiment_db_pool_min: int = 1
+    sentiment_db_pool_max: Optional[int] = None
+    # Seconds after which a claimed schedule entry is considered abandoned
+    sentiment_schedule_claim_ttl_seconds: Optional[int] = None
+
     model_config = SettingsConfigDict(
         env_file=[ENV_DIR / "api.env", ENV_DIR / "ingestion.env", ENV_DIR / "sentiment.env"],
         case_sensitive=False,
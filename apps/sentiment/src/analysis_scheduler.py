@@ -0,0 +1,181 @@
+"""Bounded-concurrency scheduler for sentiment analyses.
+
+Each analysis is I/O-bound on the LLM and MCP tools, so running several at once
+covers far more symbols per day than awaiting them one by one. The scheduler:
+
+- orders work with a priority queue (never-analyzed first, then nearest
+  catalyst, then highest consensus score),
+- caps in-flight analyses with an asyncio semaphore,
+- enforces a per-job timeout and an optional overall deadline, cancelling
+  outstanding work cleanly when either expires.
+
+Provider request/token budgets are enforced inside the LLM wrapper via
+`llm.rate_limit`, so they apply across all concurrent analyses.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import itertools
+import time
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from typing import Any, Awaitable, Callable, Optional
+
+from apps.common.src.logging import get_logger
+
+# Priority tiers: lower runs first
+TIER_INITIAL = 0  # stock has never been analyzed
+TIER_SCHEDULED = 1  # catalyst-driven schedule entry due today
+TIER_CONSENSUS = 2  # consensus screener batch
+
+
+@dataclass
+class AnalysisJob:
+    """A single symbol waiting to be analyzed."""
+
+    symbol: str
+    company_name: str
+    stock_key: Optional[int] = None
+    consensus_score: Optional[float] = None
+    catalyst_date: Optional[date] = None
+    tier: int = TIER_SCHEDULED
+    reason: str = ""
+    extra: dict[str, Any] = field(default_factory=dict)
+
+    def priority(self, today: Optional[date] = None) -> tuple:
+        """Sort key: tier, then catalyst proximity, then consensus score (desc)."""
+        today = today or datetime.now().date()
+        if self.catalyst_date is not None:
+            proximity = abs((self.catalyst_date - today).days)
+        else:
+            proximity = 10**6
+        score = float(self.consensus_score) if self.consensus_score is not None else float("-inf")
+        return (int(self.tier), proximity, -score)
+
+
+@dataclass
+class JobResult:
+    job: AnalysisJob
+    success: bool
+    timed_out: bool = False
+    cancelled: bool = False
+    error: Optional[str] = None
+    seconds: float = 0.0
+
+
+JobHandler = Callable[[AnalysisJob], Awaitable[bool]]
+
+
+class AnalysisScheduler:
+    """Run `AnalysisJob`s through `handler` with bounded concurrency.
+
+    `handler` returns True on success. Timeouts and exceptions are recorded in
+    the returned `JobResult`s rather than propagated, so one bad symbol never
+    stops the batch.
+    """
+
+    def __init__(
+        self,
+        concurrency: int = 1,
+        job_timeout_seconds: Optional[float] = None,
+        deadline_seconds: Optional[float] = None,
+        logger=None,
+    ) -> None:
+        self.concurrency = max(1, int(concurrency or 1))
+        self.job_timeout = float(job_timeout_seconds) if job_timeout_seconds else None
+        self.deadline = float(deadline_seconds) if deadline_seconds else None
+        self.logger = logger or get_logger(__name__)
+        self._seq = itertools.count()
+
+    async def run(self, jobs: list[AnalysisJob], handler: JobHandler) -> list[JobResult]:
+        if not jobs:
+            return []
+        today = datetime.now().date()
+        queue: asyncio.PriorityQueue = asyncio.PriorityQueue()
+        for job in jobs:
+            queue.put_nowait((job.priority(today), next(self._seq), job))
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+        results: list[JobResult] = []
+
+        async def _run_one(job: AnalysisJob) -> None:
+            start = time.monotonic()
+            try:
+                if self.job_timeout:
+                    ok = await asyncio.wait_for(handler(job), timeout=self.job_timeout)
+                else:
+                    ok = await handler(job)
+                results.append(JobResult(job, bool(ok), seconds=time.monotonic() - start))
+            except asyncio.TimeoutError:
+                self.logger.warning(f"Analysis timed out for {job.symbol}; not retrying")
+                results.append(JobResult(job, False, timed_out=True, seconds=time.monotonic() - start))
+            except asyncio.CancelledError:
+                results.append(JobResult(job, False, cancelled=True, seconds=time.monotonic() - start))
+                raise
+            except Exception as e:
+                self.logger.error(f"Analysis failed for {job.symbol}: {e}")
+                results.append(JobResult(job, False, error=str(e), seconds=time.monotonic() - start))
+
+        async def _worker() -> None:
+            while True:
+                try:
+                    _prio, _n, job = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                async with semaphore:
+                    try:
+                        await _run_one(job)
+                    finally:
+                        queue.task_done()
+
+        workers = [asyncio.create_task(_worker()) for _ in range(min(self.concurrency, len(jobs)))]
+        self.logger.info(
+            f"Scheduler: {len(jobs)} jobs, concurrency={self.concurrency}, "
+            f"job_timeout={self.job_timeout or 'none'}, deadline={self.deadline or 'none'}"
+        )
+        try:
+            if self.deadline:
+                done, pending = await asyncio.wait(workers, timeout=self.deadline)
+                if pending:
+                    self.logger.warning(
+                        f"Scheduler deadline of {self.deadline:.0f}s reached; cancelling "
+                        f"{len(pending)} workers and {queue.qsize()} queued jobs"
+                    )
+            else:
+                await asyncio.gather(*workers, return_exceptions=True)
+        finally:
+            for w in workers:
+                if not w.done():
+                    w.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+            # Anything still queued never started
+            while not queue.empty():
+                _prio, _n, job = queue.get_nowait()
+                results.append(JobResult(job, False, cancelled=True))
+
+        ok = sum(1 for r in results if r.success)
+        timed_out = sum(1 for r in results if r.timed_out)
+        cancelled = sum(1 for r in results if r.cancelled)
+        self.logger.info(
+            f"Scheduler done: succeeded={ok}, failed={len(results) - ok - timed_out - cancelled}, "
+            f"timed_out={timed_out}, cancelled={cancelled}"
+        )
+        return results
+
+
+def scheduler_from_settings(settings, logger=None) -> AnalysisScheduler:
+    """Build a scheduler from centralized Settings."""
+    concurrency = int(getattr(settings, "sentiment_analysis_concurrency", 1) or 1)
+    job_timeout = getattr(settings, "sentiment_analysis_timeout_seconds", None)
+    if not job_timeout:
+        # Leave headroom past the orchestrator timeout for report parsing and DB insert
+        orchestrator_timeout = int(getattr(settings, "sentiment_orchestrator_timeout_seconds", None) or 600)
+        job_timeout = orchestrator_timeout + 120
+    deadline = getattr(settings, "sentiment_batch_deadline_seconds", None)
+    return AnalysisScheduler(
+        concurrency=concurrency,
+        job_timeout_seconds=job_timeout,
+        deadline_seconds=deadline,
+        logger=logger,
+    )
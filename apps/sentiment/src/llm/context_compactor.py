@@ -0,0 +1,215 @@
+from __future__ import annotations
+
+import hashlib
+import math
+import re
+from collections import Counter
+from typing import Any, Optional
+
+from .rate_limit import estimate_tokens
+
+_WORD = re.compile(r"[a-z0-9][a-z0-9.%$-]*")
+_STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in is it its of on or that the this to was were will with".split()
+)
+_GAP = "\n\n[…]\n\n"
+# Reserved for the marker line prepended to compacted text
+_HEADER_TOKENS = 32
+
+
+def tokenize(text: str) -> list[str]:
+    return [w for w in _WORD.findall((text or "").lower()) if w not in _STOPWORDS]
+
+
+def _norm_hash(text: str) -> str:
+    return hashlib.sha1(" ".join(text.split()).lower().encode("utf-8")).hexdigest()
+
+
+class BM25:
+    """Okapi BM25 over a fixed set of chunks (no embeddings, no external deps)."""
+
+    def __init__(self, docs: list[list[str]], k1: float = 1.5, b: float = 0.75) -> None:
+        self.k1, self.b = k1, b
+        self.tfs = [Counter(d) for d in docs]
+        self.lens = [len(d) for d in docs]
+        self.avgdl = (sum(self.lens) / len(docs)) if docs else 0.0
+        df: Counter = Counter()
+        for tf in self.tfs:
+            df.update(tf.keys())
+        n = len(docs)
+        self.idf = {t: math.log(1 + (n - f + 0.5) / (f + 0.5)) for t, f in df.items()}
+
+    def scores(self, query_terms: list[str]) -> list[float]:
+        terms = set(query_terms)
+        out: list[float] = []
+        for tf, dl in zip(self.tfs, self.lens):
+            norm = self.k1 * (1 - self.b + self.b * dl / self.avgdl) if self.avgdl else self.k1
+            s = 0.0
+            for t in terms:
+                f = tf.get(t)
+                if f:
+                    s += self.idf[t] * f * (self.k1 + 1) / (f + norm)
+            out.append(s)
+        return out
+
+
+def split_chunks(text: str, target_chars: int = 1500) -> list[str]:
+    """Split on paragraphs, then lines, packing pieces into chunks of ~target_chars."""
+    pieces: list[str] = []
+    for para in re.split(r"\n\s*\n", text or ""):
+        if not para.strip():
+            continue
+        if len(para) <= target_chars:
+            pieces.append(para)
+            continue
+        for line in para.splitlines():
+            while len(line) > target_chars:
+                pieces.append(line[:target_chars])
+                line = line[target_chars:]
+            if line.strip():
+                pieces.append(line)
+    chunks: list[str] = []
+    buf = ""
+    for p in pieces:
+        if buf and len(buf) + len(p) + 2 > target_chars:
+            chunks.append(buf)
+            buf = ""
+        buf = f"{buf}\n\n{p}" if buf else p
+    if buf:
+        chunks.append(buf)
+    return chunks
+
+
+def select_chunks(
+    text: str, query: str, budget_tokens: int, skip_hashes: Optional[set[str]] = None
+) -> tuple[str, int, int]:
+    """Extractive compaction: the lead chunk plus the best BM25 matches that fit.
+
+    Chunks whose hash is in `skip_hashes` (already sent in full) are dropped.
+    Kept chunks stay in document order. Returns (text, kept, total chunks).
+    """
+    chunks = split_chunks(text)
+    if skip_hashes:
+        chunks = [c for c in chunks if _norm_hash(c) not in skip_hashes] or chunks[:1]
+    if not chunks:
+        return "", 0, 0
+    scores = BM25([tokenize(c) for c in chunks]).scores(tokenize(query))
+    # The lead chunk usually carries the title/summary, so it goes first
+    order = [0] + sorted(range(1, len(chunks)), key=lambda i: (-scores[i], i))
+    keep: list[int] = []
+    used = 0
+    for i in order:
+        cost = estimate_tokens(chunks[i])
+        if used + cost > budget_tokens:
+            continue
+        keep.append(i)
+        used += cost
+    if not keep:
+        # Even the lead chunk is over budget; cut it to size
+        return chunks[0][: max(0, budget_tokens) * 4], 1, len(chunks)
+    keep.sort()
+    parts: list[str] = []
+    prev = -1
+    for i in keep:
+        if parts and i != prev + 1:
+            parts.append(_GAP)
+        elif parts:
+            parts.append("\n\n")
+        parts.append(chunks[i])
+        prev = i
+    if keep[-1] != len(chunks) - 1:
+        parts.append(_GAP)
+    return "".join(parts), len(keep), len(chunks)
+
+
+def fair_shares(sizes: list[int], budget: int) -> list[int]:
+    """Split `budget` across outputs: small ones keep everything, large ones share the rest."""
+    shares = [0] * len(sizes)
+    remaining = max(0, int(budget))
+    order = sorted(range(len(sizes)), key=lambda i: sizes[i])
+    for n_left, i in zip(range(len(order), 0, -1), order):
+        give = min(sizes[i], remaining // n_left)
+        shares[i] = give
+        remaining -= give
+    return shares
+
+
+class ContextCompactor:
+    """Keeps what one conversation sends back to the model under a token budget.
+
+    - identical tool outputs are sent once; repeats become a short reference
+    - each turn's tool outputs share `turn_token_budget`; outputs over their share
+      are reduced to their most relevant chunks (BM25 against the task and the
+      call's arguments), skipping passages the model has already seen
+    - `compact_message` caps a single prompt, keeping its head (the task) intact
+    """
+
+    def __init__(self, query: str = "", turn_token_budget: int = 12000, message_token_budget: int = 32000) -> None:
+        self.query = query or ""
+        self.turn_token_budget = int(turn_token_budget)
+        self.message_token_budget = int(message_token_budget)
+        self._docs: dict[str, str] = {}
+        self._chunks: set[str] = set()
+        self.stats = {"outputs": 0, "deduplicated": 0, "compacted": 0, "tokens_in": 0, "tokens_out": 0}
+
+    def _remember(self, text: str) -> None:
+        for c in split_chunks(text):
+            self._chunks.add(_norm_hash(c))
+
+    def compact_turn(self, calls: list[tuple[str, str, Any]], payloads: list[dict[str, Any]]) -> list[dict[str, Any]]:
+        """Return payloads for one turn's function_call_outputs, within the turn budget."""
+        results = list(payloads)
+        sizes: list[int] = []
+        for i, ((call_id, name, _args), p) in enumerate(zip(calls, payloads)):
+            text = p.get("text") if isinstance(p, dict) else None
+            if not isinstance(text, str) or p.get("isError") or not text.strip():
+                sizes.append(0)
+                continue
+            self.stats["outputs"] += 1
+            self.stats["tokens_in"] += estimate_tokens(text)
+            h = _norm_hash(text)
+            if h in self._docs:
+                results[i] = {**p, "text": f"[Same content as the earlier {self._docs[h]} output; omitted]", "deduplicated": True}
+                self.stats["deduplicated"] += 1
+                sizes.append(0)
+                continue
+            self._docs[h] = f"{name} ({call_id})"
+            sizes.append(estimate_tokens(text))
+
+        shares = fair_shares(sizes, self.turn_token_budget)
+        for i, ((_call_id, _name, args), size) in enumerate(zip(calls, sizes)):
+            if not size:
+                continue
+            text = results[i]["text"]
+            if size > shares[i]:
+                arg_terms = " ".join(str(v) for v in (args or {}).values()) if isinstance(args, dict) else ""
+                picked, kept, total = select_chunks(
+                    text, f"{self.query} {arg_terms}", max(0, shares[i] - _HEADER_TOKENS), self._chunks
+                )
+                header = f"[Compacted: kept {kept} of {total} sections most relevant to the task (~{estimate_tokens(picked)} of {size} tokens)]\n\n"
+                results[i] = {**results[i], "text": header + picked, "compacted": True}
+                self.stats["compacted"] += 1
+            self._remember(results[i]["text"])
+            self.stats["tokens_out"] += estimate_tokens(results[i]["text"])
+        return results
+
+    def compact_message(self, text: str, head_chars: int = 4000) -> str:
+        """Cap one prompt at `message_token_budget`; the head is kept verbatim."""
+        if estimate_tokens(text) <= self.message_token_budget:
+            return text
+        # Repeated paragraphs (e.g. the same step result quoted twice) go first
+        seen: set[str] = set()
+        paras: list[str] = []
+        for para in re.split(r"\n\s*\n", text):
+            h = _norm_hash(para)
+            if para.strip() and h in seen:
+                continue
+            seen.add(h)
+            paras.append(para)
+        text = "\n\n".join(paras)
+        if estimate_tokens(text) <= self.message_token_budget:
+            return text
+        head, rest = text[:head_chars], text[head_chars:]
+        budget = max(0, self.message_token_budget - estimate_tokens(head) - _HEADER_TOKENS)
+        picked, kept, total = select_chunks(rest, f"{self.query} {head}", budget)
+        return f"{head}\n\n[Context compacted: kept {kept} of {total} sections]\n\n{picked}"
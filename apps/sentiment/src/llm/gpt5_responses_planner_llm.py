@@ -1,9 +1,11 @@
+import asyncio
 import json
 import os
 import logging
 from logging.handlers import RotatingFileHandler
 import re
 import time
+import weakref
 from typing import Any, List, Optional, Type, Union, Dict
 
 from openai import AsyncOpenAI
@@ -22,6 +24,22 @@ from mcp_agent.workflows.llm.augmented_llm import (
 from mcp.types import CallToolRequest, CallToolRequestParams
 from mcp_agent.logging.logger import get_logger
 
+from .rate_limit import estimate_tokens, get_rate_limiter
+from .context_compactor import ContextCompactor
+from .pdf_extract import get_pdf_extractor
+from .research_snapshot import current_research_log
+from .response_stream import (
+    CallDispatcher,
+    JsonStreamValidator,
+    MalformedOutputError,
+    consume_response_stream,
+    report_write_errors,
+    validate_report,
+)
+from .tool_cache import current_tool_cache, get_tool_cache
+from .telemetry import current_telemetry
+from .trace_replay import get_tracer
+
 # Optional Redis support for cross-process caching
 try:  # pragma: no cover - optional dependency
     from redis.asyncio import Redis as AsyncRedis  # type: ignore
@@ -89,6 +107,9 @@ class Gpt5ResponsesPlannerLLM(AugmentedLLM[MessageParamT, str]):
             "by_tool": dict(cls._TOOL_COUNTS),
             "by_agent": {k: dict(v) for k, v in cls._AGENT_TOOL_COUNTS.items()},
         }
+        cache = current_tool_cache()
+        if cache is not None:
+            snapshot["tool_cache"] = cache.snapshot()
         if reset:
             try:
                 cls._TOOL_COUNTS.clear()
@@ -116,10 +137,131 @@ class Gpt5ResponsesPlannerLLM(AugmentedLLM[MessageParamT, str]):
                 for agent, d in sorted(by_agent.items()):
                     parts = ", ".join(f"{n}:{c}" for n, c in sorted(d.items(), key=lambda x: (-int(x[1] or 0), x[0])))
                     lines.append(f"  • {agent}: {parts}")
+            cs = snap.get("tool_cache")
+            if cs:
+                lines.append(
+                    "- Tool cache: "
+                    f"hits mem/disk/redis={cs['hits_memory']}/{cs['hits_disk']}/{cs['hits_redis']}, "
+                    f"misses={cs['misses']}, hit_ratio={cs['hit_ratio']:.0%}, served={cs['bytes_served']}B, "
+                    f"memory={cs['memory_bytes']}B/{cs['memory_entries']} entries, "
+                    f"disk={cs.get('disk_bytes', 0)}B/{cs.get('disk_entries', 0)} entries"
+                )
             logger.info("\n".join(lines))
         except Exception:
             pass
 
+    def _rate_limiter(self):
+        """Process-wide OpenAI request/token budget shared by concurrent analyses."""
+        s = self._settings()
+        return get_rate_limiter(
+            "openai",
+            requests_per_minute=getattr(s, "sentiment_openai_rpm", None) if s else None,
+            tokens_per_minute=getattr(s, "sentiment_openai_tpm", None) if s else None,
+        )
+
+    # Per-MCP-server caps on concurrent tool calls, shared by all agents on the
+    # same event loop (asyncio primitives cannot be shared across loops)
+    _SERVER_SEMAPHORES: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, asyncio.Semaphore]]" = (
+        weakref.WeakKeyDictionary()
+    )
+
+    def _server_for(self, tool_name: Any) -> str:
+        """MCP server that owns `tool_name` (tools are namespaced `<server>_<tool>`)."""
+        try:
+            for srv in sorted(getattr(self.agent, "server_names", []) or [], key=len, reverse=True):
+                if str(tool_name).startswith(f"{srv}_"):
+                    return srv
+        except Exception:
+            pass
+        return "default"
+
+    def _server_semaphore(self, tool_name: str) -> asyncio.Semaphore:
+        """Semaphore for the MCP server that owns `tool_name`."""
+        server = self._server_for(tool_name)
+        loop = asyncio.get_running_loop()
+        semaphores = self._SERVER_SEMAPHORES.get(loop)
+        if semaphores is None:
+            semaphores = self._SERVER_SEMAPHORES[loop] = {}
+        sem = semaphores.get(server)
+        if sem is None:
+            s = self._settings()
+            try:
+                limit = int(getattr(s, "sentiment_tool_concurrency_per_server", None) or 4)
+            except Exception:
+                limit = 4
+            sem = asyncio.Semaphore(max(1, limit))
+            semaphores[server] = sem
+        return sem
+
+    def _tool_call_timeout(self) -> Optional[float]:
+        s = self._settings()
+        try:
+            v = getattr(s, "sentiment_tool_call_timeout_seconds", None)
+            return float(v) if v else 120.0
+        except Exception:
+            return 120.0
+
+    async def _traced(self, kind: str, request: Any, live):
+        """Route an OpenAI/MCP call through the record/replay tracer when one is configured."""
+        tracer = get_tracer(self._settings())
+        telemetry = current_telemetry()
+        start = time.monotonic()
+        result = None
+        try:
+            if tracer is None:
+                result = await live()
+            else:
+                result = await tracer.call(kind, str(getattr(self.agent, "name", "unknown")), request, live)
+            return result
+        finally:
+            if telemetry is not None:
+                elapsed = time.monotonic() - start
+                if kind == "responses.create":
+                    telemetry.record_openai(elapsed, result)
+                elif kind == "call_tool":
+                    error = result is None or bool(getattr(result, "isError", False))
+                    telemetry.record_tool(self._server_for((request or {}).get("name")), elapsed, error=error)
+
+    async def _create_response(
+        self,
+        client: Any,
+        kwargs: dict[str, Any],
+        dispatcher: Optional[CallDispatcher] = None,
+        on_text_delta=None,
+    ):
+        """responses.create, consumed as an event stream when SENTIMENT_OPENAI_STREAM is on.
+
+        Streaming hands each completed function call to `dispatcher` while the rest
+        of the response is still arriving; the traced request is the same either way.
+        """
+        streaming = bool(getattr(self._settings(), "sentiment_openai_stream", False)) and client is not None
+        if not streaming:
+            return await self._traced("responses.create", kwargs, lambda: client.responses.create(**kwargs))
+
+        async def _live():
+            events = await client.responses.create(**{**kwargs, "stream": True})
+            return await consume_response_stream(
+                events,
+                on_output_item=dispatcher.on_output_item if dispatcher is not None else None,
+                on_text_delta=on_text_delta,
+            )
+
+        try:
+            return await self._traced("responses.create", kwargs, _live)
+        except BaseException:
+            if dispatcher is not None:
+                dispatcher.cancel()
+            raise
+
+    @staticmethod
+    def _usage_total_tokens(resp: Any) -> Optional[int]:
+        try:
+            usage = getattr(resp, "usage", None)
+            total = getattr(usage, "total_tokens", None)
+            return int(total) if total is not None else None
+        except Exception:
+            return None
+
     def _settings(self):  # lazy load centralized settings
         s = getattr(self, "__settings", None)
         if s is not None:
@@ -310,16 +452,6 @@ class Gpt5ResponsesPlannerLLM(AugmentedLLM[MessageParamT, str]):
                 max_pdf_chars = 200_000
 
 
-            if not hasattr(self, "_mcp_tool_cache"):
-                self._mcp_tool_cache: dict[str, dict[str, Any]] = {}
-            if not hasattr(self, "_mcp_tool_cache_ttl"):
-                s = self._settings()
-                ttl = None
-                try:
-                    ttl = int(getattr(s, "sentiment_tool_cache_ttl_seconds", 0)) if s else None
-                except Exception:
-                    ttl = None
-                self._mcp_tool_cache_ttl = ttl if ttl and ttl > 0 else 86400
             # Initialize Redis client lazily if available
             if AsyncRedis is not None and not hasattr(self, "_redis_client"):
                 s = self._settings()
@@ -341,8 +473,12 @@ class Gpt5ResponsesPlannerLLM(AugmentedLLM[MessageParamT, str]):
                         )
                 except Exception:
                     self._redis_client = None
+            # Process-wide tiered cache (memory LRU -> SQLite -> Redis), shared by all agents
+            if cache_enabled:
+                self._tool_cache = get_tool_cache(self._settings(), getattr(self, "_redis_client", None))
         except Exception:
             pass
+        tool_cache = getattr(self, "_tool_cache", None)
         # Toggle for capturing full prompts/responses to logs
         s = self._settings()
         log_prompts = bool(getattr(s, "sentiment_log_prompts", False))
@@ -420,6 +556,40 @@ class Gpt5ResponsesPlannerLLM(AugmentedLLM[MessageParamT, str]):
                     "content": [{"type": "input_text", "text": str(message)}],
                 })
 
+        # Hard ceiling on what this step sends: long user prompts are compacted here
+        # and each turn's tool outputs in the bridge below
+        compactor: Optional[ContextCompactor] = None
+        if bool(getattr(s, "sentiment_context_compaction", True)):
+            try:
+                task_text = " ".join(
+                    part.get("text", "")
+                    for m in messages
+                    if m.get("role") == "user"
+                    for part in (m.get("content") or [])
+                    if isinstance(part, dict) and part.get("type") == "input_text"
+                )
+                compactor = ContextCompactor(
+                    query=task_text[:4000],
+                    turn_token_budget=int(getattr(s, "sentiment_context_turn_token_budget", None) or 12000),
+                    message_token_budget=int(getattr(s, "sentiment_context_message_token_budget", None) or 32000),
+                )
+                messages = [
+                    {
+                        **m,
+                        "content": [
+                            {**part, "text": compactor.compact_message(part["text"])}
+                            if isinstance(part, dict) and part.get("type") == "input_text" and isinstance(part.get("text"), str)
+                            else part
+                            for part in (m.get("content") or [])
+                        ],
+                    }
+                    if m.get("role") == "user" and isinstance(m.get("content"), list)
+                    else m
+                    for m in messages
+                ]
+            except Exception:
+                compactor = None
+
         model = request_params.model or (self.default_request_params.model if self.default_request_params else None)
         if not model:
             raise ValueError("Planner model not specified")
@@ -459,7 +629,7 @@ class Gpt5ResponsesPlannerLLM(AugmentedLLM[MessageParamT, str]):
 
         # Map MCP tools to Responses function tools
         try:
-            tools_resp = await self.agent.list_tools()
+            tools_resp = await self._traced("list_tools", {}, self.agent.list_tools)
             tools_list: list[dict[str, Any]] = []
             # Cache schemas to guide argument augmentation (e.g., fetch PDF handling)
             self._tool_schemas: dict[str, dict[str, Any]] = {}
@@ -517,7 +687,11 @@ class Gpt5ResponsesPlannerLLM(AugmentedLLM[MessageParamT, str]):
         config = getattr(self.context, "config", None)
         api_key = getattr(getattr(config, "openai", None), "api_key", None)
         base_url = getattr(getattr(config, "openai", None), "base_url", None)
-        client = AsyncOpenAI(api_key=api_key, base_url=base_url) if base_url else AsyncOpenAI(api_key=api_key)
+        tracer = get_tracer(s)
+        if tracer is not None and tracer.replaying:
+            client = None  # every request is served from the trace
+        else:
+            client = AsyncOpenAI(api_key=api_key, base_url=base_url) if base_url else AsyncOpenAI(api_key=api_key)
 
         # Log request (without secrets)
         try:
@@ -556,23 +730,14 @@ class Gpt5ResponsesPlannerLLM(AugmentedLLM[MessageParamT, str]):
         except Exception:
             pass
 
-        # Create response, with fallback if SDK does not support response_format
+        # Respect the shared provider budget before spending a request
+        limiter = self._rate_limiter()
+        est_tokens = 0
         try:
-            resp = await client.responses.create(**kwargs)  # type: ignore[arg-type]
-        except TypeError as e:
-            # Older SDKs may not accept response_format; retry without it
-            if "response_format" in str(e):
-                try:
-                    _ = kwargs.pop("response_format", None)
-                    self.logger.debug(
-                        "Responses.create: retrying without response_format (unsupported by SDK)",
-                        data={"had_response_format": True},
-                    )
-                except Exception:
-                    pass
-                resp = await client.responses.create(**kwargs)  # type: ignore[arg-type]
-            else:
-                raise
+            est_tokens = estimate_tokens(json.dumps(messages, ensure_ascii=False)) + int(kwargs.get("max_output_tokens") or 0)
+        except Exception:
+            est_tokens = int(kwargs.get("max_output_tokens") or 0)
+        await limiter.acquire(tokens=est_tokens)
 
         # Helper: augment fetch args (PDF-aware) based on tool schema
         def _augment_fetch_args(tool_name: str, args: dict[str, Any] | None) -> dict[str, Any]:
@@ -627,25 +792,27 @@ class Gpt5ResponsesPlannerLLM(AugmentedLLM[MessageParamT, str]):
             except Exception:
                 return a
 
-        # --- Replace your _pdf_to_markdown with a streaming version + length cap ---
+        # Download streams to a temp file (hashed on the way); conversion runs in the
+        # PDF worker pool so large filings never block the event loop.
         async def _pdf_to_markdown(url: str) -> Optional[str]:
+            fpath = None
             try:
                 if httpx is None:
                     return None
                 timeout = httpx.Timeout(30.0, connect=15.0)
                 headers = {"User-Agent": "Mozilla/5.0 (compatible; RankAlpha/1.0)"}
 
-                import os as _os
+                import hashlib as _hashlib
+                import uuid as _uuid
                 from pathlib import Path as _Path
-                from datetime import datetime as _dt
 
                 base_dir = getattr(self._settings(), "sentiment_data_dir", None) or "/tmp"
                 tmp_dir = _Path(base_dir) / "pdf_tmp"
                 tmp_dir.mkdir(parents=True, exist_ok=True)
-                fname = _dt.now().strftime("pdf_%Y%m%d_%H%M%S_%f.pdf")
-                fpath = tmp_dir / fname
+                fpath = tmp_dir / f"pdf_{_uuid.uuid4().hex}.pdf"
 
-                # Stream to disk to avoid loading entire file in memory
+                digest = _hashlib.sha256()
+                head = b""
                 async with httpx.AsyncClient(follow_redirects=True, timeout=timeout) as client:
                     async with client.stream("GET", url, headers=headers) as r:
                         r.raise_for_status()
@@ -656,279 +823,313 @@ class Gpt5ResponsesPlannerLLM(AugmentedLLM[MessageParamT, str]):
                             return None  # bail on >50MB by policy; adjust as needed
                         with fpath.open("wb") as w:
                             async for chunk in r.aiter_bytes():
+                                if len(head) < 5:
+                                    head += chunk[: 5 - len(head)]
+                                digest.update(chunk)
                                 w.write(chunk)
 
                 # Quick validation by magic header if possible
-                head = fpath.read_bytes(5)
                 if not head.startswith(b"%PDF") and "pdf" not in ct:
                     return None
 
-                # Prefer PyMuPDF markdown
-                try:
-                    import pymupdf4llm as _pdf4llm  # type: ignore
-                    md = _pdf4llm.to_markdown(str(fpath))
-                    if isinstance(md, str) and md.strip():
-                        pass
-                    else:
-                        md = None
-                except Exception:
-                    md = None
-
-                # Fallback to pdfminer text
-                if not md:
+                extract_start = time.monotonic()
+                md = await get_pdf_extractor(self._settings()).extract(
+                    str(fpath), content_hash=digest.hexdigest(), max_chars=max_pdf_chars
+                )
+                telemetry = current_telemetry()
+                if telemetry is not None:
+                    telemetry.record_pdf(time.monotonic() - extract_start)
+                return md
+            except Exception:
+                return None
+            finally:
+                if fpath is not None:
                     try:
-                        from pdfminer.high_level import extract_text as _extract_text  # type: ignore
-                        txt = _extract_text(str(fpath))
-                        if txt and txt.strip():
-                            md = "# Extracted PDF Text\n\n" + txt
+                        fpath.unlink(missing_ok=True)
                     except Exception:
-                        md = None
+                        pass
+
 
-                if not md:
+        def _is_pdf_fetch(tool_name: Any, args: Any) -> Optional[str]:
+            """Return the URL when a call is a fetch of a PDF document."""
+            if not isinstance(tool_name, str) or "fetch" not in tool_name.lower() or not isinstance(args, dict):
+                return None
+            for k in ("url", "uri", "href"):
+                url_val = args.get(k)
+                if isinstance(url_val, str):
+                    low = url_val.lower()
+                    if any(p in low for p in (".pdf", "content=pdf", "format=pdf", "download=pdf")):
+                        return url_val
                     return None
+            return None
 
-                # Hard cap length to avoid blowing the model context
-                nonlocal max_pdf_chars  # uses the variable defined above
-                if max_pdf_chars and len(md) > max_pdf_chars:
-                    md = md[:max_pdf_chars] + f"\n\n[Truncated at {max_pdf_chars} chars]"
+        call_timeout = self._tool_call_timeout()
+        validate_writes = agent_name == "report_writer" and bool(getattr(s, "sentiment_validate_report_writes", True))
 
-                return md
+        async def _run_uncached(call_id: str, tool_name: str, args: Any) -> dict[str, Any]:
+            # PDF fetches are converted to markdown directly instead of calling the MCP tool
+            pdf_url = _is_pdf_fetch(tool_name, args)
+            if pdf_url:
+                md = await _pdf_to_markdown(pdf_url)
+                if md:
+                    return {
+                        "text": md,
+                        "isError": False,
+                        "source": "pdf-markdown",
+                        "truncated": bool(max_pdf_chars) and len(md) >= max_pdf_chars,
+                    }
+            call_args = args if isinstance(args, dict) else {}
+            try:
+                call_args = _augment_fetch_args(tool_name, call_args)
             except Exception:
-                return None
+                pass
+            req = CallToolRequest(
+                method="tools/call",
+                params=CallToolRequestParams(name=tool_name, arguments=call_args),
+            )
+            res = await self._traced(
+                "call_tool",
+                {"name": tool_name, "arguments": call_args},
+                lambda: self.call_tool(request=req, tool_call_id=str(call_id)),
+            )
+            try:
+                self.record_tool_use(getattr(self.agent, "name", "unknown"), str(tool_name))
+            except Exception:
+                pass
+            out_lines: list[str] = []
+            for c in getattr(res, "content", []) or []:
+                try:
+                    out_lines.append(getattr(c, "text", None) or str(c))
+                except Exception:
+                    pass
+            return {"text": "\n".join(out_lines), "isError": getattr(res, "isError", False)}
 
+        async def _execute_call(call_id: str, tool_name: str, args: Any) -> dict[str, Any]:
+            """Run one function call: cache, then the tool under its server's cap and a timeout.
 
-        # Bridge Responses function calls to MCP tools (with per-instance caching)
-        try:
-            while True:
-                outputs = getattr(resp, "output", []) or []
-                fn_outputs: list[dict[str, Any]] = []
-                for item in outputs:
-                    if getattr(item, "type", "") != "function_call":
-                        continue
-                    name = getattr(item, "name", None)
-                    call_id = getattr(item, "call_id", None)
-                    args_raw = getattr(item, "arguments", None)
-                    try:
-                        args = json.loads(args_raw or "{}") if isinstance(args_raw, str) else (args_raw or {})
-                    except Exception:
-                        args = {}
-                    # Special handling for OpenAI's aggregator tool which requests multiple tool calls in parallel
-                    try:
-                        nlower = str(name or "").lower()
-                        if nlower in {"multi_tool_use.parallel", "multi_tool_use.serial", "functions.multi_tool_use.parallel"}:
-                            nested = []
-                            # Common schema: { "tool_calls": [ {"id": "call_...", "name": "fetch", "arguments": {...}}, ...] }
-                            if isinstance(args, dict):
-                                if isinstance(args.get("tool_calls"), list):
-                                    nested = args.get("tool_calls") or []
-                                elif isinstance(args.get("calls"), list):
-                                    nested = args.get("calls") or []
-                            for nc in nested:
+            Failures and timeouts become error payloads so one bad call never sinks the turn.
+            """
+            nonlocal tool_calls_total_local
+            # A report that would fail to parse or insert is bounced back to the writer
+            if validate_writes and "write" in str(tool_name).lower():
+                problems = report_write_errors(args)
+                if problems:
+                    self.logger.warning(f"Rejected report write via {tool_name}: {'; '.join(problems)}")
+                    return {
+                        "text": "Report not saved: " + "; ".join(problems) + ". Fix the report JSON and call the tool again.",
+                        "isError": True,
+                    }
+            key_args = dict(args) if isinstance(args, dict) else None
+            use_cache = cache_enabled and tool_cache is not None and key_args is not None
+            if use_cache:
+                try:
+                    cached = await tool_cache.get(tool_name, key_args)
+                    telemetry = current_telemetry()
+                    if telemetry is not None:
+                        telemetry.record_cache(cached is not None)
+                    if cached is not None:
+                        return cached
+                except Exception:
+                    pass
+            try:
+                async with self._server_semaphore(tool_name):
+                    if call_timeout:
+                        payload = await asyncio.wait_for(_run_uncached(call_id, tool_name, args), timeout=call_timeout)
+                    else:
+                        payload = await _run_uncached(call_id, tool_name, args)
+            except asyncio.TimeoutError:
+                self.logger.warning(f"Tool call {tool_name} timed out after {call_timeout}s")
+                return {"text": f"Tool call timed out after {call_timeout}s", "isError": True}
+            except Exception as e:
+                return {"text": f"Tool call failed: {e}", "isError": True}
+            tool_calls_total_local += 1
+            if use_cache:
+                try:
+                    await tool_cache.set(tool_name, key_args, payload)
+                except Exception:
+                    pass
+            return payload
+
+        def _collect_calls(outputs: list[Any]) -> list[tuple[str, str, Any]]:
+            """Flatten function calls (including multi_tool_use aggregator calls) in emission order."""
+            calls: list[tuple[str, str, Any]] = []
+            for item in outputs:
+                if getattr(item, "type", "") != "function_call":
+                    continue
+                name = getattr(item, "name", None)
+                call_id = getattr(item, "call_id", None)
+                args_raw = getattr(item, "arguments", None)
+                try:
+                    args = json.loads(args_raw or "{}") if isinstance(args_raw, str) else (args_raw or {})
+                except Exception:
+                    args = {}
+                # OpenAI's aggregator tool requests several tool calls at once
+                nlower = str(name or "").lower()
+                if nlower in {"multi_tool_use.parallel", "multi_tool_use.serial", "functions.multi_tool_use.parallel"}:
+                    nested = []
+                    # Common schema: { "tool_calls": [ {"id": "call_...", "name": "fetch", "arguments": {...}}, ...] }
+                    if isinstance(args, dict):
+                        if isinstance(args.get("tool_calls"), list):
+                            nested = args.get("tool_calls") or []
+                        elif isinstance(args.get("calls"), list):
+                            nested = args.get("calls") or []
+                    for nc in nested:
+                        try:
+                            nid = nc.get("id") or nc.get("call_id")
+                            nname = nc.get("name")
+                            nargs = nc.get("arguments")
+                            if isinstance(nargs, str):
                                 try:
-                                    nid = nc.get("id") or nc.get("call_id")
-                                    nname = nc.get("name")
-                                    nargs = nc.get("arguments")
-                                    if isinstance(nargs, str):
-                                        try:
-                                            nargs = json.loads(nargs)
-                                        except Exception:
-                                            pass
-                                    if not nid or not nname:
-                                        continue
-                                    # If this nested call is a fetch for a PDF, directly convert to markdown
-                                    try:
-                                        url_val = None
-                                        if isinstance(nargs, dict):
-                                            for k in ("url", "uri", "href"):
-                                                if k in nargs:
-                                                    url_val = nargs[k]
-                                                    break
-                                        if isinstance(nname, str) and ("fetch" in nname.lower()) and isinstance(url_val, str):
-                                            low = url_val.lower()
-                                            if any(s in low for s in (".pdf", "content=pdf", "format=pdf", "download=pdf")):
-                                                md = await _pdf_to_markdown(url_val)
-                                                if md:
-                                                    payload = {"text": md, "isError": False, "source": "pdf-markdown","truncated": len(md) >= max_pdf_chars}
-                                                    fn_outputs.append({"type": "function_call_output", "call_id": nid, "output": json.dumps(payload, ensure_ascii=False)})
-                                                    tool_calls_total += 1
-                                                    # Also cache result
-                                                    try:
-                                                        if cache_enabled:
-                                                            # Build a local cache key specific to nested call
-                                                            nkey = f"{nname}:{json.dumps(nargs, sort_keys=True, ensure_ascii=False)}"
-                                                            if getattr(self, "_redis_client", None) is not None:
-                                                                rkey = f"sentiment:tool_cache:{nkey}"
-                                                                ttl = int(float(getattr(self, "_mcp_tool_cache_ttl", 86400)))
-                                                                await self._redis_client.setex(rkey, ttl, json.dumps(payload, ensure_ascii=False))
-                                                            # in-memory
-                                                            try:
-                                                                self._mcp_tool_cache[nkey] = {"payload": payload, "expires": time.time() + float(getattr(self, "_mcp_tool_cache_ttl", 86400))}
-                                                            except Exception:
-                                                                pass
-                                                    except Exception:
-                                                        pass
-                                                    tool_calls_total_local += 1
-                                                    continue
-                                    except Exception:
-                                        pass
-                                    # Ensure reasonable fetch length by default
-                                    try:
-                                        if isinstance(nname, str) and isinstance(nargs, dict):
-                                            nargs = _augment_fetch_args(nname, nargs)
-                                    except Exception:
-                                        pass
-                                    # Execute the MCP tool for this nested call
-                                    req = CallToolRequest(method="tools/call", params=CallToolRequestParams(name=nname, arguments=nargs or {}))
-                                    res = await self.call_tool(request=req, tool_call_id=str(nid))
-                                    try:
-                                        self.record_tool_use(getattr(self.agent, "name", "unknown"), str(nname))
-                                    except Exception:
-                                        pass
-                                    out_lines: list[str] = []
-                                    for c in getattr(res, "content", []) or []:
-                                        try:
-                                            out_lines.append(getattr(c, "text", None) or str(c))
-                                        except Exception:
-                                            pass
-                                    payload = {"text": "\n".join(out_lines), "isError": getattr(res, "isError", False)}
-                                    fn_outputs.append({"type": "function_call_output", "call_id": nid, "output": json.dumps(payload, ensure_ascii=False)})
-                                    tool_calls_total += 1
+                                    nargs = json.loads(nargs)
                                 except Exception:
-                                    continue
-                            # Aggregator handled; skip normal single-tool path
-                            continue
-                    except Exception:
-                        # Fallback to normal handling if aggregator parsing fails
-                        pass
-                    # Compute a canonical cache key (ignore purely runtime knobs)
-                    cache_enabled = bool(getattr(self._settings(), "sentiment_tool_cache", True))
-                    cache_key = None
-                    if cache_enabled:
-                        try:
-                            # Remove non-result-affecting keys
-                            args_for_key = dict(args)
-                            for k in list(args_for_key.keys()):
-                                if k in {"timeout", "debug"}:
-                                    args_for_key.pop(k, None)
-                            cache_key = f"{name}:{json.dumps(args_for_key, sort_keys=True, ensure_ascii=False)}"
+                                    pass
+                            if nid and nname:
+                                calls.append((str(nid), str(nname), nargs or {}))
                         except Exception:
-                            cache_key = None
-                    # Ensure reasonable fetch length and PDF hints
+                            continue
+                    continue
+                if call_id and name:
+                    calls.append((str(call_id), str(name), args))
+            return calls
+
+        # Streamed output from the writer/analyst is JSON-checked as it arrives.
+        # The first malformed document is recorded at the offending chunk, the
+        # stream is abandoned and the request is re-issued once with a correction.
+        validate_text = agent_name in ("report_writer", "financial_analyst")
+        text_validator: Optional[JsonStreamValidator] = None
+        corrected = False
+
+        def _on_malformed(error: str) -> None:
+            self.logger.warning(
+                "Malformed JSON in streamed output",
+                data={"agent": getattr(self.agent, "name", "unknown"), "error": error, "corrected": corrected},
+            )
+            telemetry = current_telemetry()
+            if telemetry is not None:
+                telemetry.record_malformed_output(str(getattr(self.agent, "name", "unknown")))
+            if not corrected:
+                raise MalformedOutputError(error)
+
+        def _new_validator() -> Optional[JsonStreamValidator]:
+            if not validate_text:
+                return None
+            return JsonStreamValidator(
+                schema=validate_report if agent_name == "report_writer" else None, on_error=_on_malformed
+            )
+
+        def _on_text(chunk: str) -> None:
+            if text_validator is not None:
+                text_validator.feed(chunk)
+
+        text_validator = _new_validator()
+        dispatcher = CallDispatcher(_execute_call, _collect_calls)
+
+        async def _create(request_kwargs: dict[str, Any]):
+            nonlocal dispatcher, text_validator, corrected
+            try:
+                return await self._create_response(
+                    client, request_kwargs, dispatcher, on_text_delta=_on_text if validate_text else None
+                )
+            except MalformedOutputError as e:
+                corrected = True
+                prior = request_kwargs.get("input")
+                retry_kwargs = {
+                    **request_kwargs,
+                    "input": [
+                        *(prior if isinstance(prior, list) else [{"role": "user", "content": str(prior or "")}]),
+                        {
+                            "role": "user",
+                            "content": (
+                                f"Your output was not valid JSON ({e}). Respond again with the complete "
+                                "JSON document only, well-formed and following the required schema."
+                            ),
+                        },
+                    ],
+                }
+                # The abandoned attempt's usage is never reported; its estimate stands
+                await limiter.acquire(
+                    tokens=estimate_tokens(json.dumps(retry_kwargs["input"], ensure_ascii=False, default=str))
+                    + int(request_kwargs.get("max_output_tokens") or 0)
+                )
+                text_validator = _new_validator()
+                dispatcher = CallDispatcher(_execute_call, _collect_calls)
+                return await self._create_response(
+                    client, retry_kwargs, dispatcher, on_text_delta=_on_text if validate_text else None
+                )
+
+        # Create response, with fallback if SDK does not support response_format
+        try:
+            resp = await _create(kwargs)
+        except TypeError as e:
+            # Older SDKs may not accept response_format; retry without it
+            if "response_format" in str(e):
+                try:
+                    _ = kwargs.pop("response_format", None)
+                    self.logger.debug(
+                        "Responses.create: retrying without response_format (unsupported by SDK)",
+                        data={"had_response_format": True},
+                    )
+                except Exception:
+                    pass
+                dispatcher = CallDispatcher(_execute_call, _collect_calls)
+                resp = await _create(kwargs)
+            else:
+                raise
+        limiter.reconcile(est_tokens, self._usage_total_tokens(resp))
+
+        # Bridge Responses function calls to MCP tools. Calls within a turn are
+        # independent, so they run concurrently (capped per MCP server); outputs
+        # keep the order in which the model emitted the calls.
+        try:
+            while True:
+                calls = _collect_calls(getattr(resp, "output", []) or [])
+                # Identical calls in one turn share a single execution; calls the
+                # stream already dispatched are reused rather than re-run
+                payloads = await asyncio.gather(*dispatcher.futures_for(calls))
+                if dispatcher.early:
+                    self.logger.debug(
+                        "Tool calls dispatched while streaming",
+                        data={"agent": getattr(self.agent, "name", "unknown"), "early": dispatcher.early, "calls": len(calls)},
+                    )
+                research_log = current_research_log()
+                if research_log is not None:
+                    for (_cid, name, args), payload in zip(calls, payloads):
+                        if isinstance(payload, dict) and not payload.get("isError"):
+                            research_log.record(name, args if isinstance(args, dict) else None, str(payload.get("text") or ""))
+                if compactor is not None:
                     try:
-                        # If this call is a fetch for PDF, try to convert to markdown directly
-                        if isinstance(name, str):
-                            url_val = None
-                            if isinstance(args, dict):
-                                for k in ("url", "uri", "href"):
-                                    if k in args:
-                                        url_val = args[k]
-                                        break
-                            if ("fetch" in name.lower()) and isinstance(url_val, str):
-                                low = url_val.lower()
-                                if any(s in low for s in (".pdf", "content=pdf", "format=pdf", "download=pdf")):
-                                    md = await _pdf_to_markdown(url_val)
-                                    if md:
-                                        payload = {"text": md, "isError": False, "source": "pdf-markdown", "truncated": len(md) >= max_pdf_chars}
-                                        # respond immediately without calling the MCP tool
-                                        fn_outputs.append({"type": "function_call_output", "call_id": call_id, "output": json.dumps(payload, ensure_ascii=False)})
-                                        tool_calls_total += 1
-                                        # Cache result
-                                        if cache_enabled and cache_key:
-                                            try:
-                                                if getattr(self, "_redis_client", None) is not None:
-                                                    rkey = f"sentiment:tool_cache:{cache_key}"
-                                                    ttl = int(float(getattr(self, "_mcp_tool_cache_ttl", 86400)))
-                                                    await self._redis_client.setex(rkey, ttl, json.dumps(payload, ensure_ascii=False))
-                                            
-                                                self._mcp_tool_cache[cache_key] = {"payload": payload, "expires": time.time() + float(getattr(self, "_mcp_tool_cache_ttl", 86400))}
-                                            except Exception:
-                                                pass
-                                        # Skip the standard tool execution for this call
-                                        tool_calls_total_local += 1
-                                        continue
-                            # otherwise normal augmentation
-                            args = _augment_fetch_args(name, args)
+                        payloads = compactor.compact_turn(calls, list(payloads))
                     except Exception:
                         pass
-                    cached_payload: Optional[dict[str, Any]] = None
-                    # Prefer Redis cache if available
-                    if cache_key and getattr(self, "_redis_client", None) is not None:
-                        try:
-                            rkey = f"sentiment:tool_cache:{cache_key}"
-                            val = await self._redis_client.get(rkey)
-                            if val:
-                                cached_payload = json.loads(val)
-                        except Exception:
-                            cached_payload = None
-                    # Fallback to in-memory cache
-                    if cache_key and cached_payload is None and getattr(self, "_mcp_tool_cache", None) is not None:
-                        entry = self._mcp_tool_cache.get(cache_key)
-                        now = time.time()
-                        if entry and isinstance(entry, dict):
-                            try:
-                                if float(entry.get("expires", 0)) >= now:
-                                    cached_payload = entry.get("payload")
-                                else:
-                                    self._mcp_tool_cache.pop(cache_key, None)
-                            except Exception:
-                                pass
-                    if cached_payload is None:
-                        # Execute MCP tool
-                        req = CallToolRequest(
-                            method="tools/call",
-                            params=CallToolRequestParams(name=name, arguments=args),
-                        )
-                        res = await self.call_tool(request=req, tool_call_id=str(call_id))
-                        try:
-                            self.record_tool_use(getattr(self.agent, "name", "unknown"), str(name))
-                        except Exception:
-                            pass
-                        out_lines: list[str] = []
-                        for c in getattr(res, "content", []) or []:
-                            try:
-                                out_lines.append(getattr(c, "text", None) or str(c))
-                            except Exception:
-                                pass
-                        payload = {
-                            "text": "\n".join(out_lines),
-                            "isError": getattr(res, "isError", False),
-                        }
-                        if cache_key and cache_enabled:
-                            # Store in Redis (preferred)
-                            try:
-                                if getattr(self, "_redis_client", None) is not None:
-                                    rkey = f"sentiment:tool_cache:{cache_key}"
-                                    ttl = int(float(getattr(self, "_mcp_tool_cache_ttl", 86400)))
-                                    await self._redis_client.setex(rkey, ttl, json.dumps(payload, ensure_ascii=False))
-                            except Exception:
-                                pass
-                            # Always back up in local memory in case Redis is unavailable later
-                            try:
-                                self._mcp_tool_cache[cache_key] = {
-                                    "payload": payload,
-                                    "expires": time.time() + float(getattr(self, "_mcp_tool_cache_ttl", 86400)),
-                                }
-                            except Exception:
-                                pass
-                    else:
-                        payload = cached_payload
-                    fn_outputs.append(
-                        {
-                            "type": "function_call_output",
-                            "call_id": call_id,
-                            "output": json.dumps(payload, ensure_ascii=False),
-                        }
-                    )
+                fn_outputs: list[dict[str, Any]] = [
+                    {
+                        "type": "function_call_output",
+                        "call_id": call_id,
+                        "output": json.dumps(payload, ensure_ascii=False),
+                    }
+                    for (call_id, _name, _args), payload in zip(calls, payloads)
+                ]
                 if not fn_outputs:
                     break
-                resp = await client.responses.create(
-                    model=model,
-                    previous_response_id=getattr(resp, "id", None),
-                    input=fn_outputs,
-                )
+                # Prior turns are billed again as input via previous_response_id; the
+                # estimate only covers the new outputs and reconcile() corrects the rest.
+                follow_est = estimate_tokens(json.dumps(fn_outputs, ensure_ascii=False)) + int(kwargs.get("max_output_tokens") or 0)
+                await limiter.acquire(tokens=follow_est)
+                follow_kwargs = {"model": model, "previous_response_id": getattr(resp, "id", None), "input": fn_outputs}
+                dispatcher = CallDispatcher(_execute_call, _collect_calls)
+                resp = await _create(follow_kwargs)
+                limiter.reconcile(follow_est, self._usage_total_tokens(resp))
         except Exception:
             # If function-call bridging fails, fall through and try to extract text
-            pass
+            dispatcher.cancel()
+        if compactor is not None and compactor.stats["outputs"]:
+            try:
+                self.logger.debug(
+                    "Context compaction",
+                    data={"agent": getattr(self.agent, "name", "unknown"), **compactor.stats},
+                )
+            except Exception:
+                pass
 
         # Extract text output
         try:
@@ -1023,10 +1224,26 @@ class Gpt5ResponsesPlannerLLM(AugmentedLLM[MessageParamT, str]):
         except Exception:
             return "", None
 
+    def _record_step(self, start: float) -> None:
+        telemetry = current_telemetry()
+        if telemetry is not None:
+            telemetry.record_step(str(getattr(self.agent, "name", "unknown")), time.monotonic() - start)
+
     async def generate(
         self,
         message: Union[str, MessageParamT, List[MessageParamT]],
         request_params: RequestParams | None = None,
+    ) -> List[str]:
+        start = time.monotonic()
+        try:
+            return await self._generate(message, request_params)
+        finally:
+            self._record_step(start)
+
+    async def _generate(
+        self,
+        message: Union[str, MessageParamT, List[MessageParamT]],
+        request_params: RequestParams | None = None,
     ) -> List[str]:
         params = self.get_request_params(request_params)
 
@@ -1115,7 +1332,7 @@ class Gpt5ResponsesPlannerLLM(AugmentedLLM[MessageParamT, str]):
                         pass
                 if path_match:
                     # Discover a write-capable filesystem tool
-                    tools_resp = await self.agent.list_tools()
+                    tools_resp = await self._traced("list_tools", {}, self.agent.list_tools)
                     write_tool = None
                     content_key = None
                     for t in tools_resp.tools:
@@ -1136,7 +1353,11 @@ class Gpt5ResponsesPlannerLLM(AugmentedLLM[MessageParamT, str]):
                     if write_tool and content_key:
                         args = {"path": path_match, content_key: final_text}
                         req = CallToolRequest(method="tools/call", params=CallToolRequestParams(name=write_tool.name, arguments=args))
-                        save_res = await self.call_tool(request=req, tool_call_id="resp_tool_save")
+                        save_res = await self._traced(
+                            "call_tool",
+                            {"name": write_tool.name, "arguments": args},
+                            lambda: self.call_tool(request=req, tool_call_id="resp_tool_save"),
+                        )
                         try:
                             self.record_tool_use(getattr(self.agent, "name", "unknown"), str(write_tool.name))
                         except Exception:
@@ -1209,6 +1430,18 @@ class Gpt5ResponsesPlannerLLM(AugmentedLLM[MessageParamT, str]):
         message: Union[str, MessageParamT, List[MessageParamT]],
         response_model: Type[ModelT],
         request_params: RequestParams | None = None,
+    ) -> ModelT:
+        start = time.monotonic()
+        try:
+            return await self._generate_structured(message, response_model, request_params)
+        finally:
+            self._record_step(start)
+
+    async def _generate_structured(
+        self,
+        message: Union[str, MessageParamT, List[MessageParamT]],
+        response_model: Type[ModelT],
+        request_params: RequestParams | None = None,
     ) -> ModelT:
         params = self.get_request_params(request_params)
         # Ensure prompt logger is wired for file capture
@@ -0,0 +1,331 @@
+from __future__ import annotations
+
+import asyncio
+import multiprocessing
+import re
+import weakref
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Optional
+
+# Pages converted per pymupdf4llm call; the character budget is checked between chunks
+PAGES_PER_CHUNK = 8
+
+# Filing sections the analyst prompts lean on, in the order they are emitted
+PRIORITY_SECTIONS = (
+    ("Management's Discussion and Analysis", re.compile(r"management.{0,3}s\s+discussion\s+and\s+analysis", re.I)),
+    ("Risk Factors", re.compile(r"risk\s+factors", re.I)),
+    (
+        "Financial Statements",
+        re.compile(
+            r"financial\s+statements|consolidated\s+balance\s+sheets?|statements?\s+of\s+(?:operations|income|cash\s+flows)",
+            re.I,
+        ),
+    ),
+)
+# Any "Item N." heading ends the section before it
+_ITEM_HEADING = re.compile(r"^\s*item\s+\d{1,2}[a-c]?\b", re.I | re.M)
+# Only the top of each page is scanned for headings
+_HEADING_SCAN_CHARS = 400
+
+
+def _truncate(md: str, max_chars: Optional[int]) -> str:
+    if max_chars and len(md) > max_chars:
+        return md[:max_chars] + f"\n\n[Truncated at {max_chars} chars]"
+    return md
+
+
+def _sections_from_toc(toc: list, page_count: int) -> dict[str, range]:
+    """Map priority sections to 0-based page ranges using the PDF outline."""
+    found: dict[str, range] = {}
+    for i, entry in enumerate(toc):
+        lvl, title, page = entry[0], entry[1], entry[2]
+        if page < 1:
+            continue
+        for name, pat in PRIORITY_SECTIONS:
+            if name in found or not pat.search(title or ""):
+                continue
+            # Runs until the next outline entry at the same or a higher level
+            stop = page_count
+            for nxt in toc[i + 1 :]:
+                if nxt[0] <= lvl and nxt[2] >= page:
+                    stop = max(nxt[2] - 1, page)
+                    break
+            found[name] = range(page - 1, min(stop, page_count))
+            break
+    return found
+
+
+def _sections_from_headings(doc: Any) -> dict[str, range]:
+    """Cheap first pass: look for section headings at the top of each page."""
+    starts: list[tuple[int, Optional[str]]] = []
+    for pno in range(doc.page_count):
+        head = doc[pno].get_text("text")[:_HEADING_SCAN_CHARS]
+        names = [name for name, pat in PRIORITY_SECTIONS if pat.search(head)]
+        if len(names) > 1:
+            continue  # table of contents / index page lists every section
+        if names:
+            starts.append((pno, names[0]))
+        elif _ITEM_HEADING.search(head):
+            starts.append((pno, None))
+    found: dict[str, range] = {}
+    for i, (pno, name) in enumerate(starts):
+        if name is None or name in found:
+            continue
+        stop = next((p for p, _ in starts[i + 1 :] if p > pno), doc.page_count)
+        found[name] = range(pno, stop)
+    return found
+
+
+def page_plan(doc: Any, prioritize: bool = True, max_pages: Optional[int] = None) -> list[tuple[str, list[int]]]:
+    """Order in which pages are converted, as (label, pages) groups.
+
+    With `prioritize`, the cover page comes first, then MD&A, risk factors and
+    financial statements (located via the outline, else a heading scan), then
+    everything else in document order. Without it, pages are in document order.
+    """
+    limit = doc.page_count if not max_pages else min(doc.page_count, max_pages)
+    if not prioritize or limit <= 1:
+        return [("", list(range(limit)))]
+    sections: dict[str, range] = {}
+    try:
+        sections = _sections_from_toc(doc.get_toc(simple=True) or [], doc.page_count)
+    except Exception:
+        sections = {}
+    if not sections:
+        try:
+            sections = _sections_from_headings(doc)
+        except Exception:
+            sections = {}
+    if not sections:
+        return [("", list(range(limit)))]
+
+    plan: list[tuple[str, list[int]]] = [("Cover", [0])]
+    seen = {0}
+    for name, _pat in PRIORITY_SECTIONS:
+        pages = [p for p in sections.get(name, ()) if p not in seen and p < limit]
+        if pages:
+            plan.append((name, pages))
+            seen.update(pages)
+    rest = [p for p in range(limit) if p not in seen]
+    if rest:
+        plan.append(("Other pages", rest))
+    return plan
+
+
+def _section_marker(label: str, pages: list[int]) -> str:
+    return f"\n\n[Section: {label}, pages {pages[0] + 1}-{pages[-1] + 1}]\n\n"
+
+
+def _extract_pymupdf(
+    path: str, max_chars: Optional[int], max_pages: Optional[int], prioritize: bool = True
+) -> Optional[str]:
+    import pymupdf  # type: ignore
+    import pymupdf4llm  # type: ignore
+
+    parts: list[str] = []
+    total = 0
+    with pymupdf.open(path) as doc:
+        for label, pages in page_plan(doc, prioritize=prioritize, max_pages=max_pages):
+            if label:
+                parts.append(_section_marker(label, pages))
+            for start in range(0, len(pages), PAGES_PER_CHUNK):
+                part = pymupdf4llm.to_markdown(doc, pages=pages[start : start + PAGES_PER_CHUNK], show_progress=False)
+                if part:
+                    parts.append(part)
+                    total += len(part)
+                if max_chars and total >= max_chars:
+                    break
+            if max_chars and total >= max_chars:
+                break
+    md = "".join(parts)
+    return md if md.strip() else None
+
+
+def _extract_pdfminer(path: str, max_chars: Optional[int], max_pages: Optional[int]) -> Optional[str]:
+    from pdfminer.high_level import extract_pages  # type: ignore
+    from pdfminer.layout import LTTextContainer  # type: ignore
+
+    parts: list[str] = []
+    total = 0
+    for layout in extract_pages(path, maxpages=max_pages or 0):
+        text = "".join(el.get_text() for el in layout if isinstance(el, LTTextContainer))
+        parts.append(text)
+        total += len(text)
+        if max_chars and total >= max_chars:
+            break
+    txt = "".join(parts)
+    return ("# Extracted PDF Text\n\n" + txt) if txt.strip() else None
+
+
+def extract_markdown(
+    path: str, max_chars: Optional[int] = None, max_pages: Optional[int] = None, prioritize: bool = True
+) -> Optional[str]:
+    """Convert a PDF to markdown, stopping once `max_chars` have been produced.
+
+    Runs inside a worker process. Prefers pymupdf4llm, converting the sections
+    from `page_plan` first, and falls back to pdfminer text in page order. Both
+    stop at the budget instead of converting every page and truncating afterwards.
+    """
+    md: Optional[str] = None
+    try:
+        md = _extract_pymupdf(path, max_chars, max_pages, prioritize)
+    except Exception:
+        md = None
+    if not md:
+        try:
+            md = _extract_pdfminer(path, max_chars, max_pages)
+        except Exception:
+            md = None
+    return _truncate(md, max_chars) if md else None
+
+
+class PdfExtractor:
+    """Bounded process pool for PDF -> markdown conversion.
+
+    Extraction is CPU-bound and can take seconds per filing, so it runs off the
+    event loop in separate processes. Each document gets a timeout; on a timeout
+    the pool is retired (new documents go to a fresh pool) and its processes,
+    the stuck one included, are terminated once the other extractions already
+    running in it have finished, so concurrent analyses keep their results.
+    Results are cached on disk
+    by content hash, so the same filing fetched from another URL (or another
+    run) is not converted twice.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = 2,
+        timeout_seconds: float = 90.0,
+        cache_dir: Optional[str] = None,
+        max_pages: Optional[int] = None,
+        prioritize_sections: bool = True,
+    ) -> None:
+        self.max_workers = max(1, int(max_workers))
+        self.timeout = float(timeout_seconds) if timeout_seconds else None
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self.max_pages = int(max_pages) if max_pages else None
+        self.prioritize_sections = bool(prioritize_sections)
+        self._pool: Optional[ProcessPoolExecutor] = None
+        # Awaited extractions per pool; a retired pool is terminated when its count drops to 0
+        self._active: dict[ProcessPoolExecutor, int] = {}
+        # Concurrency slots per event loop (asyncio primitives cannot be shared across loops)
+        self._slots: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = (
+            weakref.WeakKeyDictionary()
+        )
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            # spawn: never fork a process that has event-loop and DB-pool threads
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return self._pool
+
+    def _retire_pool(self, pool: ProcessPoolExecutor) -> None:
+        """Send no more work to ``pool``; terminate it once nothing else is awaiting it."""
+        if self._pool is pool:
+            self._pool = None
+        if not self._active.get(pool):
+            self._active.pop(pool, None)
+            self._terminate(pool)
+
+    @staticmethod
+    def _terminate(pool: ProcessPoolExecutor) -> None:
+        try:
+            for proc in list((getattr(pool, "_processes", None) or {}).values()):
+                proc.terminate()
+        except Exception:
+            pass
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    # ---- content-hash cache -------------------------------------------------
+    def _cache_path(self, content_hash: str, max_chars: Optional[int]) -> Optional[Path]:
+        if not self.cache_dir or not content_hash:
+            return None
+        mode = "sections" if self.prioritize_sections else "pages"
+        return self.cache_dir / f"{content_hash}_{int(max_chars or 0)}_{mode}.md"
+
+    def _cache_read(self, path: Optional[Path]) -> Optional[str]:
+        if path is None or not path.exists():
+            return None
+        return path.read_text(encoding="utf-8")
+
+    def _cache_write(self, path: Optional[Path], md: str) -> None:
+        if path is None:
+            return
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(md, encoding="utf-8")
+        tmp.replace(path)
+
+    async def extract(self, pdf_path: str, content_hash: str = "", max_chars: Optional[int] = None) -> Optional[str]:
+        cache_path = self._cache_path(content_hash, max_chars)
+        try:
+            cached = await asyncio.to_thread(self._cache_read, cache_path)
+            if cached:
+                return cached
+        except Exception:
+            pass
+
+        loop = asyncio.get_running_loop()
+        slots = self._slots.get(loop)
+        if slots is None:
+            slots = self._slots[loop] = asyncio.Semaphore(self.max_workers)
+        async with slots:
+            pool = self._get_pool()
+            self._active[pool] = self._active.get(pool, 0) + 1
+            timed_out = False
+            try:
+                fut = loop.run_in_executor(
+                    pool, extract_markdown, str(pdf_path), max_chars, self.max_pages, self.prioritize_sections
+                )
+                md = await asyncio.wait_for(fut, timeout=self.timeout) if self.timeout else await fut
+            except asyncio.TimeoutError:
+                # The worker keeps running after the await is abandoned: retire its pool
+                timed_out = True
+                return None
+            except Exception:
+                return None
+            finally:
+                self._active[pool] -= 1
+                if timed_out or pool is not self._pool:
+                    self._retire_pool(pool)
+
+        if md:
+            try:
+                await asyncio.to_thread(self._cache_write, cache_path, md)
+            except Exception:
+                pass
+        return md
+
+
+_EXTRACTOR: Optional[PdfExtractor] = None
+
+
+def get_pdf_extractor(settings: Any = None) -> PdfExtractor:
+    """Process-wide extractor built from Settings on first use."""
+    global _EXTRACTOR
+    if _EXTRACTOR is None:
+        def _num(name: str, default):
+            try:
+                v = getattr(settings, name, None) if settings is not None else None
+                return type(default)(v) if v else default
+            except Exception:
+                return default
+
+        base = (getattr(settings, "sentiment_data_dir", None) if settings is not None else None) or "/tmp"
+        _EXTRACTOR = PdfExtractor(
+            max_workers=_num("sentiment_pdf_workers", 2),
+            timeout_seconds=_num("sentiment_pdf_timeout_seconds", 90.0),
+            cache_dir=str(Path(base) / "cache" / "pdf_markdown"),
+            max_pages=_num("sentiment_pdf_max_pages", 0) or None,
+            prioritize_sections=bool(getattr(settings, "sentiment_pdf_prioritize_sections", True)),
+        )
+    return _EXTRACTOR
@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+import asyncio
+import time
+import weakref
+from typing import Dict, Optional
+
+
+class ProviderRateLimiter:
+    """Async token-bucket limiter for one LLM provider.
+
+    Tracks two independent budgets that refill continuously over a minute:
+    - requests per minute (each `acquire` costs one request)
+    - tokens per minute (each `acquire` costs the caller's token estimate)
+
+    A limit of None/0 disables that budget. Waiters are served in FIFO order so
+    one large request cannot be starved by a stream of small ones. The budget
+    is process-wide; the lock that queues waiters is per event loop, so the
+    limiter stays usable when analyses run under successive `asyncio.run` calls.
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: Optional[int] = None,
+        tokens_per_minute: Optional[int] = None,
+    ) -> None:
+        self.rpm = int(requests_per_minute) if requests_per_minute and requests_per_minute > 0 else None
+        self.tpm = int(tokens_per_minute) if tokens_per_minute and tokens_per_minute > 0 else None
+        self._req_level = float(self.rpm or 0)
+        self._tok_level = float(self.tpm or 0)
+        self._updated = time.monotonic()
+        self._locks: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Lock]" = weakref.WeakKeyDictionary()
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.rpm or self.tpm)
+
+    def _lock(self) -> asyncio.Lock:
+        loop = asyncio.get_running_loop()
+        lock = self._locks.get(loop)
+        if lock is None:
+            lock = self._locks[loop] = asyncio.Lock()
+        return lock
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        elapsed = now - self._updated
+        self._updated = now
+        if self.rpm:
+            self._req_level = min(float(self.rpm), self._req_level + elapsed * self.rpm / 60.0)
+        if self.tpm:
+            self._tok_level = min(float(self.tpm), self._tok_level + elapsed * self.tpm / 60.0)
+
+    def _wait_needed(self, tokens: int) -> float:
+        wait = 0.0
+        if self.rpm and self._req_level < 1.0:
+            wait = max(wait, (1.0 - self._req_level) * 60.0 / self.rpm)
+        if self.tpm and self._tok_level < tokens:
+            wait = max(wait, (tokens - self._tok_level) * 60.0 / self.tpm)
+        return wait
+
+    async def acquire(self, tokens: int = 0) -> None:
+        """Wait until one request and `tokens` tokens fit in the budget, then spend them."""
+        if not self.enabled:
+            return
+        # Never ask for more than a full minute of budget or we would wait forever
+        tokens = max(0, int(tokens))
+        if self.tpm:
+            tokens = min(tokens, self.tpm)
+        async with self._lock():
+            while True:
+                self._refill()
+                wait = self._wait_needed(tokens)
+                if wait <= 0:
+                    break
+                await asyncio.sleep(wait)
+            if self.rpm:
+                self._req_level -= 1.0
+            if self.tpm:
+                self._tok_level -= tokens
+
+    def reconcile(self, estimated_tokens: int, actual_tokens: Optional[int]) -> None:
+        """Correct the token budget once the provider reports real usage.
+
+        Over-estimates are refunded; under-estimates push the level negative so
+        subsequent callers wait for the debt to be repaid.
+        """
+        if not self.tpm or actual_tokens is None:
+            return
+        try:
+            delta = int(actual_tokens) - int(estimated_tokens)
+        except Exception:
+            return
+        self._refill()
+        self._tok_level = min(float(self.tpm), self._tok_level - delta)
+
+
+_LIMITERS: Dict[str, ProviderRateLimiter] = {}
+
+
+def get_rate_limiter(
+    provider: str,
+    requests_per_minute: Optional[int] = None,
+    tokens_per_minute: Optional[int] = None,
+) -> ProviderRateLimiter:
+    """Return the process-wide limiter for `provider`, creating it on first use.
+
+    All concurrent analyses share the same limiter so the budget applies to the
+    whole process, not to each agent.
+    """
+    key = str(provider or "default").lower()
+    limiter = _LIMITERS.get(key)
+    if limiter is None:
+        limiter = ProviderRateLimiter(requests_per_minute, tokens_per_minute)
+        _LIMITERS[key] = limiter
+    return limiter
+
+
+def estimate_tokens(text: str | None) -> int:
+    """Cheap token estimate (~4 characters per token) for budgeting only."""
+    if not text:
+        return 0
+    return max(1, len(text) // 4)
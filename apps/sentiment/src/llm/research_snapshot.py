@@ -0,0 +1,246 @@
+"""Per-symbol research snapshots for incremental re-analysis.
+
+Catalyst scheduling re-analyzes a symbol several times around an event. After
+each successful analysis we keep a snapshot of what was learned: the prior
+report's conclusions and key facts, plus the documents the agents fetched
+(reference, tool-cache key and a capped excerpt of the content). The next
+analysis of that symbol starts from a brief built from the snapshot (prior
+conclusions, price move since, documents consulted with their excerpts) and is
+asked to research only what changed, instead of rebuilding everything from
+scratch. Agents may still refetch a document; repeat calls hit the tool cache.
+"""
+
+from __future__ import annotations
+
+import contextvars
+import hashlib
+import json
+import re
+from dataclasses import asdict, dataclass, field
+from datetime import date, datetime
+from pathlib import Path
+from typing import Any, Optional
+
+from .tool_cache import make_cache_key
+
+# Documents kept per snapshot (most recent first when trimming)
+MAX_DOCUMENTS = 200
+# Characters of each document's content kept as its excerpt
+EXCERPT_CHARS = 600
+
+# Report facts carried into the brief: key path in the Schema v2.0 report
+# (prompts/report_writer.md); the fact is named after the last key
+_FACT_KEYS = (
+    ("market_cap_usd",),
+    ("fundamental", "revenue_cagr_3y_pct"),
+    ("fundamental", "gross_margin_trend"),
+    ("fundamental", "net_margin_trend"),
+    ("fundamental", "free_cash_flow_trend"),
+    ("fundamental", "insider_activity"),
+    ("fundamental", "valuation_vs_peers", "pe_forward"),
+    ("fundamental", "valuation_vs_peers", "ev_ebitda_forward"),
+    ("sentiment", "short_interest_pct_float"),
+    ("sentiment", "news_sentiment_30d"),
+)
+
+
+def _lookup(report: dict[str, Any], path: tuple[str, ...]) -> Any:
+    value: Any = report
+    for key in path:
+        if not isinstance(value, dict):
+            return None
+        value = value.get(key)
+    return value
+
+_CURRENT: contextvars.ContextVar[Optional["ResearchLog"]] = contextvars.ContextVar(
+    "sentiment_research_log", default=None
+)
+
+
+def _doc_title(text: str) -> str:
+    for line in (text or "").splitlines():
+        line = re.sub(r"[#*`>\s]+", " ", line).strip()
+        if line:
+            return line[:120]
+    return ""
+
+
+class ResearchLog:
+    """Documents returned by tools during one analysis (deduplicated by call)."""
+
+    def __init__(self) -> None:
+        self.documents: dict[str, dict[str, Any]] = {}
+
+    def record(self, tool: str, args: Optional[dict[str, Any]], text: str) -> None:
+        if not text or not text.strip():
+            return
+        key = make_cache_key(tool, args)
+        if key in self.documents:
+            return
+        url = next((v for k, v in (args or {}).items() if k in ("url", "uri", "href") and isinstance(v, str)), None)
+        query = next((v for k, v in (args or {}).items() if k in ("query", "q", "search") and isinstance(v, str)), None)
+        self.documents[key] = {
+            "tool": tool,
+            "url": url,
+            "query": query,
+            "title": _doc_title(text),
+            "sha256": hashlib.sha256(text.encode("utf-8")).hexdigest(),
+            "chars": len(text),
+            "cache_key": key,
+            "excerpt": " ".join(text.split())[:EXCERPT_CHARS],
+            "seen_at": datetime.now().isoformat(timespec="seconds"),
+        }
+
+
+def start_research_log() -> ResearchLog:
+    log = ResearchLog()
+    _CURRENT.set(log)
+    return log
+
+
+def current_research_log() -> Optional[ResearchLog]:
+    return _CURRENT.get()
+
+
+@dataclass
+class ResearchSnapshot:
+    symbol: str
+    taken_at: str
+    as_of_date: Optional[str] = None
+    analysis_id: Optional[str] = None
+    conclusions: dict[str, Any] = field(default_factory=dict)
+    facts: dict[str, Any] = field(default_factory=dict)
+    documents: list[dict[str, Any]] = field(default_factory=list)
+
+    @classmethod
+    def from_report(
+        cls,
+        symbol: str,
+        report: dict[str, Any],
+        analysis_id: Optional[str] = None,
+        documents: Optional[list[dict[str, Any]]] = None,
+        previous: Optional["ResearchSnapshot"] = None,
+    ) -> "ResearchSnapshot":
+        catalysts = []
+        for horizon, items in (report.get("catalysts") or {}).items():
+            for c in items or []:
+                if isinstance(c, dict) and c.get("title"):
+                    catalysts.append({"horizon": horizon, "title": c.get("title"), "expected_date": c.get("expected_date")})
+        conclusions = {
+            "overall_rating": report.get("overall_rating"),
+            "confidence": report.get("confidence"),
+            "recommendation_timeframe": report.get("recommendation_timeframe"),
+            "analyst_summary": report.get("analyst_summary"),
+            "catalysts": catalysts,
+            "scenario_price_targets": report.get("scenario_price_targets"),
+            "headline_risks": _lookup(report, ("analyst_summary", "headline_risks")),
+        }
+        facts: dict[str, Any] = {}
+        for path in _FACT_KEYS:
+            value = _lookup(report, path)
+            if value is not None:
+                facts[path[-1]] = value
+        # Keep documents from earlier runs too; newest first, bounded
+        docs = list(documents or [])
+        seen = {d.get("sha256") for d in docs}
+        for d in (previous.documents if previous else []):
+            if d.get("sha256") not in seen:
+                docs.append(d)
+                seen.add(d.get("sha256"))
+        return cls(
+            symbol=symbol.upper(),
+            taken_at=datetime.now().isoformat(timespec="seconds"),
+            as_of_date=report.get("as_of_date"),
+            analysis_id=str(analysis_id) if analysis_id else None,
+            conclusions={k: v for k, v in conclusions.items() if v},
+            facts=facts,
+            documents=docs[:MAX_DOCUMENTS],
+        )
+
+    @property
+    def taken_date(self) -> date:
+        return datetime.fromisoformat(self.taken_at).date()
+
+    def brief(
+        self,
+        today: Optional[date] = None,
+        price_then: Optional[float] = None,
+        price_now: Optional[float] = None,
+        max_documents: int = 40,
+        max_excerpt_chars: int = 6000,
+    ) -> str:
+        """Prompt section describing the prior run and asking for the delta only."""
+        today = today or datetime.now().date()
+        since = self.taken_date
+        lines = [
+            f"## Prior research for {self.symbol} (analysis of {since.isoformat()}, {(today - since).days} days ago)",
+        ]
+        c = self.conclusions
+        if c:
+            head = ", ".join(f"{k}={c[k]}" for k in ("overall_rating", "confidence", "recommendation_timeframe") if c.get(k))
+            if head:
+                lines.append(f"Prior conclusions: {head}")
+            if c.get("analyst_summary"):
+                lines.append(f"Prior summary: {json.dumps(c['analyst_summary'], ensure_ascii=False, default=str)[:1500]}")
+            for cat in c.get("catalysts", [])[:10]:
+                lines.append(f"- Catalyst ({cat.get('horizon')}): {cat.get('title')} expected {cat.get('expected_date') or 'n/a'}")
+            if c.get("headline_risks"):
+                lines.append(f"Prior headline risks: {json.dumps(c['headline_risks'], ensure_ascii=False, default=str)[:600]}")
+        if self.facts:
+            lines.append("Key facts then: " + ", ".join(f"{k}={v}" for k, v in self.facts.items()))
+        if price_then and price_now:
+            move = (float(price_now) / float(price_then) - 1.0) * 100.0
+            lines.append(f"Price move since then: {move:+.1f}% (close {float(price_then):.2f} -> {float(price_now):.2f})")
+        if self.documents:
+            lines.append(
+                "Documents previously consulted, with key excerpts (fetch again if you need more detail; "
+                "repeat fetches are served from the tool cache):"
+            )
+            budget = max(int(max_excerpt_chars), 0)
+            for d in self.documents[:max_documents]:
+                ref = d.get("url") or (f"search: {d['query']}" if d.get("query") else d.get("tool"))
+                lines.append(f"- {ref} — {d.get('title', '')}")
+                excerpt = (d.get("excerpt") or "")[:budget]
+                if excerpt:
+                    lines.append(f"  > {excerpt}")
+                    budget -= len(excerpt)
+        lines.append(
+            f"Research only what changed since {since.isoformat()}: filings (8-K/10-Q/10-K) and headlines dated after "
+            "that, the current price and volume, and whether the catalysts above played out. Carry forward prior "
+            "conclusions and facts that are unchanged, and say which ones you revised."
+        )
+        return "\n".join(lines)
+
+
+class ResearchSnapshotStore:
+    """One JSON snapshot per symbol under `base_dir`."""
+
+    def __init__(self, base_dir: str, max_age_days: int = 30) -> None:
+        self.base_dir = Path(base_dir)
+        self.max_age_days = int(max_age_days)
+
+    def _path(self, symbol: str) -> Path:
+        safe = re.sub(r"[^A-Z0-9._-]", "_", symbol.upper())
+        return self.base_dir / f"{safe}.json"
+
+    def load(self, symbol: str, today: Optional[date] = None) -> Optional[ResearchSnapshot]:
+        """Latest snapshot for `symbol`, or None if missing, unreadable or too old."""
+        path = self._path(symbol)
+        if not path.exists():
+            return None
+        try:
+            snap = ResearchSnapshot(**json.loads(path.read_text(encoding="utf-8")))
+        except Exception:
+            return None
+        today = today or datetime.now().date()
+        if self.max_age_days and (today - snap.taken_date).days > self.max_age_days:
+            return None
+        return snap
+
+    def save(self, snapshot: ResearchSnapshot) -> Path:
+        path = self._path(snapshot.symbol)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(asdict(snapshot), ensure_ascii=False, default=str, indent=2), encoding="utf-8")
+        tmp.replace(path)
+        return path
@@ -0,0 +1,277 @@
+"""Streamed consumption of OpenAI Responses for the GPT-5 planner.
+
+With streaming on, `responses.create(stream=True)` events are consumed as they
+arrive instead of waiting for the complete response:
+
+- a function call is dispatched to its MCP tool as soon as its output item is
+  done, while the model is still producing the rest of the turn;
+- JSON in the output text is syntax-checked chunk by chunk, so a malformed
+  report is reported at the offending character rather than after the full
+  response and a failed regex parse, and the caller can abandon the stream
+  there (`MalformedOutputError`) and ask for a corrected answer;
+- report writes are checked against the report schema before they reach disk.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import inspect
+import json
+import re
+from typing import Any, Awaitable, Callable, Iterable, Optional
+
+# Top-level report fields the DB insert cannot do without, and the expected
+# container types of the optional sections (see prompts/report_writer.md)
+REPORT_REQUIRED: dict[str, type] = {
+    "as_of_date": str,
+    "ticker": str,
+    "fundamental": dict,
+    "macro_sensitivity": dict,
+    "sentiment": dict,
+}
+REPORT_OPTIONAL: dict[str, type] = {
+    "peer_analysis": list,
+    "factor_scores": dict,
+    "analyst_summary": dict,
+    "catalysts": dict,
+    "scenario_price_targets": dict,
+    "data_gaps": list,
+}
+
+_FENCE_RE = re.compile(r"(?:'''|```)json\s*")
+_DATE_RE = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+# Characters allowed outside strings: structure, numbers and true/false/null
+_BARE_CHARS = set(" \t\r\n,:{}[]0123456789+-.eEtrufalsn")
+_CLOSERS = {"}": "{", "]": "["}
+
+
+class StreamError(RuntimeError):
+    """The response stream failed or ended without a final response."""
+
+
+class MalformedOutputError(StreamError):
+    """Streamed output failed JSON validation; the rest of the stream was abandoned."""
+
+
+def validate_report(data: Any) -> list[str]:
+    """Schema problems that would make a report unusable; empty when it is valid."""
+    if not isinstance(data, dict):
+        return ["report must be a JSON object"]
+    errors: list[str] = []
+    for key, typ in REPORT_REQUIRED.items():
+        if key not in data or data[key] is None:
+            errors.append(f"missing required field '{key}'")
+        elif not isinstance(data[key], typ):
+            errors.append(f"'{key}' must be {typ.__name__}")
+    for key, typ in REPORT_OPTIONAL.items():
+        if data.get(key) is not None and not isinstance(data[key], typ):
+            errors.append(f"'{key}' must be {typ.__name__}")
+    as_of = data.get("as_of_date")
+    if isinstance(as_of, str) and not _DATE_RE.match(as_of):
+        errors.append("'as_of_date' must be YYYY-MM-DD")
+    return errors
+
+
+class JsonStreamValidator:
+    """Incremental syntax check of one JSON document arriving in chunks.
+
+    The document starts at a '''json / ```json fence or at a leading '{'.
+    Bracket nesting, strings and bare tokens are tracked per character, so a
+    mismatched bracket or stray text is flagged as soon as it streams in. When
+    the outermost value closes, the document is parsed and passed to `schema`.
+    `on_error` is called once, from `feed`, as soon as a problem is found.
+    """
+
+    def __init__(
+        self,
+        schema: Optional[Callable[[Any], list[str]]] = None,
+        on_error: Optional[Callable[[str], None]] = None,
+    ) -> None:
+        self.schema = schema
+        self.on_error = on_error
+        self.started = False
+        self.done = False
+        self.error: Optional[str] = None
+        self.document = ""
+        self.data: Any = None
+        self._pending = ""
+        self._stack: list[str] = []
+        self._in_string = False
+        self._escape = False
+        self._offset = 0
+
+    def feed(self, chunk: str) -> None:
+        if self.done or self.error or not chunk:
+            return
+        self._feed(chunk)
+        if self.error and self.on_error is not None:
+            self.on_error(self.error)
+
+    def _feed(self, chunk: str) -> None:
+        if not self.started:
+            self._pending += chunk
+            m = _FENCE_RE.search(self._pending)
+            if m:
+                chunk = self._pending[m.end():]
+            elif self._pending.lstrip().startswith("{"):
+                chunk = self._pending.lstrip()
+            else:
+                # Keep only enough to recognise a fence split across chunks
+                self._pending = self._pending[-16:]
+                return
+            self.started = True
+            self._pending = ""
+        for i, ch in enumerate(chunk):
+            if self._scan(ch):
+                self.document += chunk[: i + 1]
+                self._finish()
+                return
+            if self.error:
+                return
+        self.document += chunk
+
+    def _scan(self, ch: str) -> bool:
+        """Advance one character; True when the outermost value just closed."""
+        offset = self._offset
+        self._offset += 1
+        if self._in_string:
+            if self._escape:
+                self._escape = False
+            elif ch == "\\":
+                self._escape = True
+            elif ch == '"':
+                self._in_string = False
+            return False
+        if ch == '"':
+            self._in_string = True
+            return False
+        if not self._stack and not ch.isspace() and ch != "{" and ch != "[":
+            self.error = f"expected '{{' at offset {offset}, got {ch!r}"
+            return False
+        if ch in "{[":
+            self._stack.append(ch)
+        elif ch in _CLOSERS:
+            if not self._stack or self._stack[-1] != _CLOSERS[ch]:
+                self.error = f"unexpected {ch!r} at offset {offset}"
+                return False
+            self._stack.pop()
+            return not self._stack
+        elif ch not in _BARE_CHARS:
+            self.error = f"unexpected {ch!r} at offset {offset}"
+        return False
+
+    def _finish(self) -> None:
+        self.done = True
+        try:
+            self.data = json.loads(self.document)
+        except Exception as e:
+            self.error = f"invalid JSON: {e}"
+            return
+        if self.schema is not None:
+            problems = self.schema(self.data)
+            if problems:
+                self.error = "; ".join(problems)
+
+
+def report_write_errors(args: Any) -> list[str]:
+    """Problems with the report JSON inside a filesystem write call's `content`."""
+    content = args.get("content") if isinstance(args, dict) else None
+    if not isinstance(content, str):
+        return []
+    m = _FENCE_RE.search(content)
+    if not m:
+        return ["content must contain the report wrapped in '''json ... ''' markers"]
+    validator = JsonStreamValidator(schema=validate_report)
+    validator.feed(content[m.start():])
+    if validator.error:
+        return [validator.error]
+    if not validator.done:
+        return ["report JSON is incomplete (unbalanced braces)"]
+    return []
+
+
+class CallDispatcher:
+    """Starts tool calls as soon as they are known; identical calls share one execution.
+
+    `collect(items)` flattens output items into (call_id, name, args) tuples and
+    `execute(call_id, name, args)` runs one call. Calls submitted from the stream
+    are already running when the turn completes; `futures_for` reuses them and
+    starts whatever was not seen early, in the order the model emitted the calls.
+    """
+
+    def __init__(
+        self,
+        execute: Callable[[str, str, Any], Awaitable[dict[str, Any]]],
+        collect: Callable[[list[Any]], list[tuple[str, str, Any]]],
+    ) -> None:
+        self._execute = execute
+        self._collect = collect
+        self._shared: dict[str, asyncio.Future] = {}
+        self.early = 0
+
+    @staticmethod
+    def _key(call_id: str, name: str, args: Any) -> str:
+        try:
+            return f"{name}:{json.dumps(args, sort_keys=True, ensure_ascii=False, default=str)}"
+        except Exception:
+            return f"{name}:{call_id}"
+
+    def submit(self, call_id: str, name: str, args: Any) -> asyncio.Future:
+        key = self._key(call_id, name, args)
+        fut = self._shared.get(key)
+        if fut is None:
+            fut = asyncio.ensure_future(self._execute(call_id, name, args))
+            self._shared[key] = fut
+        return fut
+
+    def on_output_item(self, item: Any) -> None:
+        """Stream hook: dispatch the calls in a completed output item."""
+        for call_id, name, args in self._collect([item]):
+            if self._key(call_id, name, args) not in self._shared:
+                self.early += 1
+            self.submit(call_id, name, args)
+
+    def futures_for(self, calls: Iterable[tuple[str, str, Any]]) -> list[asyncio.Future]:
+        return [self.submit(call_id, name, args) for call_id, name, args in calls]
+
+    def cancel(self) -> None:
+        for fut in self._shared.values():
+            if not fut.done():
+                fut.cancel()
+
+
+async def consume_response_stream(
+    events: Any,
+    on_output_item: Optional[Callable[[Any], None]] = None,
+    on_text_delta: Optional[Callable[[str], None]] = None,
+) -> Any:
+    """Drain a Responses event stream and return the final response object.
+
+    An exception from a callback (e.g. `MalformedOutputError`) stops consuming
+    and closes the stream, so the rest of the response is not downloaded.
+    """
+    final = None
+    try:
+        async for event in events:
+            etype = getattr(event, "type", "")
+            if etype == "response.output_item.done":
+                item = getattr(event, "item", None)
+                if on_output_item is not None and getattr(item, "type", "") == "function_call":
+                    on_output_item(item)
+            elif etype == "response.output_text.delta":
+                if on_text_delta is not None:
+                    on_text_delta(getattr(event, "delta", "") or "")
+            elif etype in ("response.completed", "response.incomplete", "response.failed"):
+                final = getattr(event, "response", None)
+            elif etype == "error":
+                raise StreamError(str(getattr(event, "message", None) or "response stream error"))
+    except BaseException:
+        close = getattr(events, "close", None) or getattr(events, "aclose", None)
+        if close is not None:
+            result = close()
+            if inspect.isawaitable(result):
+                await result
+        raise
+    if final is None:
+        raise StreamError("response stream ended without a final response")
+    return final
@@ -0,0 +1,184 @@
+"""Per-analysis telemetry for the sentiment service.
+
+One `AnalysisTelemetry` is started per analysis and carried in a context
+variable, so every LLM wrapper and tool call made on behalf of that analysis
+(including from child tasks) adds to the same record without threading it
+through the orchestrator. When the analysis ends the record is written to
+rankalpha.fact_ai_analysis_telemetry and appended to a JSONL file.
+"""
+
+from __future__ import annotations
+
+import contextvars
+import json
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Optional
+
+_CURRENT: contextvars.ContextVar[Optional["AnalysisTelemetry"]] = contextvars.ContextVar(
+    "sentiment_analysis_telemetry", default=None
+)
+
+
+def _usage_value(usage: Any, *path: str) -> int:
+    cur = usage
+    for name in path:
+        cur = cur.get(name) if isinstance(cur, dict) else getattr(cur, name, None)
+        if cur is None:
+            return 0
+    try:
+        return int(cur)
+    except Exception:
+        return 0
+
+
+class AnalysisTelemetry:
+    """Latency, token, tool and cache counters for one analysis."""
+
+    def __init__(self, run_id: str) -> None:
+        self.run_id = run_id
+        self.started_at = datetime.now(timezone.utc)
+        self._t0 = time.monotonic()
+        self._lock = threading.Lock()
+        self.analysis_id: Optional[str] = None
+        self.success: Optional[bool] = None
+        self.wall_seconds: Optional[float] = None
+        self.steps: dict[str, dict[str, float]] = {}
+        self.openai = {"calls": 0, "seconds": 0.0, "input_tokens": 0, "output_tokens": 0, "reasoning_tokens": 0}
+        self.tools: dict[str, dict[str, float]] = {}
+        self.cache = {"hits": 0, "misses": 0}
+        self.pdf = {"extractions": 0, "seconds": 0.0}
+
+    def record_step(self, agent: str, seconds: float) -> None:
+        with self._lock:
+            step = self.steps.setdefault(agent or "unknown", {"calls": 0, "seconds": 0.0})
+            step["calls"] += 1
+            step["seconds"] += seconds
+
+    def record_malformed_output(self, agent: str) -> None:
+        """Streamed output from `agent` failed JSON validation (counted in its step)."""
+        with self._lock:
+            step = self.steps.setdefault(agent or "unknown", {"calls": 0, "seconds": 0.0})
+            step["malformed_outputs"] = step.get("malformed_outputs", 0) + 1
+
+    def record_openai(self, seconds: float, response: Any = None) -> None:
+        usage = getattr(response, "usage", None) if response is not None else None
+        with self._lock:
+            self.openai["calls"] += 1
+            self.openai["seconds"] += seconds
+            self.openai["input_tokens"] += _usage_value(usage, "input_tokens")
+            self.openai["output_tokens"] += _usage_value(usage, "output_tokens")
+            self.openai["reasoning_tokens"] += _usage_value(usage, "output_tokens_details", "reasoning_tokens")
+
+    def record_tool(self, server: str, seconds: float, error: bool = False) -> None:
+        with self._lock:
+            t = self.tools.setdefault(server or "default", {"calls": 0, "errors": 0, "seconds": 0.0, "max_seconds": 0.0})
+            t["calls"] += 1
+            t["errors"] += int(bool(error))
+            t["seconds"] += seconds
+            t["max_seconds"] = max(t["max_seconds"], seconds)
+
+    def record_cache(self, hit: bool) -> None:
+        with self._lock:
+            self.cache["hits" if hit else "misses"] += 1
+
+    def record_pdf(self, seconds: float) -> None:
+        with self._lock:
+            self.pdf["extractions"] += 1
+            self.pdf["seconds"] += seconds
+
+    def finish(self, success: bool, analysis_id: Optional[str] = None) -> None:
+        self.success = bool(success)
+        if analysis_id:
+            self.analysis_id = str(analysis_id)
+        self.wall_seconds = time.monotonic() - self._t0
+
+    def to_dict(self) -> dict[str, Any]:
+        lookups = self.cache["hits"] + self.cache["misses"]
+        with self._lock:
+            return {
+                "run_id": self.run_id,
+                "analysis_id": self.analysis_id,
+                "success": self.success,
+                "started_at": self.started_at.isoformat(),
+                "wall_seconds": round(self.wall_seconds if self.wall_seconds is not None else time.monotonic() - self._t0, 3),
+                "openai": {k: round(v, 3) if isinstance(v, float) else v for k, v in self.openai.items()},
+                "steps": {k: {kk: round(vv, 3) for kk, vv in v.items()} for k, v in self.steps.items()},
+                "tools": {k: {kk: round(vv, 3) for kk, vv in v.items()} for k, v in self.tools.items()},
+                "cache": {**self.cache, "hit_ratio": round(self.cache["hits"] / lookups, 4) if lookups else 0.0},
+                "pdf": {k: round(v, 3) if isinstance(v, float) else v for k, v in self.pdf.items()},
+            }
+
+    def summary(self) -> str:
+        d = self.to_dict()
+        steps = ", ".join(f"{k}={v['seconds']:.1f}s" for k, v in sorted(d["steps"].items(), key=lambda kv: -kv[1]["seconds"]))
+        tools = ", ".join(f"{k}={v['calls']:.0f}/{v['seconds']:.1f}s" for k, v in sorted(d["tools"].items()))
+        o = d["openai"]
+        return (
+            f"Telemetry {self.run_id}: wall={d['wall_seconds']:.1f}s steps[{steps}] "
+            f"openai calls={o['calls']} {o['seconds']:.1f}s tokens in/out/reasoning={o['input_tokens']}/"
+            f"{o['output_tokens']}/{o['reasoning_tokens']} tools[{tools}] "
+            f"cache_hit_ratio={d['cache']['hit_ratio']:.0%} pdf={d['pdf']['extractions']}/{d['pdf']['seconds']:.1f}s"
+        )
+
+
+def start_telemetry(run_id: str) -> AnalysisTelemetry:
+    """Begin telemetry for the analysis running in the current task."""
+    telemetry = AnalysisTelemetry(run_id)
+    _CURRENT.set(telemetry)
+    return telemetry
+
+
+def current_telemetry() -> Optional[AnalysisTelemetry]:
+    return _CURRENT.get()
+
+
+_JSONL_LOCK = threading.Lock()
+
+
+def append_jsonl(path: str, record: dict[str, Any]) -> None:
+    p = Path(path)
+    p.parent.mkdir(parents=True, exist_ok=True)
+    line = json.dumps(record, ensure_ascii=False, default=str)
+    with _JSONL_LOCK:
+        with p.open("a", encoding="utf-8") as f:
+            f.write(line + "\n")
+
+
+def insert_telemetry(cur, record: dict[str, Any]) -> None:
+    """Insert one telemetry record on the caller's cursor."""
+    o = record["openai"]
+    tools = record["tools"].values()
+    cur.execute(
+        """
+        INSERT INTO rankalpha.fact_ai_analysis_telemetry (
+            analysis_id, run_id, success, started_at, wall_seconds,
+            openai_calls, openai_seconds, input_tokens, output_tokens, reasoning_tokens,
+            tool_calls, tool_errors, tool_seconds, cache_hits, cache_misses,
+            pdf_extractions, pdf_seconds, steps, tools
+        ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s::jsonb, %s::jsonb)
+        """,
+        (
+            record["analysis_id"],
+            record["run_id"],
+            record["success"],
+            record["started_at"],
+            record["wall_seconds"],
+            o["calls"],
+            o["seconds"],
+            o["input_tokens"],
+            o["output_tokens"],
+            o["reasoning_tokens"],
+            int(sum(t["calls"] for t in tools)),
+            int(sum(t["errors"] for t in tools)),
+            round(sum(t["seconds"] for t in tools), 3),
+            record["cache"]["hits"],
+            record["cache"]["misses"],
+            record["pdf"]["extractions"],
+            record["pdf"]["seconds"],
+            json.dumps(record["steps"]),
+            json.dumps(record["tools"]),
+        ),
+    )
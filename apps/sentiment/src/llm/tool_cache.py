@@ -0,0 +1,300 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+# Arguments that change how a tool runs but not what it returns
+_RUNTIME_ARGS = {"timeout", "debug"}
+
+_REDIS_PREFIX = "sentiment:tool_cache:"
+
+
+def make_cache_key(tool: str, args: Optional[dict[str, Any]]) -> str:
+    """Content address for a tool call: `tool:sha256(canonical args)`."""
+    clean = {k: v for k, v in (args or {}).items() if k not in _RUNTIME_ARGS}
+    canonical = json.dumps(clean, sort_keys=True, ensure_ascii=False, separators=(",", ":"), default=str)
+    digest = hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+    return f"{str(tool or '').strip()}:{digest}"
+
+
+def _call_url(args: Optional[dict[str, Any]]) -> str:
+    for k in ("url", "uri", "href"):
+        v = (args or {}).get(k)
+        if isinstance(v, str):
+            return v.lower()
+    return ""
+
+
+class ToolResultCache:
+    """Tiered cache for MCP tool results shared by every LLM in the process.
+
+    Lookups go memory -> SQLite -> Redis and promote hits into the faster tiers.
+    - memory: LRU of encoded payloads, bounded by their size; each hit decodes
+      a fresh dict, so callers cannot mutate what later hits return
+    - SQLite: survives restarts; compressed payloads, trimmed oldest-access first
+    - Redis: optional, shared across processes/containers
+
+    TTLs are chosen per tool: search-like tools go stale quickly, while EDGAR
+    filings and PDFs are effectively immutable. Error results are never cached.
+    """
+
+    def __init__(
+        self,
+        default_ttl: int = 86400,
+        search_ttl: int = 3600,
+        filing_ttl: int = 30 * 86400,
+        memory_max_bytes: int = 64 * 1024 * 1024,
+        disk_path: Optional[str] = None,
+        disk_max_bytes: int = 1024 * 1024 * 1024,
+        redis_client: Any = None,
+    ) -> None:
+        self.default_ttl = int(default_ttl)
+        self.search_ttl = int(search_ttl)
+        self.filing_ttl = int(filing_ttl)
+        self.memory_max_bytes = int(memory_max_bytes)
+        self.disk_max_bytes = int(disk_max_bytes)
+        self.redis = redis_client
+        self._mem: "OrderedDict[str, tuple[float, bytes]]" = OrderedDict()
+        self._mem_bytes = 0
+        self._db: Optional[sqlite3.Connection] = None
+        self._db_lock = threading.Lock()
+        self._disk_writes = 0
+        self.stats: Dict[str, int] = {
+            "hits_memory": 0,
+            "hits_disk": 0,
+            "hits_redis": 0,
+            "misses": 0,
+            "sets": 0,
+            "evictions_memory": 0,
+            "evictions_disk": 0,
+            "bytes_served": 0,
+        }
+        if disk_path:
+            try:
+                self._open_disk(Path(disk_path))
+            except Exception:
+                self._db = None
+
+    # ---- TTL policy --------------------------------------------------------
+    def ttl_for(self, tool: str, args: Optional[dict[str, Any]] = None) -> int:
+        name = str(tool or "").lower()
+        url = _call_url(args)
+        if any(s in name for s in ("edgar", "filing", "sec_")) or "sec.gov" in url or ".pdf" in url:
+            return self.filing_ttl
+        if any(s in name for s in ("search", "news", "quote", "price")):
+            return self.search_ttl
+        return self.default_ttl
+
+    # ---- memory tier -------------------------------------------------------
+    def _mem_get(self, key: str) -> Optional[bytes]:
+        entry = self._mem.get(key)
+        if entry is None:
+            return None
+        expires, encoded = entry
+        if expires < time.time():
+            self._mem_pop(key)
+            return None
+        self._mem.move_to_end(key)
+        return encoded
+
+    def _mem_pop(self, key: str) -> None:
+        entry = self._mem.pop(key, None)
+        if entry is not None:
+            self._mem_bytes -= len(entry[1])
+
+    def _mem_put(self, key: str, encoded: bytes, expires: float) -> None:
+        if len(encoded) > self.memory_max_bytes:
+            return
+        self._mem_pop(key)
+        self._mem[key] = (expires, encoded)
+        self._mem_bytes += len(encoded)
+        while self._mem_bytes > self.memory_max_bytes and self._mem:
+            _k, (_e, evicted) = self._mem.popitem(last=False)
+            self._mem_bytes -= len(evicted)
+            self.stats["evictions_memory"] += 1
+
+    # ---- disk tier (SQLite) ------------------------------------------------
+    def _open_disk(self, path: Path) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        db = sqlite3.connect(str(path), check_same_thread=False, timeout=10)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=NORMAL")
+        db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS tool_cache (
+                key TEXT PRIMARY KEY,
+                payload BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                expires REAL NOT NULL,
+                accessed REAL NOT NULL
+            )
+            """
+        )
+        db.execute("CREATE INDEX IF NOT EXISTS tool_cache_accessed ON tool_cache (accessed)")
+        db.commit()
+        self._db = db
+
+    def _disk_get(self, key: str) -> Optional[tuple[bytes, float]]:
+        if self._db is None:
+            return None
+        now = time.time()
+        with self._db_lock:
+            row = self._db.execute("SELECT payload, expires FROM tool_cache WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            if row[1] < now:
+                self._db.execute("DELETE FROM tool_cache WHERE key = ?", (key,))
+                self._db.commit()
+                return None
+            self._db.execute("UPDATE tool_cache SET accessed = ? WHERE key = ?", (now, key))
+            self._db.commit()
+        return zlib.decompress(row[0]), float(row[1])
+
+    def _disk_put(self, key: str, encoded: bytes, expires: float) -> None:
+        if self._db is None:
+            return
+        blob = zlib.compress(encoded, 6)
+        now = time.time()
+        with self._db_lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO tool_cache (key, payload, size, expires, accessed) VALUES (?, ?, ?, ?, ?)",
+                (key, blob, len(blob), expires, now),
+            )
+            self._db.commit()
+            self._disk_writes += 1
+            if self._disk_writes % 50 == 0:
+                self._trim_disk_locked(now)
+
+    def _trim_disk_locked(self, now: float) -> None:
+        assert self._db is not None
+        cur = self._db.execute("DELETE FROM tool_cache WHERE expires < ?", (now,))
+        self.stats["evictions_disk"] += max(cur.rowcount, 0)
+        total = int(self._db.execute("SELECT COALESCE(SUM(size), 0) FROM tool_cache").fetchone()[0])
+        if total > self.disk_max_bytes:
+            # Drop least recently used rows until ~10% under the cap
+            target = int(self.disk_max_bytes * 0.9)
+            for key, size in self._db.execute("SELECT key, size FROM tool_cache ORDER BY accessed ASC").fetchall():
+                if total <= target:
+                    break
+                self._db.execute("DELETE FROM tool_cache WHERE key = ?", (key,))
+                total -= int(size)
+                self.stats["evictions_disk"] += 1
+        self._db.commit()
+
+    # ---- public API ----------------------------------------------------------
+    async def get(self, tool: str, args: Optional[dict[str, Any]]) -> Optional[dict[str, Any]]:
+        key = make_cache_key(tool, args)
+        encoded = self._mem_get(key)
+        if encoded is not None:
+            self.stats["hits_memory"] += 1
+            self.stats["bytes_served"] += len(encoded)
+            return json.loads(encoded)
+        try:
+            found = await asyncio.to_thread(self._disk_get, key)
+        except Exception:
+            found = None
+        if found is not None:
+            encoded, expires = found
+            self._mem_put(key, encoded, expires)
+            self.stats["hits_disk"] += 1
+            self.stats["bytes_served"] += len(encoded)
+            return json.loads(encoded)
+        if self.redis is not None:
+            try:
+                val = await self.redis.get(_REDIS_PREFIX + key)
+                if val:
+                    payload = json.loads(val)
+                    ttl = await self.redis.ttl(_REDIS_PREFIX + key)
+                    expires = time.time() + (ttl if isinstance(ttl, int) and ttl > 0 else self.ttl_for(tool, args))
+                    encoded = val.encode("utf-8") if isinstance(val, str) else bytes(val)
+                    self._mem_put(key, encoded, expires)
+                    await asyncio.to_thread(self._disk_put, key, encoded, expires)
+                    self.stats["hits_redis"] += 1
+                    self.stats["bytes_served"] += len(encoded)
+                    return payload
+            except Exception:
+                pass
+        self.stats["misses"] += 1
+        return None
+
+    async def set(self, tool: str, args: Optional[dict[str, Any]], payload: dict[str, Any]) -> None:
+        if not isinstance(payload, dict) or payload.get("isError"):
+            return
+        key = make_cache_key(tool, args)
+        ttl = self.ttl_for(tool, args)
+        expires = time.time() + ttl
+        text = json.dumps(payload, ensure_ascii=False)
+        encoded = text.encode("utf-8")
+        self._mem_put(key, encoded, expires)
+        self.stats["sets"] += 1
+        try:
+            await asyncio.to_thread(self._disk_put, key, encoded, expires)
+        except Exception:
+            pass
+        if self.redis is not None:
+            try:
+                await self.redis.setex(_REDIS_PREFIX + key, ttl, text)
+            except Exception:
+                pass
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Counters plus current tier sizes, for logging/metrics export."""
+        out: Dict[str, Any] = dict(self.stats)
+        hits = out["hits_memory"] + out["hits_disk"] + out["hits_redis"]
+        lookups = hits + out["misses"]
+        out["hit_ratio"] = round(hits / lookups, 4) if lookups else 0.0
+        out["memory_entries"] = len(self._mem)
+        out["memory_bytes"] = self._mem_bytes
+        if self._db is not None:
+            try:
+                with self._db_lock:
+                    n, b = self._db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM tool_cache").fetchone()
+                out["disk_entries"], out["disk_bytes"] = int(n), int(b)
+            except Exception:
+                pass
+        return out
+
+
+_CACHE: Optional[ToolResultCache] = None
+
+
+def get_tool_cache(settings: Any = None, redis_client: Any = None) -> ToolResultCache:
+    """Process-wide tool cache built from Settings on first use."""
+    global _CACHE
+    if _CACHE is None:
+        def _int(name: str, default: int) -> int:
+            try:
+                v = getattr(settings, name, None) if settings is not None else None
+                return int(v) if v else default
+            except Exception:
+                return default
+
+        disk_path = getattr(settings, "sentiment_tool_cache_path", None) if settings is not None else None
+        if not disk_path:
+            base = (getattr(settings, "sentiment_data_dir", None) if settings is not None else None) or "/tmp"
+            disk_path = str(Path(base) / "cache" / "tool_cache.sqlite")
+        _CACHE = ToolResultCache(
+            default_ttl=_int("sentiment_tool_cache_ttl_seconds", 86400),
+            search_ttl=_int("sentiment_tool_cache_search_ttl_seconds", 3600),
+            filing_ttl=_int("sentiment_tool_cache_filing_ttl_seconds", 30 * 86400),
+            memory_max_bytes=_int("sentiment_tool_cache_memory_mb", 64) * 1024 * 1024,
+            disk_path=disk_path,
+            disk_max_bytes=_int("sentiment_tool_cache_disk_mb", 1024) * 1024 * 1024,
+            redis_client=redis_client,
+        )
+    elif redis_client is not None and _CACHE.redis is None:
+        _CACHE.redis = redis_client
+    return _CACHE
+
+
+def current_tool_cache() -> Optional[ToolResultCache]:
+    """The process-wide cache if one has been created (no side effects)."""
+    return _CACHE
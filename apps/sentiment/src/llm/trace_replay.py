@@ -0,0 +1,226 @@
+"""Record/replay of the OpenAI and MCP traffic behind sentiment analyses.
+
+In record mode every `responses.create`, `call_tool` and `list_tools` exchange
+made by Gpt5ResponsesPlannerLLM is appended to a JSONL trace, tagged with the
+analysis (run) it belongs to. In replay mode the same calls are answered from
+the trace instead of OpenAI/MCP, optionally after an injected delay, so an
+analysis can be re-run offline and deterministically.
+
+Requests are matched by a hash of their content with volatile parts (report
+timestamps) masked; if nothing matches, the next unused event of the same kind
+for the same run and agent is served, so small prompt edits still replay.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import hashlib
+import json
+import re
+import threading
+import time
+from collections import defaultdict, deque
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Optional
+
+_RUN_ID: contextvars.ContextVar[str] = contextvars.ContextVar("sentiment_trace_run", default="")
+
+# Report filenames/paths embed a timestamp that differs on every run
+_VOLATILE = re.compile(r"\d{8}_\d{6}|\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}(?:\.\d+)?")
+
+
+class TraceMiss(LookupError):
+    """Replay found no recorded event for a request."""
+
+
+def set_trace_run(run_id: str) -> None:
+    """Tag traffic from the current task (one analysis) with `run_id`."""
+    _RUN_ID.set(str(run_id or ""))
+
+
+def current_trace_run() -> str:
+    return _RUN_ID.get()
+
+
+def request_key(kind: str, request: Any) -> str:
+    text = json.dumps(request, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(f"{kind}|{_VOLATILE.sub('<ts>', text)}".encode("utf-8")).hexdigest()
+
+
+def to_jsonable(obj: Any) -> Any:
+    """Plain JSON for SDK/pydantic objects (Response, CallToolResult, ListToolsResult)."""
+    if hasattr(obj, "model_dump"):
+        try:
+            data = obj.model_dump(mode="json")
+        except TypeError:
+            data = obj.model_dump()
+        # Response.output_text is a property and not part of the dump
+        text = getattr(obj, "output_text", None)
+        if isinstance(data, dict) and isinstance(text, str):
+            data["output_text"] = text
+        return data
+    if isinstance(obj, dict):
+        return {str(k): to_jsonable(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [to_jsonable(v) for v in obj]
+    if isinstance(obj, (str, int, float, bool)) or obj is None:
+        return obj
+    return str(obj)
+
+
+class Record(dict):
+    """Recorded payload with attribute access, standing in for SDK objects."""
+
+    def __getattr__(self, name: str) -> Any:
+        try:
+            return _wrap(self[name])
+        except KeyError:
+            raise AttributeError(name) from None
+
+    def model_dump(self, **_kw) -> dict:
+        return dict(self)
+
+    def model_dump_json(self, **_kw) -> str:
+        return json.dumps(self, ensure_ascii=False)
+
+
+def _wrap(value: Any) -> Any:
+    if isinstance(value, dict) and not isinstance(value, Record):
+        return Record(value)
+    if isinstance(value, list):
+        return [_wrap(v) for v in value]
+    return value
+
+
+class Tracer:
+    """Records to, or replays from, one JSONL trace file.
+
+    `call(kind, agent, request, live)` is the only hook the LLM needs: in
+    record mode it awaits `live()` and appends the exchange; in replay mode
+    `live` is never called.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        mode: str = "record",
+        latency_ms: float = 0.0,
+        latency_scale: float = 0.0,
+    ) -> None:
+        if mode not in {"record", "replay"}:
+            raise ValueError(f"Unknown trace mode {mode!r} (expected record|replay)")
+        self.path = Path(path)
+        self.mode = mode
+        self.latency_ms = float(latency_ms or 0.0)
+        self.latency_scale = float(latency_scale or 0.0)
+        self._lock = threading.Lock()
+        self.events: list[dict[str, Any]] = []
+        self._by_key: dict[tuple[str, str], deque] = defaultdict(deque)
+        self._by_seq: dict[tuple[str, str, str], deque] = defaultdict(deque)
+        self._used: set[int] = set()
+        if mode == "replay":
+            self._load()
+        else:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+
+    @property
+    def replaying(self) -> bool:
+        return self.mode == "replay"
+
+    # ---- record ---------------------------------------------------------------
+    def _append(self, event: dict[str, Any]) -> None:
+        line = json.dumps(event, ensure_ascii=False, default=str)
+        with self._lock:
+            with self.path.open("a", encoding="utf-8") as f:
+                f.write(line + "\n")
+
+    # ---- replay ---------------------------------------------------------------
+    def _load(self) -> None:
+        with self.path.open("r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    self.events.append(json.loads(line))
+        for i, ev in enumerate(self.events):
+            self._by_key[(ev.get("run", ""), ev["key"])].append(i)
+            self._by_seq[(ev["kind"], ev.get("run", ""), ev.get("agent", ""))].append(i)
+
+    def _take(self, queue: deque) -> Optional[int]:
+        while queue:
+            i = queue.popleft()
+            if i not in self._used:
+                self._used.add(i)
+                return i
+        return None
+
+    def delay_for(self, event: dict[str, Any]) -> float:
+        return self.latency_ms / 1000.0 + self.latency_scale * float(event.get("elapsed", 0.0) or 0.0)
+
+    async def _replay(self, kind: str, agent: str, run: str, key: str) -> Any:
+        i = self._take(self._by_key[(run, key)])
+        if i is None:
+            i = self._take(self._by_seq[(kind, run, agent)])
+        if i is None:
+            raise TraceMiss(f"No recorded {kind} for run={run!r} agent={agent!r} in {self.path}")
+        event = self.events[i]
+        delay = self.delay_for(event)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        return _wrap(event["response"])
+
+    # ---- hook -----------------------------------------------------------------
+    async def call(self, kind: str, agent: str, request: Any, live: Callable[[], Awaitable[Any]]) -> Any:
+        run = current_trace_run()
+        req = to_jsonable(request)
+        key = request_key(kind, req)
+        if self.replaying:
+            return await self._replay(kind, agent, run, key)
+        start = time.monotonic()
+        result = await live()
+        try:
+            self._append(
+                {
+                    "kind": kind,
+                    "run": run,
+                    "agent": agent,
+                    "key": key,
+                    "elapsed": round(time.monotonic() - start, 4),
+                    "request": req,
+                    "response": to_jsonable(result),
+                }
+            )
+        except Exception:
+            pass
+        return result
+
+    def runs(self) -> dict[str, list[dict[str, Any]]]:
+        """Replay-mode events grouped by run, in recorded order."""
+        out: dict[str, list[dict[str, Any]]] = defaultdict(list)
+        for ev in self.events:
+            out[ev.get("run", "")].append(ev)
+        return dict(out)
+
+
+_TRACER: Optional[Tracer] = None
+_TRACER_INIT = False
+
+
+def get_tracer(settings: Any = None) -> Optional[Tracer]:
+    """Process-wide tracer from SENTIMENT_TRACE_MODE/SENTIMENT_TRACE_FILE, or None."""
+    global _TRACER, _TRACER_INIT
+    if not _TRACER_INIT:
+        _TRACER_INIT = True
+        mode = str(getattr(settings, "sentiment_trace_mode", None) or "").strip().lower() if settings is not None else ""
+        if mode:
+            path = getattr(settings, "sentiment_trace_file", None)
+            if not path:
+                base = getattr(settings, "sentiment_data_dir", None) or "/tmp"
+                path = str(Path(base) / "traces" / "sentiment_trace.jsonl")
+            _TRACER = Tracer(
+                path,
+                mode=mode,
+                latency_ms=float(getattr(settings, "sentiment_replay_latency_ms", None) or 0),
+                latency_scale=float(getattr(settings, "sentiment_replay_latency_scale", None) or 0),
+            )
+    return _TRACER
@@ -5,11 +5,10 @@ import json
 import re
 from types import SimpleNamespace
 import time
-from datetime import datetime, timedelta
+from datetime import datetime
 import argparse
 import contextlib
 import logging
-import psycopg2
 from psycopg2.extras import execute_values
 from pathlib import Path
 from mcp_agent.app import MCPApp
@@ -84,6 +83,33 @@ except ModuleNotFoundError:
         from apps.sentiment.src.llm.gpt5_planner_llm import Gpt5PlannerLLM
         from apps.sentiment.src.llm.gpt5_responses_planner_llm import Gpt5ResponsesPlannerLLM
 
+# Record/replay of OpenAI and MCP traffic (SENTIMENT_TRACE_MODE)
+try:
+    from llm.trace_replay import set_trace_run
+except ModuleNotFoundError:
+    try:
+        from apps.sentiment.llm.trace_replay import set_trace_run
+    except ModuleNotFoundError:
+        from apps.sentiment.src.llm.trace_replay import set_trace_run
+
+# Per-analysis latency/token/tool telemetry
+try:
+    from llm.telemetry import AnalysisTelemetry, append_jsonl, insert_telemetry, start_telemetry
+except ModuleNotFoundError:
+    try:
+        from apps.sentiment.llm.telemetry import AnalysisTelemetry, append_jsonl, insert_telemetry, start_telemetry
+    except ModuleNotFoundError:
+        from apps.sentiment.src.llm.telemetry import AnalysisTelemetry, append_jsonl, insert_telemetry, start_telemetry
+
+# Research snapshots for incremental re-analysis of the same symbol
+try:
+    from llm.research_snapshot import ResearchSnapshot, ResearchSnapshotStore, current_research_log, start_research_log
+except ModuleNotFoundError:
+    try:
+        from apps.sentiment.llm.research_snapshot import ResearchSnapshot, ResearchSnapshotStore, current_research_log, start_research_log
+    except ModuleNotFoundError:
+        from apps.sentiment.src.llm.research_snapshot import ResearchSnapshot, ResearchSnapshotStore, current_research_log, start_research_log
+
 # Local evaluator-optimizer subclass that avoids duplicating evaluator criteria in user prompts
 try:
     from llm.evaluator_optimizer_llm import EvaluatorOptimizerLLMNoDup
@@ -93,11 +119,57 @@ except ModuleNotFoundError:
     except ModuleNotFoundError:
         from apps.sentiment.src.llm.evaluator_optimizer_llm import EvaluatorOptimizerLLMNoDup
 
+# Bounded-concurrency scheduler for batches of analyses
+try:
+    from analysis_scheduler import (
+        AnalysisJob,
+        TIER_CONSENSUS,
+        TIER_INITIAL,
+        TIER_SCHEDULED,
+        scheduler_from_settings,
+    )
+except ModuleNotFoundError:
+    try:
+        from apps.sentiment.analysis_scheduler import (
+            AnalysisJob,
+            TIER_CONSENSUS,
+            TIER_INITIAL,
+            TIER_SCHEDULED,
+            scheduler_from_settings,
+        )
+    except ModuleNotFoundError:
+        from apps.sentiment.src.analysis_scheduler import (
+            AnalysisJob,
+            TIER_CONSENSUS,
+            TIER_INITIAL,
+            TIER_SCHEDULED,
+            scheduler_from_settings,
+        )
+
+# Shared pooled DB access (sized to scheduler concurrency)
+try:
+    from sentiment_db import close_sentiment_db, get_sentiment_db
+except ModuleNotFoundError:
+    try:
+        from apps.sentiment.sentiment_db import close_sentiment_db, get_sentiment_db
+    except ModuleNotFoundError:
+        from apps.sentiment.src.sentiment_db import close_sentiment_db, get_sentiment_db
+
+# Database-backed analysis schedule
+try:
+    from schedule_store import ScheduleStore, schedule_store_from_settings
+except ModuleNotFoundError:
+    try:
+        from apps.sentiment.schedule_store import ScheduleStore, schedule_store_from_settings
+    except ModuleNotFoundError:
+        from apps.sentiment.src.schedule_store import ScheduleStore, schedule_store_from_settings
+
 MAX_ITERATIONS = 3
 
 # Default paths; will be overridden from Settings in async_main
 DATA_DIR = "/data"
 OUTPUT_DIR = os.path.join(DATA_DIR, "company_reports")
+# Legacy JSON schedule; imported into fact_ai_analysis_schedule once at startup if present
 SCHEDULE_FILE = Path(os.path.join(DATA_DIR, "analysis_schedule", "analysis_schedule.json"))
 
 # In-memory guard to avoid re-running the same stock multiple times in one process per day
@@ -118,6 +190,9 @@ def _mark_completed_today(stock_key: int) -> None:
     except Exception:
         pass
 
+# Stocks with an analysis currently running; prevents two workers analyzing the same stock
+_IN_FLIGHT_STOCKS: set[int] = set()
+
 
 async def run_consensus_batch(analyzer_app) -> None:
     """Run a one-off batch of consensus symbols using the new view.
@@ -126,8 +201,10 @@ async def run_consensus_batch(analyzer_app) -> None:
       - sentiment_consensus_min_appearances
       - sentiment_consensus_min_styles
       - sentiment_consensus_limit
+      - sentiment_skip_if_within_days
 
-    Skips symbols that already have analysis today or already completed in this process.
+    Candidates come from a single query that already excludes stocks analyzed
+    within the skip window; stocks completed earlier in this process are skipped too.
     """
     settings = Settings()
     logger = get_logger(__name__)
@@ -139,114 +216,77 @@ async def run_consensus_batch(analyzer_app) -> None:
         logger.info("Consensus batch: limit <= 0; skipping")
         return
 
-    def get_db_connection():
-        max_retries = 3
-        for attempt in range(max_retries):
-            try:
-                return psycopg2.connect(
-                    database=settings.database_name,
-                    user=settings.db_username,
-                    password=settings.password,
-                    host=settings.host,
-                    port=settings.port,
-                    connect_timeout=30,
-                )
-            except psycopg2.OperationalError as e:
-                if attempt == max_retries - 1:
-                    logger.error(f"Consensus: DB connect failed after {max_retries} attempts: {e}")
-                    raise
-                logger.warning(f"Consensus: DB connect attempt {attempt+1} failed, retrying: {e}")
-                time.sleep(2 ** attempt)
-
-    # Fetch top symbols from the consensus view
-    conn = get_db_connection()
-    cur = conn.cursor()
     try:
-        query = (
-            "SELECT symbol, company_name FROM v_latest_screener_consensus WHERE 1=1 "
-        )
-        params = []
-        if min_app > 0:
-            query += " AND appearances >= %s"
-            params.append(min_app)
-        if min_styles > 0:
-            query += " AND styles_distinct >= %s"
-            params.append(min_styles)
-        query += " ORDER BY consensus_score DESC LIMIT %s"
-        params.append(limit)
-        cur.execute(query, tuple(params))
-        rows = cur.fetchall()
-    finally:
-        cur.close()
-        conn.close()
+        skip_window = int(getattr(settings, "sentiment_skip_if_within_days", 1) or 1)
+    except Exception:
+        skip_window = 1
+
+    # One set-based query: consensus view + dim_stock + latest analysis date,
+    # already filtered to stocks outside the skip window
+    db = get_sentiment_db(settings)
+    rows = await db.get_consensus_candidates(
+        limit,
+        skip_if_within_days=skip_window,
+        min_appearances=min_app,
+        min_styles=min_styles,
+    )
 
-    today_key = _today_key()
-    processed = 0
-    skipped_recent = 0
-    for symbol, company_name in rows:
+    jobs: list[AnalysisJob] = []
+    for sym, company_name, stock_key, consensus_score, _last_date in rows:
         # Skip if already completed this process
-        # Also skip if DB shows latest analysis today
-        sym = str(symbol).upper()
-
-        # Lookup stock_key and last date
-        conn = get_db_connection()
-        cur = conn.cursor()
-        try:
-            cur.execute("SELECT stock_key FROM dim_stock WHERE UPPER(symbol) = %s", (sym,))
-            r = cur.fetchone()
-            if not r:
-                continue
-            stock_key = int(r[0])
-            if _already_completed_today(stock_key):
-                logger.info(f"Consensus skip {sym}: already completed in this run")
-                continue
-            cur.execute(
-                "SELECT MAX(date_key) FROM fact_ai_stock_analysis WHERE stock_key = %s",
-                (stock_key,),
-            )
-            last_date = cur.fetchone()[0]
-        finally:
-            cur.close()
-            conn.close()
-
-        # Skip if already analyzed within N days
-        try:
-            skip_window = int(getattr(settings, "sentiment_skip_if_within_days", 1) or 1)
-        except Exception:
-            skip_window = 1
-        if last_date:
-            try:
-                last_dt = datetime.strptime(str(last_date), "%Y%m%d").date()
-                days_ago = (datetime.now().date() - last_dt).days
-            except Exception:
-                days_ago = 0
-        else:
-            days_ago = 10**6
-        if days_ago < max(skip_window, 1):
-            logger.info(
-                f"Consensus skip {sym}: last analysis {days_ago} days ago (< {skip_window}d)"
-            )
-            skipped_recent += 1
+        if _already_completed_today(stock_key):
+            logger.info(f"Consensus skip {sym}: already completed in this run")
             continue
+        jobs.append(
+            AnalysisJob(
+                symbol=sym,
+                company_name=company_name,
+                stock_key=int(stock_key),
+                consensus_score=float(consensus_score) if consensus_score is not None else None,
+                tier=TIER_CONSENSUS,
+                reason="consensus",
+            )
+        )
+    logger.info(
+        f"Consensus candidates: {len(jobs)} due (outside {max(skip_window, 1)}d window), limit={limit}"
+    )
 
-        logger.info(f"Consensus run for {company_name} ({sym})")
-        try:
-            success = await ai_analysis(company_name, analyzer_app, sym)
-        except asyncio.TimeoutError:
-            logger.warning(f"Consensus analysis timed out for {sym}; not retrying")
-            success = False
+    async def _handle(job: AnalysisJob) -> bool:
+        logger.info(f"Consensus run for {job.company_name} ({job.symbol})")
+        success = await _run_analysis_guarded(job, analyzer_app)
         if success:
-            _mark_completed_today(stock_key)
-            # Persistently remove today's date from schedule for this stock if present
+            _mark_completed_today(job.stock_key)
+            # Close today's schedule entry for this stock if present
             try:
-                remove_date_from_schedule(str(stock_key), datetime.now().date())
+                await get_schedule_store().complete(job.stock_key, datetime.now().date())
             except Exception:
                 pass
-            processed += 1
+        return success
+
+    results = await scheduler_from_settings(settings, logger=logger).run(jobs, _handle)
+    processed = sum(1 for r in results if r.success)
     logger.info(
-        f"Consensus batch done: processed={processed}, skipped_recent={skipped_recent}, requested={len(rows)}"
+        f"Consensus batch done: processed={processed}, queued={len(jobs)}, limit={limit}"
     )
 
+
+async def _run_analysis_guarded(job: AnalysisJob, analyzer_app) -> bool:
+    """Run `ai_analysis` for a job unless the same stock is already in flight or done today."""
+    logger = get_logger(__name__)
+    if job.stock_key is not None:
+        if job.stock_key in _IN_FLIGHT_STOCKS:
+            logger.info(f"Skipping {job.symbol}: analysis already in flight")
+            return False
+        if _already_completed_today(job.stock_key):
+            logger.info(f"Skipping {job.symbol}: already completed in this run")
+            return False
+        _IN_FLIGHT_STOCKS.add(job.stock_key)
+    try:
+        return await ai_analysis(job.company_name, analyzer_app, job.symbol)
+    finally:
+        if job.stock_key is not None:
+            _IN_FLIGHT_STOCKS.discard(job.stock_key)
+
 def extract_json_block(text: str) -> str:
     match1 = re.search(r"'''json\s*(\{.*?\})\s*'''", text, re.DOTALL)
     match2 = re.search(r"```json\s*(\{.*?\})\s*```", text, re.DOTALL)
@@ -411,9 +451,8 @@ async def _monitor_report_and_cancel(
         logger.debug(f"Report monitor timed out; last validation error: {last_error}")
     return False
 
-def load_json_and_insert(report_path):
-    # Read and parse
-    settings = Settings()
+def _read_report(report_path) -> dict:
+    """Read a saved report and parse its JSON block."""
     logger = get_logger(__name__)
     logger.info(f"Loading report JSON into database from {report_path}")
     with open(report_path, 'r') as f:
@@ -426,191 +465,277 @@ def load_json_and_insert(report_path):
         )
     except Exception:
         pass
+    return data
 
-    conn = psycopg2.connect(
-        database=settings.database_name,
-        user=settings.db_username,
-        password=settings.password,
-        host=settings.host,
-        port=settings.port,
+
+def _insert_report(cur, data: dict):
+    """Insert a parsed report into the fact_ai_* tables; returns the analysis_id.
+
+    Runs on the caller's cursor so the whole report lands in one transaction.
+    """
+    logger = get_logger(__name__)
+    insert_main = (
+        "INSERT INTO rankalpha.fact_ai_stock_analysis"
+        "(date_key, stock_key, source_key, market_cap_usd, revenue_cagr_3y_pct,"
+        " gross_margin_trend_key, net_margin_trend_key, free_cash_flow_trend_key,"
+        " insider_activity_key, beta_sp500, rate_sensitivity_bps, fx_sensitivity,"
+        " commodity_exposure, news_sentiment_30d, social_sentiment_7d, options_skew_30d,"
+        " short_interest_pct_float, employee_glassdoor_score, headline_buzz_score, commentary,"
+        " overall_rating_key, confidence_key, timeframe_key)"
+        "VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)"
+        " RETURNING analysis_id"
+    )
+    # Ensure source exists (create if missing) and use its key
+    source_key_val = get_or_create_source_key(cur, SENTIMENT_SOURCE_NAME, "1")
+    main_vals = (
+        int(data['as_of_date'].replace('-', '')),
+        get_stock_key(cur, data['ticker']),
+        source_key_val,
+        data.get('market_cap_usd'),
+        data['fundamental'].get('revenue_cagr_3y_pct'),
+        map_trend_key(data['fundamental'].get('gross_margin_trend')),
+        map_trend_key(data['fundamental'].get('net_margin_trend')),
+        map_trend_key(data['fundamental'].get('free_cash_flow_trend')),
+        map_trend_key(data['fundamental'].get('insider_activity')),
+        data['macro_sensitivity'].get('beta_sp500'),
+        data['macro_sensitivity'].get('rate_sensitivity_bps'),
+        map_confidence_key(data['macro_sensitivity'].get('fx_sensitivity')),
+        map_confidence_key(data['macro_sensitivity'].get('commodity_exposure')),
+        data['sentiment'].get('news_sentiment_30d'),
+        data['sentiment'].get('social_sentiment_7d'),
+        data['sentiment'].get('options_skew_30d'),
+        data['sentiment'].get('short_interest_pct_float'),
+        data['sentiment'].get('employee_glassdoor_score'),
+        data['sentiment'].get('headline_buzz_score'),
+        data['sentiment'].get('commentary'),
+        map_rating_key(data.get('overall_rating')),
+        map_confidence_key(data.get('confidence')),
+        map_timeframe_key(data.get('recommendation_timeframe'))
     )
-    cur = conn.cursor()
+    cur.execute(insert_main, main_vals)
+    row = cur.fetchone()
+    if row is None:
+        raise ValueError("No analysis_id returned from INSERT")
+    analysis_id = row[0]
     try:
-        insert_main = (
-            "INSERT INTO rankalpha.fact_ai_stock_analysis"
-            "(date_key, stock_key, source_key, market_cap_usd, revenue_cagr_3y_pct,"
-            " gross_margin_trend_key, net_margin_trend_key, free_cash_flow_trend_key,"
-            " insider_activity_key, beta_sp500, rate_sensitivity_bps, fx_sensitivity,"
-            " commodity_exposure, news_sentiment_30d, social_sentiment_7d, options_skew_30d,"
-            " short_interest_pct_float, employee_glassdoor_score, headline_buzz_score, commentary,"
-            " overall_rating_key, confidence_key, timeframe_key)"
-            "VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)"
-            " RETURNING analysis_id"
+        logger.info(
+            f"Inserted analysis_id={analysis_id} for {data.get('company_name')} ({data.get('ticker')}) on {data.get('as_of_date')}"
         )
-        # Ensure source exists (create if missing) and use its key
-        source_key_val = get_or_create_source_key(cur, SENTIMENT_SOURCE_NAME, "1")
-        main_vals = (
-            int(data['as_of_date'].replace('-', '')),
-            get_stock_key(cur, data['ticker']),
-            source_key_val,
-            data.get('market_cap_usd'),
-            data['fundamental'].get('revenue_cagr_3y_pct'),
-            map_trend_key(data['fundamental'].get('gross_margin_trend')),
-            map_trend_key(data['fundamental'].get('net_margin_trend')),
-            map_trend_key(data['fundamental'].get('free_cash_flow_trend')),
-            map_trend_key(data['fundamental'].get('insider_activity')),
-            data['macro_sensitivity'].get('beta_sp500'),
-            data['macro_sensitivity'].get('rate_sensitivity_bps'),
-            map_confidence_key(data['macro_sensitivity'].get('fx_sensitivity')),
-            map_confidence_key(data['macro_sensitivity'].get('commodity_exposure')),
-            data['sentiment'].get('news_sentiment_30d'),
-            data['sentiment'].get('social_sentiment_7d'),
-            data['sentiment'].get('options_skew_30d'),
-            data['sentiment'].get('short_interest_pct_float'),
-            data['sentiment'].get('employee_glassdoor_score'),
-            data['sentiment'].get('headline_buzz_score'),
-            data['sentiment'].get('commentary'),
-            map_rating_key(data.get('overall_rating')),
-            map_confidence_key(data.get('confidence')),
-            map_timeframe_key(data.get('recommendation_timeframe'))
+    except Exception:
+        logger.info(f"Inserted analysis_id={analysis_id}")
+
+    # Valuation metrics
+    val = data['fundamental'].get('valuation_vs_peers', {})
+    cur.execute(
+        "INSERT INTO rankalpha.fact_ai_valuation_metrics"
+        "(analysis_id, pe_forward, ev_ebitda_forward, pe_percentile_in_sector)"
+        "VALUES (%s, %s, %s, %s)",
+        (analysis_id, val.get('pe_forward'), val.get('ev_ebitda_forward'), val.get('pe_percentile_in_sector'))
+    )
+
+    # Peer comparisons
+    peer_values = []
+    for p in data.get('peer_analysis', []):
+        peer_key = get_stock_key(cur, p['ticker'])
+        if peer_key:
+            peer_values.append((
+                analysis_id,
+                peer_key,
+                p.get('pe_forward'),
+                p.get('ev_ebitda_forward'),
+                p.get('1y_price_total_return_pct'),
+                p.get('summary')
+            ))
+    if peer_values:
+        execute_values(
+            cur,
+            "INSERT INTO rankalpha.fact_ai_peer_comparison"
+            "(analysis_id, peer_stock_key, pe_forward, ev_ebitda_forward, return_1y_pct, summary) VALUES %s",
+            peer_values
         )
-        cur.execute(insert_main, main_vals)
-        row = cur.fetchone()
-        if row is None:
-            raise ValueError("No analysis_id returned from INSERT")
-        analysis_id = row[0]
-        try:
-            logger.info(
-                f"Inserted analysis_id={analysis_id} for {data.get('company_name')} ({data.get('ticker')}) on {data.get('as_of_date')}"
+
+    # Factor scores
+    fs = data.get('factor_scores', {})
+    fs_vals = [
+        (analysis_id, map_style_key(k), v)
+        for k, v in fs.items()
+        if map_style_key(k) is not None
+    ]
+    if fs_vals:
+        execute_values(
+            cur,
+            "INSERT INTO rankalpha.fact_ai_factor_score"
+            "(analysis_id, style_key, score) VALUES %s",
+            fs_vals
+        )
+
+    # Catalysts
+    for ct in data.get('catalysts', {}).get('shortTerm', []):
+        # Accept either probability_pct or probability_ptc from the JSON
+        prob = ct.get('probability_pct')
+        if prob is None:
+            prob = ct.get('probability_ptc')
+        # Accept either price_drop_risk_pct or price_drop_ptc_risk_if_fails
+        drop_risk = ct.get('price_drop_risk_pct')
+        if drop_risk is None:
+            drop_risk = ct.get('price_drop_ptc_risk_if_fails')
+        cur.execute(
+            "INSERT INTO rankalpha.fact_ai_catalyst"
+            "(analysis_id, catalyst_type, title, description, probability_pct, expected_price_move_pct, expected_date, priced_in_pct, price_drop_risk_pct)"
+            "VALUES (%s, 'short', %s, %s, %s, %s, %s, %s, %s)",
+            (
+                analysis_id,
+                ct.get('title'),
+                ct.get('description'),
+                prob,
+                ct.get('expected_price_move_pct'),
+                ct.get('expected_date'),
+                ct.get('priced_in_pct'),
+                drop_risk,
             )
-        except Exception:
-            logger.info(f"Inserted analysis_id={analysis_id}")
+        )
+    for ct in data.get('catalysts', {}).get('longTerm', []):
+        prob = ct.get('probability_pct')
+        if prob is None:
+            prob = ct.get('probability_ptc')
+        drop_risk = ct.get('price_drop_risk_pct')
+        if drop_risk is None:
+            drop_risk = ct.get('price_drop_ptc_risk_if_fails')
+        cur.execute(
+            "INSERT INTO rankalpha.fact_ai_catalyst"
+            "(analysis_id, catalyst_type, title, description, probability_pct, expected_price_move_pct, expected_date, priced_in_pct, price_drop_risk_pct)"
+            "VALUES (%s, 'long', %s, %s, %s, %s, %s, %s, %s)",
+            (
+                analysis_id,
+                ct.get('title'),
+                ct.get('description'),
+                prob,
+                ct.get('expected_price_move_pct'),
+                ct.get('expected_date'),
+                ct.get('priced_in_pct'),
+                drop_risk,
+            )
+        )
 
-        # Valuation metrics
-        val = data['fundamental'].get('valuation_vs_peers', {})
+    # Price scenarios
+    for stype, scenario in data.get('scenario_price_targets', {}).items():
+        scen_prob = scenario.get('probability_pct')
+        if scen_prob is None:
+            scen_prob = scenario.get('probability_ptc')
         cur.execute(
-            "INSERT INTO rankalpha.fact_ai_valuation_metrics"
-            "(analysis_id, pe_forward, ev_ebitda_forward, pe_percentile_in_sector)"
-            "VALUES (%s, %s, %s, %s)",
-            (analysis_id, val.get('pe_forward'), val.get('ev_ebitda_forward'), val.get('pe_percentile_in_sector'))
+            "INSERT INTO rankalpha.fact_ai_price_scenario"
+            "(analysis_id, scenario_type, price_target, probability_pct) VALUES (%s, %s, %s, %s)",
+            (analysis_id, stype, scenario.get('price'), scen_prob)
         )
 
-        # Peer comparisons
-        peer_values = []
-        for p in data.get('peer_analysis', []):
-            peer_key = get_stock_key(cur, p['ticker'])
-            if peer_key:
-                peer_values.append((
-                    analysis_id,
-                    peer_key,
-                    p.get('pe_forward'),
-                    p.get('ev_ebitda_forward'),
-                    p.get('1y_price_total_return_pct'),
-                    p.get('summary')
-                ))
-        if peer_values:
-            execute_values(
-                cur,
-                "INSERT INTO rankalpha.fact_ai_peer_comparison"
-                "(analysis_id, peer_stock_key, pe_forward, ev_ebitda_forward, return_1y_pct, summary) VALUES %s",
-                peer_values
-            )
+    # Headline risks & data gaps
+    for risk in data.get('analyst_summary', {}).get('headline_risks', []):
+        cur.execute(
+            "INSERT INTO rankalpha.fact_ai_headline_risk (analysis_id, risk_text) VALUES (%s, %s)",
+            (analysis_id, risk)
+        )
+    for gap in data.get('data_gaps', []):
+        cur.execute(
+            "INSERT INTO rankalpha.fact_ai_data_gap (analysis_id, gap_text) VALUES (%s, %s)",
+            (analysis_id, gap)
+        )
 
-        # Factor scores
-        fs = data.get('factor_scores', {})
-        fs_vals = [
-            (analysis_id, map_style_key(k), v)
-            for k, v in fs.items()
-            if map_style_key(k) is not None
-        ]
-        if fs_vals:
-            execute_values(
-                cur,
-                "INSERT INTO rankalpha.fact_ai_factor_score"
-                "(analysis_id, style_key, score) VALUES %s",
-                fs_vals
-            )
+    return analysis_id
 
-        # Catalysts
-        for ct in data.get('catalysts', {}).get('shortTerm', []):
-            # Accept either probability_pct or probability_ptc from the JSON
-            prob = ct.get('probability_pct')
-            if prob is None:
-                prob = ct.get('probability_ptc')
-            # Accept either price_drop_risk_pct or price_drop_ptc_risk_if_fails
-            drop_risk = ct.get('price_drop_risk_pct')
-            if drop_risk is None:
-                drop_risk = ct.get('price_drop_ptc_risk_if_fails')
-            cur.execute(
-                "INSERT INTO rankalpha.fact_ai_catalyst"
-                "(analysis_id, catalyst_type, title, description, probability_pct, expected_price_move_pct, expected_date, priced_in_pct, price_drop_risk_pct)"
-                "VALUES (%s, 'short', %s, %s, %s, %s, %s, %s, %s)",
-                (
-                    analysis_id,
-                    ct.get('title'),
-                    ct.get('description'),
-                    prob,
-                    ct.get('expected_price_move_pct'),
-                    ct.get('expected_date'),
-                    ct.get('priced_in_pct'),
-                    drop_risk,
-                )
-            )
-        for ct in data.get('catalysts', {}).get('longTerm', []):
-            prob = ct.get('probability_pct')
-            if prob is None:
-                prob = ct.get('probability_ptc')
-            drop_risk = ct.get('price_drop_risk_pct')
-            if drop_risk is None:
-                drop_risk = ct.get('price_drop_ptc_risk_if_fails')
-            cur.execute(
-                "INSERT INTO rankalpha.fact_ai_catalyst"
-                "(analysis_id, catalyst_type, title, description, probability_pct, expected_price_move_pct, expected_date, priced_in_pct, price_drop_risk_pct)"
-                "VALUES (%s, 'long', %s, %s, %s, %s, %s, %s, %s)",
-                (
-                    analysis_id,
-                    ct.get('title'),
-                    ct.get('description'),
-                    prob,
-                    ct.get('expected_price_move_pct'),
-                    ct.get('expected_date'),
-                    ct.get('priced_in_pct'),
-                    drop_risk,
-                )
-            )
 
-        # Price scenarios
-        for stype, scenario in data.get('scenario_price_targets', {}).items():
-            scen_prob = scenario.get('probability_pct')
-            if scen_prob is None:
-                scen_prob = scenario.get('probability_ptc')
-            cur.execute(
-                "INSERT INTO rankalpha.fact_ai_price_scenario"
-                "(analysis_id, scenario_type, price_target, probability_pct) VALUES (%s, %s, %s, %s)",
-                (analysis_id, stype, scenario.get('price'), scen_prob)
-            )
+def load_json_and_insert(report_path):
+    data = _read_report(report_path)
+    return get_sentiment_db().run_sync(_insert_report, data)
 
-        # Headline risks & data gaps
-        for risk in data.get('analyst_summary', {}).get('headline_risks', []):
-            cur.execute(
-                "INSERT INTO rankalpha.fact_ai_headline_risk (analysis_id, risk_text) VALUES (%s, %s)",
-                (analysis_id, risk)
-            )
-        for gap in data.get('data_gaps', []):
-            cur.execute(
-                "INSERT INTO rankalpha.fact_ai_data_gap (analysis_id, gap_text) VALUES (%s, %s)",
-                (analysis_id, gap)
-            )
 
-        conn.commit()
-    except Exception:
-        conn.rollback()
-        raise
-    finally:
-        cur.close()
+async def load_json_and_insert_async(report_path):
+    """Parse a report and insert it on a pooled connection without blocking the loop."""
+    data = _read_report(report_path)
+    return await get_sentiment_db().insert(_insert_report, data)
+
+
+async def _flush_telemetry(telemetry: AnalysisTelemetry, success: bool) -> None:
+    """Log, append to JSONL and persist one analysis's telemetry; never raises."""
+    logger = get_logger(__name__)
+    telemetry.finish(success)
+    record = telemetry.to_dict()
+    logger.info(telemetry.summary())
+    settings = Settings()
+    if not getattr(settings, "sentiment_telemetry", True):
+        return
+    path = getattr(settings, "sentiment_telemetry_file", None) or os.path.join(DATA_DIR, "telemetry", "analysis_telemetry.jsonl")
+    try:
+        await asyncio.to_thread(append_jsonl, path, record)
+    except Exception as e:
+        logger.warning(f"Could not append telemetry to {path}: {e}")
+    try:
+        await get_sentiment_db().run(insert_telemetry, record)
+    except Exception as e:
+        logger.warning(f"Could not persist telemetry for {telemetry.run_id}: {e}")
+
+
+def _research_store(settings: Settings) -> ResearchSnapshotStore:
+    base = getattr(settings, "sentiment_research_snapshot_dir", None) or os.path.join(DATA_DIR, "research_snapshots")
+    max_age = int(getattr(settings, "sentiment_research_snapshot_max_age_days", 30) or 0)
+    return ResearchSnapshotStore(base, max_age_days=max_age)
+
+
+async def _load_research_brief(symbol: str | None, settings: Settings, logger) -> tuple[ResearchSnapshot | None, str]:
+    """Previous snapshot for `symbol` and the prompt brief built from it ("" if none)."""
+    if not symbol or not getattr(settings, "sentiment_research_reuse", True):
+        return None, ""
+    try:
+        snapshot = _research_store(settings).load(symbol)
+        if snapshot is None:
+            return None, ""
+        price_then = price_now = None
+        db = get_sentiment_db(settings)
+        stock_key = await db.get_stock_key(symbol)
+        if stock_key is not None:
+            since_key = int(snapshot.taken_date.strftime("%Y%m%d"))
+            price_then, price_now = await db.get_price_change(stock_key, since_key)
+        logger.info(
+            f"Reusing research snapshot for {symbol} from {snapshot.taken_at} "
+            f"({len(snapshot.documents)} documents previously consulted)"
+        )
+        return snapshot, snapshot.brief(price_then=price_then, price_now=price_now)
+    except Exception as e:
+        logger.warning(f"Could not load research snapshot for {symbol}: {e}")
+        return None, ""
+
+
+def _save_research_snapshot(symbol: str | None, output_path: str, analysis_id, previous, log, settings: Settings, logger) -> None:
+    if not symbol or not getattr(settings, "sentiment_research_reuse", True):
+        return
+    try:
+        snapshot = ResearchSnapshot.from_report(
+            symbol,
+            _read_report(output_path),
+            analysis_id=analysis_id,
+            documents=list(log.documents.values()),
+            previous=previous,
+        )
+        path = _research_store(settings).save(snapshot)
+        logger.info(f"Saved research snapshot for {symbol} ({len(snapshot.documents)} documents) to {path}")
+    except Exception as e:
+        logger.warning(f"Could not save research snapshot for {symbol}: {e}")
 
 
 async def ai_analysis(company_name, analyzer_app, symbol: str | None = None):
+    """Run one analysis with trace tagging and per-analysis telemetry."""
+    # OpenAI/MCP traffic and telemetry from this task belong to this analysis
+    set_trace_run(symbol or company_name)
+    telemetry = start_telemetry(symbol or company_name)
+    start_research_log()
+    ok = False
+    try:
+        ok = await _run_ai_analysis(company_name, analyzer_app, symbol, telemetry)
+        return ok
+    finally:
+        await _flush_telemetry(telemetry, ok)
+
+
+async def _run_ai_analysis(company_name, analyzer_app, symbol: str | None, telemetry: AnalysisTelemetry):
     os.makedirs(OUTPUT_DIR, exist_ok=True, mode=0o777)
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     output_file = f"{company_name.lower().replace(' ', '_')}_report_{timestamp}.md"
@@ -723,9 +848,13 @@ async def ai_analysis(company_name, analyzer_app, symbol: str | None = None):
                 context.config.mcp.servers[srv] = SimpleNamespace(args=[])
                 logger.info(f"Registered missing MCP server '{srv}'")
 
+        # A recent snapshot of this symbol turns the run into a delta update
+        prior_snapshot, research_brief = await _load_research_brief(symbol, settings, logger)
+        search_instruction = load_prompt("search_finder", {"COMPANY_NAME": company_name})
+
         research_agent = Agent(
             name="search_finder",
-            instruction=load_prompt("search_finder", {"COMPANY_NAME": company_name}),
+            instruction=search_instruction,
             server_names=["g-search", "fetch", "yfinance", "edgar"],
         )
 
@@ -870,6 +999,9 @@ async def ai_analysis(company_name, analyzer_app, symbol: str | None = None):
             "orchestrator_task",
             {"COMPANY_NAME": company_name, "OUTPUT_PATH": output_path},
         )
+        # The brief goes in the task only (not also in agent instructions) so it is paid for once
+        if research_brief:
+            task = f"{task}\n\n{research_brief}"
         source = "env" if settings.openai_model else "config"
         logger.info(f"Using LLM model '{model_choice}' (source: {source})")
         if symbol:
@@ -947,7 +1079,10 @@ async def ai_analysis(company_name, analyzer_app, symbol: str | None = None):
 
         if os.path.exists(output_path):
             logger.info(f"Report successfully generated: {output_path}")
-            load_json_and_insert(output_path)
+            telemetry.analysis_id = await load_json_and_insert_async(output_path)
+            _save_research_snapshot(
+                symbol, output_path, telemetry.analysis_id, prior_snapshot, current_research_log(), settings, logger
+            )
             # Log tool usage summary (GPT‑5 Responses wrapper aggregates counts per process)
             try:
                 Gpt5ResponsesPlannerLLM.log_tool_usage_summary(logger=logger, reset=False)
@@ -973,177 +1108,39 @@ async def ai_analysis(company_name, analyzer_app, symbol: str | None = None):
         logger.info("Not retrying this analysis attempt")
         return False
 
-def load_schedule():
-    """Load the analysis schedule from JSON file."""
-    if SCHEDULE_FILE.exists():
-        try:
-            with open(SCHEDULE_FILE, 'r') as f:
-                data = json.load(f)
-                # Convert date strings back to date objects
-                for stock_key in data:
-                    data[stock_key]['analysis_dates'] = [
-                        datetime.strptime(date_str, '%Y-%m-%d').date() 
-                        for date_str in data[stock_key]['analysis_dates']
-                    ]
-                return data
-        except Exception as e:
-            logger = get_logger(__name__)
-            logger.error(f"Error loading schedule: {e}")
-            return {}
-    return {}
+_SCHEDULE_STORE: ScheduleStore | None = None
 
-def save_schedule(schedule):
-    """Save the analysis schedule to JSON file, ensuring no duplicate dates per stock."""
-    try:
-        # Convert date objects to strings for JSON serialization
-        data = {}
-        for stock_key, info in schedule.items():
-            # Ensure analysis_dates are unique by converting to set and back
-            unique_dates = list(set(info['analysis_dates']))
-            unique_dates.sort()
-            
-            data[stock_key] = {
-                'company_name': info['company_name'],
-                'symbol': info['symbol'],
-                'analysis_dates': [
-                    date.strftime('%Y-%m-%d') if hasattr(date, 'strftime') else date
-                    for date in unique_dates
-                ]
-            }
-        
-        os.makedirs(SCHEDULE_FILE.parent, exist_ok=True)
-        with open(SCHEDULE_FILE, 'w') as f:
-            json.dump(data, f, indent=2)
-    except Exception as e:
-        logger = get_logger(__name__)
-        logger.error(f"Error saving schedule: {e}")
 
-def clean_schedule():
-    """Clean the schedule to ensure no duplicate dates per stock."""
-    logger = get_logger(__name__)
-    schedule = load_schedule()
-    
-    cleaned = False
-    for stock_key, info in schedule.items():
-        original_count = len(info['analysis_dates'])
-        # Remove duplicates while preserving order
-        unique_dates = []
-        seen = set()
-        for date in info['analysis_dates']:
-            if date not in seen:
-                unique_dates.append(date)
-                seen.add(date)
-        
-        info['analysis_dates'] = unique_dates
-        
-        if original_count != len(unique_dates):
-            logger.info(f"Cleaned schedule for {info['symbol']}: removed {original_count - len(unique_dates)} duplicate dates")
-            cleaned = True
-    
-    if cleaned:
-        save_schedule(schedule)
-        logger.info("Schedule cleaned and saved")
-    
-    return schedule
+def get_schedule_store(settings: Settings | None = None) -> ScheduleStore:
+    """Process-wide schedule store on the shared DB pool."""
+    global _SCHEDULE_STORE
+    if _SCHEDULE_STORE is None:
+        settings = settings or Settings()
+        _SCHEDULE_STORE = schedule_store_from_settings(get_sentiment_db(settings), settings)
+    return _SCHEDULE_STORE
 
-def remove_date_from_schedule(stock_key_str: str, date_obj: datetime.date) -> None:
-    """Remove a specific date from the schedule for a stock, if present."""
-    try:
-        schedule = load_schedule()
-        if stock_key_str in schedule:
-            before = len(schedule[stock_key_str]['analysis_dates'])
-            schedule[stock_key_str]['analysis_dates'] = [d for d in schedule[stock_key_str]['analysis_dates'] if d != date_obj]
-            after = len(schedule[stock_key_str]['analysis_dates'])
-            if after != before:
-                save_schedule(schedule)
-    except Exception:
-        pass
 
-def update_schedule_with_catalysts(stock_key, company_name, symbol, analysis_id, cursor):
-    """Update the schedule with new analysis dates based on catalyst expected dates.
-    Ensures only one analysis per stock per day."""
+async def update_schedule_with_catalysts(stock_key, company_name, symbol, analysis_id) -> None:
+    """Schedule follow-up analyses around the catalysts of `analysis_id` (max one per stock per day)."""
     logger = get_logger(__name__)
-    schedule = load_schedule()
-    
-    # Initialize stock entry if not exists
-    if stock_key not in schedule:
-        schedule[stock_key] = {
-            'company_name': company_name,
-            'symbol': symbol,
-            'analysis_dates': []
-        }
-    
-    # Get catalyst dates from the latest analysis
-    cursor.execute("""
-        SELECT expected_date 
-        FROM fact_ai_catalyst 
-        WHERE analysis_id = %s AND expected_date IS NOT NULL
-    """, (analysis_id,))
-    
-    catalyst_dates = cursor.fetchall()
-    new_dates = set()
-    
-    for (expected_date,) in catalyst_dates:
-        if expected_date:
-            # Add analysis dates: 7 days before, 1 day after, 7 days after
-            # Using a set automatically prevents duplicate dates
-            new_dates.add(expected_date - timedelta(days=7))  # 7 days before
-            new_dates.add(expected_date + timedelta(days=1))   # 1 day after
-            new_dates.add(expected_date + timedelta(days=7))   # 7 days after
-    
-    # Merge with existing dates and remove past dates
-    current_date = datetime.now().date()
-    existing_dates = set(schedule[stock_key]['analysis_dates'])
-    all_dates = existing_dates.union(new_dates)
-    
-    # Keep only future dates (set ensures no duplicates)
-    future_dates = [date for date in all_dates if date >= current_date]
-    future_dates.sort()
-    
-    # Log if we're consolidating multiple analyses into one
-    if len(new_dates) > len(set(new_dates)):
-        logger.info(f"Consolidated multiple catalyst-triggered analyses for {company_name} ({symbol}) to ensure max 1 per day")
-    
-    schedule[stock_key]['analysis_dates'] = future_dates
-    logger.info(
-        f"Updated schedule for {company_name} ({symbol}): +{len(new_dates)} catalyst-derived dates, {len(future_dates)} future dates total"
-    )
-    save_schedule(schedule)
-    
-    return schedule
+    added = await get_schedule_store().add_from_catalysts(int(stock_key), analysis_id)
+    logger.info(f"Updated schedule for {company_name} ({symbol}): +{added} catalyst-derived dates")
+
 
 async def check_stock_analyses(analyzer_app):
     settings = Settings()
     logger = get_logger(__name__)
 
-    def get_db_connection():
-        """Get a fresh database connection with retry logic."""
-        max_retries = 3
-        for attempt in range(max_retries):
-            try:
-                return psycopg2.connect(
-                    database=settings.database_name,
-                    user=settings.db_username,
-                    password=settings.password,
-                    host=settings.host,
-                    port=settings.port,
-                    connect_timeout=30  # 30 second timeout
-                )
-            except psycopg2.OperationalError as e:
-                if attempt == max_retries - 1:
-                    logger.error(f"Failed to connect to database after {max_retries} attempts: {e}")
-                    raise
-                logger.warning(f"Database connection attempt {attempt + 1} failed, retrying: {e}")
-                time.sleep(2 ** attempt)  # Exponential backoff
-    
-    # Load existing schedule
-    schedule = load_schedule()
+    db = get_sentiment_db(settings)
+    store = get_schedule_store(settings)
+
+    # Load today's due entries and the set of stocks whose schedule is initialised
     current_date = datetime.now().date()
+    due_today = await store.due(current_date)
+    scheduled_stocks = await store.scheduled_stock_keys(current_date)
     
-    # Get all stocks using a fresh connection, prioritizing those without analysis
-    conn = get_db_connection()
-    cur = conn.cursor()
-    try:
+    # Get all stocks, prioritizing those without analysis
+    def _load_stocks(cur):
         # Get stocks sorted by whether they have analysis (NULL analysis_id first)
         cur.execute("""
             SELECT ds.stock_key, ds.company_name, ds.symbol,
@@ -1157,114 +1154,67 @@ async def check_stock_analyses(analyzer_app):
             ORDER BY has_analysis ASC, ds.company_name ASC
         """)
         stocks_with_priority = cur.fetchall()
-        # Extract just the stock info (first 3 columns)
-        stocks = [(row[0], row[1], row[2]) for row in stocks_with_priority]
-        
-        # Log priority information
-        stocks_without_analysis = sum(1 for row in stocks_with_priority if row[3] == 0)
-        logger.info(f"Found {len(stocks)} total stocks, {stocks_without_analysis} without analysis (will be processed first)")
-        
-    finally:
-        cur.close()
-        conn.close()
+
+        # Nearest catalyst per stock (one query) so the scheduler can favor imminent events
+        cur.execute("""
+            SELECT DISTINCT ON (a.stock_key) a.stock_key, c.expected_date
+            FROM fact_ai_catalyst c
+            JOIN fact_ai_stock_analysis a ON a.analysis_id = c.analysis_id
+            WHERE c.expected_date BETWEEN CURRENT_DATE - 7 AND CURRENT_DATE + 30
+            ORDER BY a.stock_key, ABS(c.expected_date - CURRENT_DATE)
+        """)
+        nearest_catalyst = {int(r[0]): r[1] for r in cur.fetchall()}
+        return stocks_with_priority, nearest_catalyst
+
+    stocks_with_priority, nearest_catalyst = await db.run(_load_stocks)
+    # Extract just the stock info (first 3 columns)
+    stocks = [(row[0], row[1], row[2]) for row in stocks_with_priority]
+
+    # Log priority information
+    stocks_without_analysis = sum(1 for row in stocks_with_priority if row[3] == 0)
+    logger.info(f"Found {len(stocks)} total stocks, {stocks_without_analysis} without analysis (will be processed first)")
     
-    processed_count = 0
+    jobs: list[AnalysisJob] = []
     skipped_recent = 0
     for stock_key, company_name, stock_symbol in stocks:
         try:
-            stock_key_str = str(stock_key)
             # Skip if we've already completed this stock today in this process
             if _already_completed_today(stock_key):
                 logger.info(f"Skipping {company_name} ({stock_symbol}): already completed today in this run")
                 continue
             
             # First, ALWAYS check if this company has any analysis at all - regardless of schedule
-            conn = get_db_connection()
-            cur = conn.cursor()
-            try:
-                cur.execute("""
-                    SELECT analysis_id, date_key 
-                    FROM fact_ai_stock_analysis 
-                    WHERE stock_key = %s
-                    ORDER BY date_key DESC
-                    LIMIT 1
-                """, (stock_key,))
-                
-                existing_analysis = cur.fetchone()
-            finally:
-                cur.close()
-                conn.close()
+            existing_analysis = await db.get_last_analysis(stock_key)
             
-            # If no analysis exists, run immediate analysis regardless of schedule
+            # If no analysis exists, queue an initial analysis ahead of everything else
             if not existing_analysis:
-                logger.info(f"🚀 PRIORITY: No analysis found for {company_name} ({stock_symbol}) - running immediate initial analysis")
-                try:
-                    success = await ai_analysis(company_name, analyzer_app, stock_symbol)
-                except asyncio.TimeoutError:
-                    logger.warning(
-                        f"Initial analysis timed out for {company_name} ({stock_symbol}); skipping retries for this run"
+                logger.info(f"🚀 PRIORITY: No analysis found for {company_name} ({stock_symbol}) - queueing immediate initial analysis")
+                jobs.append(
+                    AnalysisJob(
+                        symbol=stock_symbol,
+                        company_name=company_name,
+                        stock_key=stock_key,
+                        tier=TIER_INITIAL,
+                        reason="initial",
                     )
-                    success = False
-
-                if success:
-                    # Get the newly created analysis ID using fresh connection
-                    conn = get_db_connection()
-                    cur = conn.cursor()
-                    try:
-                        cur.execute("""
-                            SELECT analysis_id 
-                            FROM fact_ai_stock_analysis 
-                            WHERE stock_key = %s
-                            ORDER BY date_key DESC
-                            LIMIT 1
-                        """, (stock_key,))
-                        
-                        new_analysis = cur.fetchone()
-                        if new_analysis:
-                            update_schedule_with_catalysts(stock_key_str, company_name, stock_symbol, 
-                                                          new_analysis[0], cur)
-                            _mark_completed_today(stock_key)
-                    finally:
-                        cur.close()
-                        conn.close()
-                continue  # Move to next stock since we just did the analysis
+                )
+                continue
             
             # Analysis exists - now check scheduling logic
-            if stock_key_str not in schedule:
+            if int(stock_key) not in scheduled_stocks:
                 # Analysis exists but no schedule, create schedule from existing catalysts
-                analysis_id = existing_analysis[0]
-                conn = get_db_connection()
-                cur = conn.cursor()
-                try:
-                    update_schedule_with_catalysts(stock_key_str, company_name, stock_symbol, 
-                                                  analysis_id, cur)
-                    logger.info(f"Initialized schedule from catalysts for {company_name} ({stock_symbol})")
-                finally:
-                    cur.close()
-                    conn.close()
+                await update_schedule_with_catalysts(stock_key, company_name, stock_symbol, existing_analysis[0])
+                logger.info(f"Initialized schedule from catalysts for {company_name} ({stock_symbol})")
             else:
                 # Check if today is a scheduled analysis date
-                scheduled_dates = schedule[stock_key_str]['analysis_dates']
-                
-                if current_date in scheduled_dates and not _already_completed_today(stock_key):
-                    logger.info(f"Running scheduled analysis for {company_name} ({stock_symbol}) on {current_date}")
+                if int(stock_key) in due_today and not _already_completed_today(stock_key):
                     # DB guard: skip if last analysis within N-day window
                     try:
                         skip_window = int(getattr(Settings(), "sentiment_skip_if_within_days", 1) or 1)
                     except Exception:
                         skip_window = 1
+                    last_date_key = existing_analysis[1]
                     try:
-                        conn2 = get_db_connection()
-                        cur2 = conn2.cursor()
-                        try:
-                            cur2.execute(
-                                "SELECT MAX(date_key) FROM fact_ai_stock_analysis WHERE stock_key = %s",
-                                (stock_key,),
-                            )
-                            last_date_key = cur2.fetchone()[0]
-                        finally:
-                            cur2.close()
-                            conn2.close()
                         if last_date_key:
                             last_date = datetime.strptime(str(last_date_key), "%Y%m%d").date()
                             delta_days = (current_date - last_date).days
@@ -1272,48 +1222,55 @@ async def check_stock_analyses(analyzer_app):
                                 logger.info(
                                     f"Skipping scheduled analysis for {company_name} ({stock_symbol}): last run {delta_days} days ago (< {max(skip_window,1)}d)"
                                 )
-                                remove_date_from_schedule(stock_key_str, current_date)
+                                await store.complete(stock_key, current_date, status="skipped")
                                 skipped_recent += 1
                                 continue
                     except Exception:
                         pass
-                    try:
-                        success = await ai_analysis(company_name, analyzer_app, stock_symbol)
-                    except asyncio.TimeoutError:
-                        logger.warning(
-                            f"Scheduled analysis timed out for {company_name} ({stock_symbol}); skipping retries for this run"
+                    logger.info(f"Queueing scheduled analysis for {company_name} ({stock_symbol}) on {current_date}")
+                    jobs.append(
+                        AnalysisJob(
+                            symbol=stock_symbol,
+                            company_name=company_name,
+                            stock_key=stock_key,
+                            catalyst_date=nearest_catalyst.get(int(stock_key)),
+                            tier=TIER_SCHEDULED,
+                            reason="scheduled",
                         )
-                        success = False
-
-                    if success:
-                        # Get the newly created analysis ID using fresh connection
-                        conn = get_db_connection()
-                        cur = conn.cursor()
-                        try:
-                            cur.execute("""
-                                SELECT analysis_id 
-                                FROM fact_ai_stock_analysis 
-                                WHERE stock_key = %s
-                                ORDER BY date_key DESC
-                                LIMIT 1
-                            """, (stock_key,))
-                            
-                            new_analysis = cur.fetchone()
-                            if new_analysis:
-                                # Update schedule with new catalyst dates
-                                update_schedule_with_catalysts(stock_key_str, company_name, stock_symbol, 
-                                                              new_analysis[0], cur)
-                        finally:
-                            cur.close()
-                            conn.close()
-                                
-                        # Remove today's date from schedule since we've completed it
-                        remove_date_from_schedule(stock_key_str, current_date)
-                        _mark_completed_today(stock_key)
-                        processed_count += 1
+                    )
         except Exception as e:
             logger.error(f"Error processing stock {company_name} ({stock_symbol}): {e}")
             # Continue with next stock instead of failing the entire process
+
+    async def _handle(job: AnalysisJob) -> bool:
+        scheduled = job.tier == TIER_SCHEDULED
+        # Claim today's entry so concurrent analyzer workers never run the same stock
+        if scheduled and not await store.claim(job.stock_key, current_date):
+            logger.info(f"Skipping {job.symbol}: schedule entry claimed by another worker")
+            return False
+        logger.info(f"Running {job.reason} analysis for {job.company_name} ({job.symbol})")
+        try:
+            success = await _run_analysis_guarded(job, analyzer_app)
+        except BaseException:
+            if scheduled:
+                await asyncio.shield(store.release(job.stock_key, current_date))
+            raise
+        if not success:
+            if scheduled:
+                await store.release(job.stock_key, current_date)
+            return False
+        # Update schedule with catalyst dates from the newly created analysis
+        new_analysis = await db.get_last_analysis(job.stock_key)
+        if new_analysis:
+            await update_schedule_with_catalysts(job.stock_key, job.company_name, job.symbol, new_analysis[0])
+        if scheduled:
+            # Mark today's entry done
+            await store.complete(job.stock_key, current_date)
+        _mark_completed_today(job.stock_key)
+        return True
+
+    results = await scheduler_from_settings(settings, logger=logger).run(jobs, _handle)
+    processed_count = sum(1 for r in results if r.success)
     try:
         logger.info(
             f"Scheduled check summary: processed={processed_count}, skipped_recent={skipped_recent}, total_stocks={len(stocks)}"
@@ -1370,7 +1327,7 @@ async def async_main(symbol: str | None = None, force: bool = False):
         logger.warning(f"Could not initialize file logging: {e}")
 
     logger.info("Starting scheduled stock analysis system...")
-    logger.info(f"Schedule file location: {SCHEDULE_FILE}")
+    logger.info("Schedule store: rankalpha.fact_ai_analysis_schedule")
     
     # Ensure SEC_EDGAR_USER_AGENT is exported for MCP subprocesses
     try:
@@ -1404,10 +1361,17 @@ async def async_main(symbol: str | None = None, force: bool = False):
         logging.getLogger("mcp_agent").setLevel(logging.DEBUG)
         logger.info("OpenAI debug logging enabled (OPENAI_LOG=debug, OPENAI_DEBUG=true)")
     
-    # Clean up any existing schedule to ensure no duplicates
-    if SCHEDULE_FILE.exists():
-        logger.info("Cleaning existing schedule to ensure no duplicate dates...")
-        clean_schedule()
+    # One-time migration of a legacy JSON schedule, then expire entries from past days
+    try:
+        store = get_schedule_store(settings)
+        if SCHEDULE_FILE.exists():
+            logger.info(f"Importing legacy schedule file {SCHEDULE_FILE} into the database...")
+            await store.import_json(SCHEDULE_FILE)
+        expired = await store.expire_past()
+        if expired:
+            logger.info(f"Expired {expired} schedule entries from previous days")
+    except Exception as e:
+        logger.warning(f"Could not prepare analysis schedule: {e}")
     
     # Create a single MCPApp instance to be reused for all analyses
     app = MCPApp(name="unified_stock_analyzer", human_input_callback=None)
@@ -1540,42 +1504,10 @@ async def async_main(symbol: str | None = None, force: bool = False):
             settings = Settings()
             # In planner dry-run mode, skip all database I/O and go straight to analysis
             # no dry-run: always use database path
-
-            def get_db_connection():
-                max_retries = 3
-                for attempt in range(max_retries):
-                    try:
-                        return psycopg2.connect(
-                            database=settings.database_name,
-                            user=settings.db_username,
-                            password=settings.password,
-                            host=settings.host,
-                            port=settings.port,
-                            connect_timeout=30,
-                        )
-                    except psycopg2.OperationalError as e:
-                        if attempt == max_retries - 1:
-                            logger.error(
-                                f"Failed to connect to database after {max_retries} attempts: {e}"
-                            )
-                            raise
-                        logger.warning(
-                            f"Database connection attempt {attempt + 1} failed, retrying: {e}"
-                        )
-                        time.sleep(2 ** attempt)
+            db = get_sentiment_db(settings)
 
             # Lookup stock by symbol
-            conn = get_db_connection()
-            cur = conn.cursor()
-            try:
-                cur.execute(
-                    "SELECT stock_key, company_name FROM dim_stock WHERE symbol = %s AND is_active IS TRUE",
-                    (symbol,),
-                )
-                row = cur.fetchone()
-            finally:
-                cur.close()
-                conn.close()
+            row = await db.get_stock(symbol)
 
             if not row:
                 logger.error(f"Symbol not found in dim_stock: {symbol}")
@@ -1585,26 +1517,10 @@ async def async_main(symbol: str | None = None, force: bool = False):
 
             # If not forced, skip if we already ran recently (within N days)
             if not force:
-                conn = get_db_connection()
-                cur = conn.cursor()
-                try:
-                    cur.execute(
-                        """
-                        SELECT date_key
-                        FROM fact_ai_stock_analysis
-                        WHERE stock_key = %s
-                        ORDER BY date_key DESC
-                        LIMIT 1
-                        """,
-                        (stock_key,),
-                    )
-                    last = cur.fetchone()
-                finally:
-                    cur.close()
-                    conn.close()
+                last = await db.get_last_analysis(stock_key)
 
                 if last:
-                    last_date_key = last[0]
+                    last_date_key = last[1]
                     if last_date_key:
                         try:
                             skip_window = int(getattr(Settings(), "sentiment_skip_if_within_days", 1) or 1)
@@ -1643,27 +1559,9 @@ async def async_main(symbol: str | None = None, force: bool = False):
 
             if success:
                 # Update schedule based on catalysts from the latest analysis
-                conn = get_db_connection()
-                cur = conn.cursor()
-                try:
-                    cur.execute(
-                        """
-                        SELECT analysis_id
-                        FROM fact_ai_stock_analysis
-                        WHERE stock_key = %s
-                        ORDER BY date_key DESC
-                        LIMIT 1
-                        """,
-                        (stock_key,),
-                    )
-                    new_analysis = cur.fetchone()
-                    if new_analysis:
-                        update_schedule_with_catalysts(
-                            str(stock_key), company_name, symbol, new_analysis[0], cur
-                        )
-                finally:
-                    cur.close()
-                    conn.close()
+                new_analysis = await db.get_last_analysis(stock_key)
+                if new_analysis:
+                    await update_schedule_with_catalysts(stock_key, company_name, symbol, new_analysis[0])
                 _mark_completed_today(stock_key)
             return
 
@@ -1684,8 +1582,8 @@ async def async_main(symbol: str | None = None, force: bool = False):
                 if bool(getattr(settings, "sentiment_use_consensus", False)) and int(getattr(settings, "sentiment_consensus_limit", 0) or 0) > 0:
                     logger.info("Running daily consensus batch")
                     await _run_consensus_once()
-                # Clean schedule periodically to ensure consistency
-                clean_schedule()
+                # Expire entries from previous days that were never run
+                await get_schedule_store(settings).expire_past()
                 await check_stock_analyses(analyzer_app)
             except Exception as e:
                 logger.error(f"Error in daily check: {e}")
@@ -1750,6 +1648,8 @@ def main():
     except KeyboardInterrupt:
         logger = get_logger(__name__)
         logger.info("Shutting down scheduled stock analysis system...")
+    finally:
+        close_sentiment_db()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,204 @@
+"""Database-backed analysis schedule (rankalpha.fact_ai_analysis_schedule).
+
+Replaces the analysis_schedule.json file. Each mutation touches only the rows
+it concerns, and `(stock_key, scheduled_date)` is unique so a stock is never
+analyzed twice on the same day. Workers `claim` a row before running it; the
+UPDATE ... WHERE status = 'pending' is atomic, so several analyzer processes
+can share one schedule. Claims older than the claim TTL are considered
+abandoned (e.g. a crashed worker) and may be claimed again.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import socket
+from datetime import date, datetime
+from pathlib import Path
+from typing import Optional
+
+from psycopg2.extras import execute_values
+
+from apps.common.src.logging import get_logger
+
+# Analysis dates derived from each catalyst's expected date (days offset)
+CATALYST_OFFSETS_DAYS = (-7, 1, 7)
+
+
+class ScheduleStore:
+    def __init__(self, db, worker_id: Optional[str] = None, claim_ttl_seconds: int = 7200) -> None:
+        self.db = db
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+        self.claim_ttl_seconds = int(claim_ttl_seconds)
+        self.logger = get_logger(__name__)
+
+    async def scheduled_stock_keys(self, today: Optional[date] = None) -> set[int]:
+        """Stocks whose schedule is initialised: open rows from `today` on, or an init marker.
+
+        Bounded by the open rows and the number of stocks rather than the whole
+        schedule history; stocks without catalyst dates carry only the marker.
+        """
+        today = today or datetime.now().date()
+        rows = await self.db.fetchall(
+            """
+            SELECT stock_key
+            FROM fact_ai_analysis_schedule
+            WHERE status IN ('pending', 'claimed')
+              AND scheduled_date >= %s
+            UNION
+            SELECT stock_key FROM fact_ai_analysis_schedule_init
+            """,
+            (today,),
+        )
+        return {int(r[0]) for r in rows}
+
+    async def mark_initialised(self, stock_key: int, analysis_id=None) -> None:
+        """Record that `stock_key`'s schedule was initialised (even if no dates were added)."""
+        await self.db.fetchall(
+            """
+            INSERT INTO fact_ai_analysis_schedule_init (stock_key, analysis_id)
+            VALUES (%s, %s)
+            ON CONFLICT (stock_key) DO UPDATE
+            SET analysis_id = EXCLUDED.analysis_id, initialised_at = now()
+            RETURNING stock_key
+            """,
+            (stock_key, analysis_id),
+        )
+
+    async def due(self, day: date) -> dict[int, str]:
+        """Open schedule rows for `day` as {stock_key: reason} (index range scan)."""
+        rows = await self.db.fetchall(
+            """
+            SELECT stock_key, reason
+            FROM fact_ai_analysis_schedule
+            WHERE scheduled_date = %s
+              AND status IN ('pending', 'claimed')
+            """,
+            (day,),
+        )
+        return {int(r[0]): r[1] for r in rows}
+
+    async def claim(self, stock_key: int, day: date) -> bool:
+        """Atomically take ownership of a due row; False if another worker holds it."""
+        row = await self.db.fetchone(
+            """
+            UPDATE fact_ai_analysis_schedule
+            SET status = 'claimed', claimed_by = %s, claimed_at = now()
+            WHERE stock_key = %s
+              AND scheduled_date = %s
+              AND (
+                status = 'pending'
+                OR (status = 'claimed' AND claimed_at < now() - make_interval(secs => %s))
+              )
+            RETURNING schedule_id
+            """,
+            (self.worker_id, stock_key, day, self.claim_ttl_seconds),
+        )
+        return row is not None
+
+    async def complete(self, stock_key: int, day: date, status: str = "done") -> None:
+        """Close the row for `day` (done or skipped); no-op if the stock isn't scheduled then."""
+        await self.db.fetchall(
+            """
+            UPDATE fact_ai_analysis_schedule
+            SET status = %s, completed_at = now()
+            WHERE stock_key = %s AND scheduled_date = %s AND status IN ('pending', 'claimed')
+            RETURNING schedule_id
+            """,
+            (status, stock_key, day),
+        )
+
+    async def release(self, stock_key: int, day: date) -> None:
+        """Return a claimed row to pending after a failed run."""
+        await self.db.fetchall(
+            """
+            UPDATE fact_ai_analysis_schedule
+            SET status = 'pending', claimed_by = NULL, claimed_at = NULL
+            WHERE stock_key = %s AND scheduled_date = %s AND status = 'claimed' AND claimed_by = %s
+            RETURNING schedule_id
+            """,
+            (stock_key, day, self.worker_id),
+        )
+
+    async def add_from_catalysts(self, stock_key: int, analysis_id, today: Optional[date] = None) -> int:
+        """Schedule follow-up analyses around each catalyst of `analysis_id`.
+
+        Adds expected_date -7d, +1d and +7d (future dates only); existing dates are
+        left untouched, so there is at most one analysis per stock per day. The
+        stock is marked initialised either way.
+        """
+        today = today or datetime.now().date()
+        rows = await self.db.fetchall(
+            """
+            INSERT INTO fact_ai_analysis_schedule (stock_key, scheduled_date, reason)
+            SELECT DISTINCT %s, (c.expected_date + v.offset_days), 'catalyst'
+            FROM fact_ai_catalyst c
+            CROSS JOIN UNNEST(%s::int[]) AS v(offset_days)
+            WHERE c.analysis_id = %s
+              AND c.expected_date IS NOT NULL
+              AND c.expected_date + v.offset_days >= %s
+            ON CONFLICT (stock_key, scheduled_date) DO NOTHING
+            RETURNING scheduled_date
+            """,
+            (stock_key, list(CATALYST_OFFSETS_DAYS), analysis_id, today),
+        )
+        await self.mark_initialised(stock_key, analysis_id)
+        return len(rows)
+
+    async def expire_past(self, today: Optional[date] = None) -> int:
+        """Mark open rows from earlier days as expired (they were never run)."""
+        today = today or datetime.now().date()
+        rows = await self.db.fetchall(
+            """
+            UPDATE fact_ai_analysis_schedule
+            SET status = 'expired', completed_at = now()
+            WHERE scheduled_date < %s AND status IN ('pending', 'claimed')
+            RETURNING schedule_id
+            """,
+            (today,),
+        )
+        return len(rows)
+
+    async def import_json(self, path: Path, today: Optional[date] = None) -> int:
+        """One-time migration from the legacy analysis_schedule.json file.
+
+        Future dates are inserted with reason 'imported'; the file is then renamed
+        to `*.migrated` so the import does not run again.
+        """
+        path = Path(path)
+        if not path.exists():
+            return 0
+        today = today or datetime.now().date()
+        with open(path, "r") as f:
+            data = json.load(f)
+        values = []
+        for stock_key_str, info in (data or {}).items():
+            for date_str in set(info.get("analysis_dates") or []):
+                try:
+                    d = datetime.strptime(date_str, "%Y-%m-%d").date()
+                except Exception:
+                    continue
+                if d >= today:
+                    values.append((int(stock_key_str), d, "imported"))
+
+        def _insert(cur):
+            if values:
+                execute_values(
+                    cur,
+                    "INSERT INTO fact_ai_analysis_schedule (stock_key, scheduled_date, reason) VALUES %s "
+                    "ON CONFLICT (stock_key, scheduled_date) DO NOTHING",
+                    values,
+                )
+
+        await self.db.run(_insert)
+        path.rename(path.with_name(path.name + ".migrated"))
+        self.logger.info(f"Imported {len(values)} scheduled dates from {path} into fact_ai_analysis_schedule")
+        return len(values)
+
+
+def schedule_store_from_settings(db, settings) -> ScheduleStore:
+    ttl = getattr(settings, "sentiment_schedule_claim_ttl_seconds", None)
+    if not ttl:
+        # Must outlive any single analysis run
+        ttl = 2 * int(getattr(settings, "sentiment_orchestrator_timeout_seconds", None) or 600) + 600
+    return ScheduleStore(db, claim_ttl_seconds=int(ttl))
@@ -0,0 +1,251 @@
+"""Pooled database access for the sentiment service.
+
+A single psycopg2 `ThreadedConnectionPool` is shared by the whole process and
+sized to the analysis scheduler's concurrency. Async helpers run their queries
+on a worker thread via `asyncio.to_thread`, so DB round-trips never block the
+event loop that drives concurrent analyses, and connections are reused instead
+of paying a TCP + auth handshake per lookup.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import threading
+import time
+from datetime import date, datetime, timedelta
+from typing import Any, Callable, Iterator, Optional, Sequence, TypeVar
+
+import psycopg2
+from psycopg2.pool import ThreadedConnectionPool
+
+from apps.common.src.logging import get_logger
+from apps.common.src.settings import Settings
+
+T = TypeVar("T")
+
+
+class SentimentDB:
+    """Connection pool plus the handful of queries the analyzer needs."""
+
+    def __init__(self, settings: Settings, minconn: int = 1, maxconn: int = 4) -> None:
+        self.settings = settings
+        self.minconn = max(0, int(minconn))
+        self.maxconn = max(1, int(maxconn), self.minconn)
+        self.logger = get_logger(__name__)
+        self._pool: Optional[ThreadedConnectionPool] = None
+        self._pool_lock = threading.Lock()
+        # ThreadedConnectionPool raises when exhausted; this makes callers wait instead
+        self._slots = threading.BoundedSemaphore(self.maxconn)
+
+    # ---- pool lifecycle ---------------------------------------------------
+    def _create_pool(self) -> ThreadedConnectionPool:
+        max_retries = 3
+        for attempt in range(max_retries):
+            try:
+                return ThreadedConnectionPool(
+                    self.minconn,
+                    self.maxconn,
+                    database=self.settings.database_name,
+                    user=self.settings.db_username,
+                    password=self.settings.password,
+                    host=self.settings.host,
+                    port=self.settings.port,
+                    connect_timeout=30,
+                )
+            except psycopg2.OperationalError as e:
+                if attempt == max_retries - 1:
+                    self.logger.error(f"Failed to create DB pool after {max_retries} attempts: {e}")
+                    raise
+                self.logger.warning(f"DB pool connect attempt {attempt + 1} failed, retrying: {e}")
+                time.sleep(2 ** attempt)
+        raise RuntimeError("unreachable")
+
+    def _get_pool(self) -> ThreadedConnectionPool:
+        if self._pool is None:
+            with self._pool_lock:
+                if self._pool is None:
+                    self._pool = self._create_pool()
+                    self.logger.info(f"Sentiment DB pool ready (min={self.minconn}, max={self.maxconn})")
+        return self._pool
+
+    def close(self) -> None:
+        with self._pool_lock:
+            if self._pool is not None:
+                try:
+                    self._pool.closeall()
+                except Exception:
+                    pass
+                self._pool = None
+
+    @contextlib.contextmanager
+    def connection(self) -> Iterator[Any]:
+        """Borrow a pooled connection; commit on success, roll back on error."""
+        pool = self._get_pool()
+        self._slots.acquire()
+        conn = None
+        broken = False
+        try:
+            conn = pool.getconn()
+            try:
+                yield conn
+                conn.commit()
+            except Exception as e:
+                broken = isinstance(e, (psycopg2.OperationalError, psycopg2.InterfaceError)) or bool(conn.closed)
+                if not conn.closed:
+                    with contextlib.suppress(Exception):
+                        conn.rollback()
+                raise
+        finally:
+            if conn is not None:
+                with contextlib.suppress(Exception):
+                    pool.putconn(conn, close=broken or bool(conn.closed))
+            self._slots.release()
+
+    def run_sync(self, fn: Callable[..., T], *args: Any) -> T:
+        """Call `fn(cursor, *args)` inside one pooled transaction."""
+        with self.connection() as conn:
+            cur = conn.cursor()
+            try:
+                return fn(cur, *args)
+            finally:
+                cur.close()
+
+    async def run(self, fn: Callable[..., T], *args: Any) -> T:
+        """Async form of `run_sync`; executes on a worker thread."""
+        return await asyncio.to_thread(self.run_sync, fn, *args)
+
+    # ---- generic helpers --------------------------------------------------
+    async def fetchall(self, query: str, params: Sequence[Any] = ()) -> list[tuple]:
+        def _q(cur):
+            cur.execute(query, tuple(params))
+            return cur.fetchall()
+
+        return await self.run(_q)
+
+    async def fetchone(self, query: str, params: Sequence[Any] = ()) -> Optional[tuple]:
+        def _q(cur):
+            cur.execute(query, tuple(params))
+            return cur.fetchone()
+
+        return await self.run(_q)
+
+    # ---- analyzer queries -------------------------------------------------
+    async def get_stock(self, symbol: str) -> Optional[tuple[int, str]]:
+        """Return (stock_key, company_name) for an active symbol, or None."""
+        row = await self.fetchone(
+            "SELECT stock_key, company_name FROM dim_stock WHERE UPPER(symbol) = %s AND is_active IS TRUE",
+            (str(symbol).upper(),),
+        )
+        return (int(row[0]), row[1]) if row else None
+
+    async def get_stock_key(self, symbol: str) -> Optional[int]:
+        row = await self.get_stock(symbol)
+        return row[0] if row else None
+
+    async def get_last_analysis(self, stock_key: int) -> Optional[tuple[Any, int]]:
+        """Return (analysis_id, date_key) of the latest analysis for a stock, or None."""
+        return await self.fetchone(
+            """
+            SELECT analysis_id, date_key
+            FROM fact_ai_stock_analysis
+            WHERE stock_key = %s
+            ORDER BY date_key DESC
+            LIMIT 1
+            """,
+            (stock_key,),
+        )
+
+    async def get_last_analysis_date(self, stock_key: int) -> Optional[int]:
+        row = await self.get_last_analysis(stock_key)
+        return int(row[1]) if row and row[1] is not None else None
+
+    async def get_price_change(self, stock_key: int, since_date_key: int) -> tuple[Optional[float], Optional[float]]:
+        """(close on/before `since_date_key`, latest close) from fact_security_price."""
+        row = await self.fetchone(
+            """
+            SELECT
+              (SELECT close_px FROM fact_security_price
+                WHERE stock_key = %s AND date_key <= %s ORDER BY date_key DESC LIMIT 1),
+              (SELECT close_px FROM fact_security_price
+                WHERE stock_key = %s ORDER BY date_key DESC LIMIT 1)
+            """,
+            (stock_key, since_date_key, stock_key),
+        )
+        if not row:
+            return None, None
+        return (
+            float(row[0]) if row[0] is not None else None,
+            float(row[1]) if row[1] is not None else None,
+        )
+
+    async def get_consensus_candidates(
+        self,
+        limit: int,
+        skip_if_within_days: int = 1,
+        min_appearances: int = 0,
+        min_styles: int = 0,
+        today: Optional[date] = None,
+    ) -> list[tuple[str, str, int, Any, Optional[int]]]:
+        """Consensus symbols due for analysis, in one set-based query.
+
+        Joins the consensus view to dim_stock (case-insensitive symbol match, as
+        the per-symbol lookup did) and each stock's latest analysis date (an
+        index probe on (stock_key, date_key)) and drops stocks analyzed within
+        the skip window, so LIMIT counts only real candidates.
+        Returns (symbol, company_name, stock_key, consensus_score, last_date_key).
+        """
+        today = today or datetime.now().date()
+        window = max(int(skip_if_within_days or 1), 1)
+        cutoff_key = int((today - timedelta(days=window)).strftime("%Y%m%d"))
+        query = """
+            SELECT UPPER(c.symbol), c.company_name, ds.stock_key, c.consensus_score, la.last_date_key
+            FROM v_latest_screener_consensus c
+            JOIN dim_stock ds ON UPPER(ds.symbol) = UPPER(c.symbol)
+            LEFT JOIN LATERAL (
+                SELECT MAX(a.date_key) AS last_date_key
+                FROM fact_ai_stock_analysis a
+                WHERE a.stock_key = ds.stock_key
+            ) la ON TRUE
+            WHERE (la.last_date_key IS NULL OR la.last_date_key <= %s)
+        """
+        params: list[Any] = [cutoff_key]
+        if min_appearances > 0:
+            query += " AND c.appearances >= %s"
+            params.append(min_appearances)
+        if min_styles > 0:
+            query += " AND c.styles_distinct >= %s"
+            params.append(min_styles)
+        query += " ORDER BY c.consensus_score DESC LIMIT %s"
+        params.append(int(limit))
+        return await self.fetchall(query, params)
+
+    async def insert(self, insert_fn: Callable[..., T], *args: Any) -> T:
+        """Run a multi-statement insert (`insert_fn(cursor, ...)`) in one transaction."""
+        return await self.run(insert_fn, *args)
+
+
+_DB: Optional[SentimentDB] = None
+
+
+def get_sentiment_db(settings: Optional[Settings] = None) -> SentimentDB:
+    """Return the process-wide pool, creating it on first use.
+
+    The pool holds one connection per concurrent analysis plus headroom for the
+    scheduler's own lookups, unless SENTIMENT_DB_POOL_MAX overrides it.
+    """
+    global _DB
+    if _DB is None:
+        s = settings or Settings()
+        concurrency = int(getattr(s, "sentiment_analysis_concurrency", 1) or 1)
+        maxconn = int(getattr(s, "sentiment_db_pool_max", None) or (concurrency + 2))
+        minconn = int(getattr(s, "sentiment_db_pool_min", 1) or 1)
+        _DB = SentimentDB(s, minconn=min(minconn, maxconn), maxconn=maxconn)
+    return _DB
+
+
+def close_sentiment_db() -> None:
+    global _DB
+    if _DB is not None:
+        _DB.close()
+        _DB = None
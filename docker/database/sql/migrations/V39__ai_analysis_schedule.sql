@@ -0,0 +1,31 @@
+/* ------------------------------------------------------------
+   V39__ai_analysis_schedule.sql
+   Catalyst-driven AI analysis schedule, replacing the sentiment
+   service's analysis_schedule.json file. One row per stock per
+   day; workers claim rows atomically before running them.
+   ------------------------------------------------------------ */
+
+SET search_path = rankalpha, public;
+
+CREATE TABLE IF NOT EXISTS rankalpha.fact_ai_analysis_schedule (
+    schedule_id     BIGSERIAL PRIMARY KEY,
+    stock_key       INT          NOT NULL REFERENCES rankalpha.dim_stock(stock_key),
+    scheduled_date  DATE         NOT NULL,
+    reason          VARCHAR(32)  NOT NULL DEFAULT 'catalyst',
+    status          VARCHAR(16)  NOT NULL DEFAULT 'pending'
+                    CHECK (status IN ('pending', 'claimed', 'done', 'skipped', 'expired')),
+    claimed_by      TEXT,
+    claimed_at      TIMESTAMPTZ,
+    completed_at    TIMESTAMPTZ,
+    created_at      TIMESTAMPTZ  NOT NULL DEFAULT now(),
+    CONSTRAINT uq_ai_analysis_schedule_stock_date UNIQUE (stock_key, scheduled_date)
+);
+
+-- Due-today lookups: index range scan over open rows for a single date
+CREATE INDEX IF NOT EXISTS idx_ai_analysis_schedule_due
+  ON rankalpha.fact_ai_analysis_schedule (scheduled_date, stock_key)
+  WHERE status IN ('pending', 'claimed');
+
+/* ------------------------------------------------------------
+   END OF FILE
+   ------------------------------------------------------------ */
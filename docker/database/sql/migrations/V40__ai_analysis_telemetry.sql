@@ -0,0 +1,43 @@
+/* ------------------------------------------------------------
+   V40__ai_analysis_telemetry.sql
+   Per-analysis telemetry from the sentiment service: wall time
+   per agent step, OpenAI latency and tokens, tool calls and
+   latency per MCP server, tool-cache hits and PDF extraction.
+   analysis_id is NULL for analyses that produced no report.
+   ------------------------------------------------------------ */
+
+SET search_path = rankalpha, public;
+
+CREATE TABLE IF NOT EXISTS rankalpha.fact_ai_analysis_telemetry (
+    telemetry_id      BIGSERIAL PRIMARY KEY,
+    analysis_id       UUID,
+    run_id            VARCHAR(64)   NOT NULL,
+    success           BOOLEAN       NOT NULL DEFAULT FALSE,
+    started_at        TIMESTAMPTZ   NOT NULL,
+    wall_seconds      NUMERIC(10,3),
+    openai_calls      INT           NOT NULL DEFAULT 0,
+    openai_seconds    NUMERIC(10,3) NOT NULL DEFAULT 0,
+    input_tokens      BIGINT        NOT NULL DEFAULT 0,
+    output_tokens     BIGINT        NOT NULL DEFAULT 0,
+    reasoning_tokens  BIGINT        NOT NULL DEFAULT 0,
+    tool_calls        INT           NOT NULL DEFAULT 0,
+    tool_errors       INT           NOT NULL DEFAULT 0,
+    tool_seconds      NUMERIC(10,3) NOT NULL DEFAULT 0,
+    cache_hits        INT           NOT NULL DEFAULT 0,
+    cache_misses      INT           NOT NULL DEFAULT 0,
+    pdf_extractions   INT           NOT NULL DEFAULT 0,
+    pdf_seconds       NUMERIC(10,3) NOT NULL DEFAULT 0,
+    steps             JSONB         NOT NULL DEFAULT '{}'::jsonb,  -- agent -> {calls, seconds}
+    tools             JSONB         NOT NULL DEFAULT '{}'::jsonb,  -- server -> {calls, errors, seconds, max_seconds}
+    created_at        TIMESTAMPTZ   NOT NULL DEFAULT now()
+);
+
+CREATE INDEX IF NOT EXISTS idx_ai_analysis_telemetry_analysis
+  ON rankalpha.fact_ai_analysis_telemetry (analysis_id);
+
+CREATE INDEX IF NOT EXISTS idx_ai_analysis_telemetry_started
+  ON rankalpha.fact_ai_analysis_telemetry (started_at DESC);
+
+/* ------------------------------------------------------------
+   END OF FILE
+   ------------------------------------------------------------ */
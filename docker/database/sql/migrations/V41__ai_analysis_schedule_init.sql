@@ -0,0 +1,29 @@
+/* ------------------------------------------------------------
+   V41__ai_analysis_schedule_init.sql
+   Per-stock "schedule initialised" marker, so stocks whose
+   analyses produced no future catalyst dates are not
+   re-initialised on every daily check, and an index for the
+   open/future-row lookup that replaces the full-table
+   SELECT DISTINCT stock_key.
+   ------------------------------------------------------------ */
+
+SET search_path = rankalpha, public;
+
+CREATE TABLE IF NOT EXISTS rankalpha.fact_ai_analysis_schedule_init (
+    stock_key       INT          PRIMARY KEY REFERENCES rankalpha.dim_stock(stock_key),
+    analysis_id     UUID,
+    initialised_at  TIMESTAMPTZ  NOT NULL DEFAULT now()
+);
+
+-- Stocks that already had schedule rows were initialised before this marker existed
+INSERT INTO rankalpha.fact_ai_analysis_schedule_init (stock_key)
+SELECT DISTINCT stock_key FROM rankalpha.fact_ai_analysis_schedule
+ON CONFLICT (stock_key) DO NOTHING;
+
+-- Open-row lookups by status and date range (index-only scan with stock_key)
+CREATE INDEX IF NOT EXISTS idx_ai_analysis_schedule_status_date
+  ON rankalpha.fact_ai_analysis_schedule (status, scheduled_date, stock_key);
+
+/* ------------------------------------------------------------
+   END OF FILE
+   ------------------------------------------------------------ */
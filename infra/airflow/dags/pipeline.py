@@ -67,6 +67,44 @@ def merge_env(base: dict, names: list[str]) -> dict:
             merged[n] = v
     return merged
 
+# Pages the frontend opens first after a refresh; query strings must match the
+# frontend's exactly since they are part of the HTTP cache key
+DEFAULT_WARM_PATHS = [
+    "/api/v1/grading/grades?limit=20&skip=0&sort_by=grade&sort_order=desc",
+    "/api/v1/grading/grades?limit=1&skip=0&min_grade=A&max_grade=A&sort_by=grade&sort_order=desc",
+    "/api/v1/grading/grades?limit=1&skip=0&min_grade=F&max_grade=F&sort_by=grade&sort_order=desc",
+    "/api/v1/grading/grades?limit=1&skip=0&min_grade=F&max_grade=A&sort_by=grade&sort_order=desc",
+    "/api/v1/grading/sectors",
+    "/api/v1/signals/leaderboard",
+    "/api/v1/screener/consensus",
+    "/api/v1/pipeline/health",
+]
+
+def warm_api_cache():
+    """Request the hot leaderboard pages once so the API's HTTP cache is filled
+    before users arrive (each page is computed once thanks to single-flight).
+    Best effort: failures are logged, never fail the DAG run."""
+    import urllib.request
+    from concurrent.futures import ThreadPoolExecutor
+
+    api_url = Variable.get("API_URL", default_var="http://api:6080").rstrip("/")
+    raw = Variable.get("API_WARM_PATHS", default_var="")
+    paths = [p.strip() for p in raw.replace("\n", ",").split(",") if p.strip()] or DEFAULT_WARM_PATHS
+
+    def fetch(path):
+        started = datetime.now()
+        try:
+            with urllib.request.urlopen(api_url + path, timeout=120) as resp:
+                resp.read()
+                status = resp.status
+        except Exception as exc:
+            status = f"failed: {exc}"
+        return path, status, (datetime.now() - started).total_seconds()
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        for path, status, secs in pool.map(fetch, paths):
+            print(f"[warm] {path} -> {status} in {secs:.2f}s")
+
 ingestion = DockerOperator(
     task_id='run_ingestion',
     image='rankalpha_ingestion',
@@ -182,6 +220,14 @@ update_grading = BashOperator(
     dag=dag,
 )
 
+# Warm the API's HTTP cache for the leaderboard pages right after the refresh
+warm_cache = PythonOperator(
+    task_id='warm_api_cache',
+    python_callable=warm_api_cache,
+    retries=0,
+    dag=dag,
+)
+
 # Fallback: refresh MV directly via psql if API is down
 refresh_mv_direct = DockerOperator(
     task_id='refresh_mv_direct',
@@ -225,7 +271,7 @@ notify_frontend = BashOperator(
 # 2. Then run scorer
 # 3. Run AI analysis in parallel with scorer (they can run simultaneously)
 # 4. After both scorer and AI analysis complete, update grading
-# 5. Finally notify frontend
+# 5. Finally notify frontend (and warm the API cache for the leaderboard pages)
 ingestion >> [scorer, ai_analysis] >> update_grading
-update_grading >> [notify_frontend, refresh_mv_direct]
+update_grading >> [notify_frontend, refresh_mv_direct, warm_cache]
 refresh_mv_direct >> notify_frontend
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Cold-start benchmark for the API service: eager vs lazy generic CRUD routers.
+
+Each sample imports `apps.api.src.main` in a fresh interpreter (as a new pod
+would) with API_LAZY_CRUD_ROUTERS set to false or true, and reports import
+time, peak RSS and the number of routes mounted at startup. It then measures
+the first request to a generic table route (which builds that router in lazy
+mode) and the first /openapi.json generation. No database or Redis is needed:
+the engine does not connect at import and the requests below fail fast.
+
+Usage:
+    python scripts/benchmark_api_startup.py --runs 5
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+
+CHILD = r"""
+import json, resource, sys, time
+t0 = time.perf_counter()
+import apps.api.src.main as m
+import_s = time.perf_counter() - t0
+routes = len(m.app.routes)
+rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+out = {"import_s": import_s, "routes": routes, "rss_mb": rss_mb}
+import asyncio
+import httpx
+
+async def timed_get(path):
+    transport = httpx.ASGITransport(app=m.app, raise_app_exceptions=False)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        t = time.perf_counter()
+        try:
+            await client.get(path)
+        except Exception:
+            pass
+        return time.perf_counter() - t
+
+# An invalid cursor is rejected before any query: routing + (lazy) router build only
+out["first_table_request_s"] = asyncio.run(timed_get("/dim_style/?cursor=!"))
+out["openapi_s"] = asyncio.run(timed_get("/openapi.json"))
+out["routes_after_openapi"] = len(m.app.routes)
+print(json.dumps(out))
+"""
+
+
+def sample(lazy: bool) -> dict:
+    env = dict(os.environ)
+    env["API_LAZY_CRUD_ROUTERS"] = "true" if lazy else "false"
+    # Placeholder connection settings; nothing connects during the benchmark, and
+    # the HTTP cache is off so a Redis connect timeout is not counted
+    env["HTTP_CACHE_ENABLED"] = "false"
+    for key, value in {
+        "DATABASE_NAME": "rankalpha", "DB_USERNAME": "bench", "PASSWORD": "bench",
+        "HOST": "127.0.0.1", "PORT": "5432", "REDIS_HOST": "127.0.0.1",
+    }.items():
+        env.setdefault(key, value)
+    proc = subprocess.run(
+        [sys.executable, "-c", CHILD], cwd=ROOT, env=env, capture_output=True, text=True, check=True
+    )
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="fresh interpreters per mode")
+    args = parser.parse_args()
+
+    print(f"{'mode':>6} {'import s':>9} {'rss MB':>7} {'routes':>7} {'1st req s':>10} {'openapi s':>10}")
+    for lazy in (False, True):
+        runs = [sample(lazy) for _ in range(args.runs)]
+        med = {k: statistics.median(r[k] for r in runs) for k in runs[0]}
+        print(
+            f"{'lazy' if lazy else 'eager':>6} {med['import_s']:>9.3f} {med['rss_mb']:>7.1f} {med['routes']:>7.0f} "
+            f"{med['first_table_request_s']:>10.3f} {med['openapi_s']:>10.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Offline throughput benchmark for the sentiment pipeline.
+
+Replays OpenAI/MCP traffic recorded with SENTIMENT_TRACE_MODE=record through the
+analysis scheduler at several concurrency levels. Each recorded analysis is
+re-run with its recorded latencies (scaled by --latency-scale, plus --latency-ms
+per call): model calls go through the provider rate limiter, a turn's tool calls
+run concurrently under the per-server cap and through an in-memory tool cache.
+No OpenAI key, MCP server or database is needed.
+
+Usage:
+    python scripts/benchmark_sentiment_replay.py /data/traces/sentiment_trace.jsonl \
+        --concurrency 1 2 4 8 --repeat 3
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from apps.sentiment.src.analysis_scheduler import AnalysisJob, AnalysisScheduler  # noqa: E402
+from apps.sentiment.src.llm.rate_limit import ProviderRateLimiter  # noqa: E402
+from apps.sentiment.src.llm.tool_cache import ToolResultCache  # noqa: E402
+from apps.sentiment.src.llm.trace_replay import Tracer  # noqa: E402
+
+
+def group_steps(events):
+    """Split a run into serial steps; consecutive tool calls form one concurrent turn."""
+    steps = []
+    for ev in events:
+        if ev["kind"] == "call_tool" and steps and steps[-1][0] == "call_tool":
+            steps[-1][1].append(ev)
+        else:
+            steps.append((ev["kind"], [ev]))
+    return steps
+
+
+def tool_payload(response):
+    texts = [c.get("text") or "" for c in (response or {}).get("content") or [] if isinstance(c, dict)]
+    return {"text": "\n".join(texts), "isError": bool((response or {}).get("isError"))}
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))]
+
+
+async def run_level(tracer, runs, concurrency, args):
+    cache = ToolResultCache() if args.cache else None
+    limiter = ProviderRateLimiter(args.rpm, args.tpm)
+    server_caps = defaultdict(lambda: asyncio.Semaphore(args.per_server))
+    counts = defaultdict(int)
+
+    async def replay_tool(ev):
+        name = ev["request"].get("name", "")
+        call_args = ev["request"].get("arguments") or {}
+        if cache is not None and await cache.get(name, call_args) is not None:
+            counts["tool_cache_hits"] += 1
+            return
+        async with server_caps[name.split("_", 1)[0]]:
+            await asyncio.sleep(tracer.delay_for(ev))
+        counts["tool_calls"] += 1
+        if cache is not None:
+            await cache.set(name, call_args, tool_payload(ev["response"]))
+
+    async def handler(job):
+        for kind, events in group_steps(runs[job.extra["run"]]):
+            if kind == "call_tool":
+                await asyncio.gather(*(replay_tool(ev) for ev in events))
+                continue
+            if kind == "responses.create":
+                usage = (events[0]["response"] or {}).get("usage") or {}
+                await limiter.acquire(tokens=int(usage.get("total_tokens") or 0))
+                counts["openai_calls"] += 1
+            await asyncio.sleep(tracer.delay_for(events[0]))
+        return True
+
+    jobs = [
+        AnalysisJob(symbol=run, company_name=run, extra={"run": run})
+        for _ in range(args.repeat)
+        for run in runs
+    ]
+    start = time.monotonic()
+    results = await AnalysisScheduler(concurrency=concurrency).run(jobs, handler)
+    wall = time.monotonic() - start
+    per_job = [r.seconds for r in results]
+    return {
+        "concurrency": concurrency,
+        "analyses": len(results),
+        "failed": sum(1 for r in results if not r.success),
+        "wall_s": wall,
+        "per_min": (len(results) / wall * 60.0) if wall else 0.0,
+        "p50_s": percentile(per_job, 50),
+        "p95_s": percentile(per_job, 95),
+        **counts,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("trace", help="JSONL trace recorded with SENTIMENT_TRACE_MODE=record")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--repeat", type=int, default=1, help="replay each recorded analysis this many times")
+    parser.add_argument("--latency-scale", type=float, default=1.0, help="multiplier on recorded call latency")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="fixed latency added to every call")
+    parser.add_argument("--per-server", type=int, default=4, help="concurrent tool calls per MCP server")
+    parser.add_argument("--rpm", type=int, default=None, help="OpenAI requests/minute budget")
+    parser.add_argument("--tpm", type=int, default=None, help="OpenAI tokens/minute budget")
+    parser.add_argument("--no-cache", dest="cache", action="store_false", help="disable the tool cache")
+    args = parser.parse_args()
+
+    tracer = Tracer(args.trace, mode="replay", latency_ms=args.latency_ms, latency_scale=args.latency_scale)
+    runs = {run: events for run, events in tracer.runs().items() if events}
+    if not runs:
+        print(f"No recorded analyses in {args.trace}")
+        return
+    print(f"Replaying {len(runs)} recorded analyses x{args.repeat} from {args.trace}")
+    print(f"{'conc':>5} {'runs':>5} {'fail':>5} {'wall s':>8} {'per min':>8} {'p50 s':>7} {'p95 s':>7} {'oai':>5} {'tools':>6} {'cached':>6}")
+    for level in args.concurrency:
+        r = asyncio.run(run_level(tracer, runs, level, args))
+        print(
+            f"{r['concurrency']:>5} {r['analyses']:>5} {r['failed']:>5} {r['wall_s']:>8.2f} {r['per_min']:>8.1f} "
+            f"{r['p50_s']:>7.2f} {r['p95_s']:>7.2f} {r.get('openai_calls', 0):>5} {r.get('tool_calls', 0):>6} "
+            f"{r.get('tool_cache_hits', 0):>6}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -2,6 +2,10 @@
 """
 Utility script to clean up the AI analysis schedule to ensure no duplicate dates per stock.
 Run this script to remove any duplicate analysis dates that may have been created.
+
+Only relevant to the legacy JSON schedule: the sentiment service now imports this
+file into rankalpha.fact_ai_analysis_schedule on startup, where a unique
+(stock_key, scheduled_date) constraint prevents duplicates.
 """
 
 import json
@@ -0,0 +1,110 @@
+import time
+
+import pytest
+
+from apps.api.src import cache
+
+
+class FakeRedisClient:
+    def __init__(self):
+        self.data = {}
+        self.gets = 0
+        self.published = []
+
+    def get(self, key):
+        self.gets += 1
+        return self.data.get(key)
+
+    def set(self, key, value):
+        self.data[key] = value
+
+    def setex(self, key, ttl, value):
+        self.data[key] = value
+
+    def scan(self, cursor, match, count):
+        prefix = match.rstrip("*")
+        return 0, [k for k in self.data if k.startswith(prefix)]
+
+    def delete(self, *keys):
+        for k in keys:
+            self.data.pop(k, None)
+        return len(keys)
+
+    def incr(self, key):
+        self.data[key] = int(self.data.get(key) or 0) + 1
+        return self.data[key]
+
+    def publish(self, channel, message):
+        self.published.append((channel, message))
+
+
+@pytest.fixture
+def client(monkeypatch):
+    fake = FakeRedisClient()
+    monkeypatch.setattr(cache, "_get_client", lambda: fake)
+    monkeypatch.setattr(cache, "_get_raw_client", lambda: fake)
+    monkeypatch.setattr(cache, "_cache_disabled", False)
+    monkeypatch.setattr(cache, "_l1", cache._L1Cache(max_bytes=1024, max_ttl=30))
+    monkeypatch.setattr(cache, "_l1_configured", True)
+    monkeypatch.setattr(cache, "_generations", {})
+    return fake
+
+
+def test_hot_reads_skip_redis_until_invalidated(client):
+    cache.set_json("grades:a", {"stocks": ["AAPL"]}, ttl_secs=300)
+    cache.set_bytes("httpcache:b", b"body", ttl_secs=300)
+    client.gets = 0
+
+    for _ in range(100):
+        assert cache.get_json("grades:a") == {"stocks": ["AAPL"]}
+        assert cache.get_bytes("httpcache:b") == b"body"
+    assert client.gets == 0
+
+    client.data["httpcache:b"] = b"newer"
+    assert cache.get_bytes("httpcache:b") == b"body"
+    assert cache.get_bytes("httpcache:b", skip_l1=True) == b"newer"
+    assert cache.get_bytes("httpcache:b") == b"newer"
+    client.data["httpcache:b"] = b"body"
+    client.gets = 0
+
+    assert cache.invalidate_prefix("grades:") == 1
+    assert client.published == [(cache.INVALIDATION_CHANNEL, "grades:")]
+    assert cache.get_json("grades:a") is None
+    assert cache.get_bytes("httpcache:b") == b"newer"
+    assert client.gets == 1
+
+
+def test_namespace_invalidation_is_one_incr_and_orphans_old_keys(client):
+    key = cache.make_key("httpcache:GET:/api/v1/grading/grades", {"limit": "50"})
+    assert key.startswith("httpcache:g0:GET:/api/v1/grading/grades:")
+    cache.set_bytes(key, b"old", ttl_secs=300)
+    scans = []
+    client.scan = lambda *a, **kw: scans.append(1)
+
+    assert cache.invalidate_namespace("httpcache") == 1
+    assert scans == []
+    assert client.published == [(cache.INVALIDATION_CHANNEL, "httpcache:")]
+    new_key = cache.make_key("httpcache:GET:/api/v1/grading/grades", {"limit": "50"})
+    assert new_key.startswith("httpcache:g1:") and cache.get_bytes(new_key) is None
+    # The orphaned entry stays in Redis until its TTL runs out
+    assert client.data[key] == b"old"
+    # Other namespaces keep their generation
+    assert cache.make_key("grade", {"symbol": "AAPL"}).startswith("grade:g0:")
+
+
+def test_l1_evicts_least_recent_by_bytes_and_expires():
+    l1 = cache._L1Cache(max_bytes=1000, max_ttl=30)
+    for name in "abcd":
+        l1.set(name, name, 240)
+    l1.get("a")
+    l1.set("e", "e", 240)
+    assert l1.get("b") is None and l1.get("a") == "a"
+    assert l1.size <= 1000
+
+    # Values over a quarter of the budget are not kept
+    l1.set("big", "x", 400)
+    assert l1.get("big") is None
+
+    l1.set("short", "s", 10, ttl_secs=0.01)
+    time.sleep(0.02)
+    assert l1.get("short") is None
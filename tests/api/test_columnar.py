@@ -0,0 +1,40 @@
+from datetime import date
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from apps.api.src.columnar import DATASETS, build_query, encode_batches
+
+
+def test_query_prunes_on_fact_date_key_and_filters_symbols():
+    q = build_query(DATASETS["score_history"], date(2024, 1, 1), date(2024, 12, 31), ["aapl", "msft"])
+    sql = str(q.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}))
+    assert "rankalpha.fact_score_history.date_key >= 20240101" in sql
+    assert "rankalpha.fact_score_history.date_key <= 20241231" in sql
+    assert "IN ('AAPL', 'MSFT')" in sql
+    assert "CAST(rankalpha.fact_score_history.score AS FLOAT)" in sql
+    assert [c.name for c in q.selected_columns] == [
+        "date_key", "as_of_date", "symbol", "score_type", "source", "score",
+    ]
+
+
+@pytest.mark.parametrize("fmt", ["arrow", "parquet"])
+def test_batches_round_trip(fmt):
+    pa = pytest.importorskip("pyarrow")
+    from apps.api.src.columnar import arrow_schema
+
+    q = build_query(DATASETS["technicals"], date(2024, 1, 1), date(2024, 1, 31))
+    rows = [
+        [(20240102, date(2024, 1, 2), "AAPL", "RSI14", 55.5)],
+        [],
+        [(20240103, date(2024, 1, 3), "AAPL", "RSI14", None)],
+    ]
+    data = b"".join(encode_batches(arrow_schema(q), iter(rows), fmt))
+    if fmt == "arrow":
+        table = pa.ipc.open_stream(data).read_all()
+    else:
+        import pyarrow.parquet as pq
+
+        table = pq.read_table(pa.BufferReader(data))
+    assert table.num_rows == 2
+    assert table.column("value").to_pylist() == [55.5, None]
@@ -0,0 +1,269 @@
+import asyncio
+import gzip
+import json
+import time
+
+import httpx
+import pytest
+from starlette.applications import Starlette
+from starlette.middleware.cors import CORSMiddleware
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+from apps.api.src import cache, http_cache
+
+
+class FakeRedis:
+    def __init__(self):
+        self.store = {}
+        self.locks = {}
+        self.l1 = {}  # stands in for this worker's L1 copies
+
+    def get_bytes(self, key, skip_l1=False):
+        if not skip_l1 and key in self.l1:
+            return self.l1[key]
+        return self.store.get(key)
+
+    def set_bytes(self, key, value, ttl_secs=None):
+        self.store[key] = value
+
+    def acquire_lock(self, name, ttl_ms):
+        if name in self.locks:
+            return None
+        self.locks[name] = "me"
+        return "me"
+
+    def release_lock(self, name, token):
+        if self.locks.get(name) == token:
+            del self.locks[name]
+
+
+@pytest.fixture
+def redis(monkeypatch):
+    for key, value in {"DATABASE_NAME": "x", "DB_USERNAME": "x", "PASSWORD": "x", "HOST": "x", "PORT": "5432"}.items():
+        monkeypatch.setenv(key, value)
+    fake = FakeRedis()
+    for name in ("get_bytes", "set_bytes", "acquire_lock", "release_lock"):
+        monkeypatch.setattr(http_cache, name, getattr(fake, name))
+    monkeypatch.setattr(http_cache, "ping_redis", lambda: True)
+    monkeypatch.setattr(http_cache, "is_cache_disabled", lambda: False)
+    # Keep the real client off (make_key would look up key generations in Redis)
+    monkeypatch.setattr(cache, "_cache_disabled", True)
+    return fake
+
+
+def _entry(payload, fresh_for=60):
+    body = json.dumps(payload).encode()
+    return http_cache.CachedBody("application/json", "identity", time.time() + fresh_for, body).pack()
+
+
+def _app(calls, size=1):
+    async def grades(request):
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return JSONResponse({"stocks": ["AAPL"] * size, "n": len(calls)})
+
+    app = Starlette(routes=[Route("/api/v1/grading/grades", grades)])
+    app.add_middleware(http_cache.RedisHTTPCacheMiddleware)
+    return app
+
+
+async def _get_many(app, n):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://t") as client:
+        return await asyncio.gather(*(client.get("/api/v1/grading/grades?limit=50") for _ in range(n)))
+
+
+def test_concurrent_misses_run_handler_once(redis):
+    calls = []
+    responses = asyncio.run(_get_many(_app(calls), 8))
+    assert len(calls) == 1
+    assert {r.status_code for r in responses} == {200}
+    assert all(r.json() == {"stocks": ["AAPL"], "n": 1} for r in responses)
+    [raw] = redis.store.values()
+    entry = http_cache.CachedBody.unpack(raw)
+    assert json.loads(entry.decoded()) == {"stocks": ["AAPL"], "n": 1} and not entry.stale
+    assert redis.locks == {}
+
+
+def test_waits_for_other_pod_holding_fill_lock(redis):
+    calls = []
+    app = _app(calls)
+    key = http_cache.make_key("httpcache:GET:/api/v1/grading/grades", {"limit": "50"})
+    redis.locks[f"lock:{key}"] = "other-pod"
+
+    async def scenario():
+        async def other_pod_fills():
+            await asyncio.sleep(0.1)
+            redis.store[key] = _entry({"stocks": ["MSFT"], "n": 0})
+
+        filler = asyncio.create_task(other_pod_fills())
+        responses = await _get_many(app, 3)
+        await filler
+        return responses
+
+    responses = asyncio.run(scenario())
+    assert calls == []
+    assert all(r.json() == {"stocks": ["MSFT"], "n": 0} for r in responses)
+
+
+def test_stale_entry_served_immediately_and_revalidated_once(redis):
+    calls = []
+    app = _app(calls)
+    key = http_cache.make_key("httpcache:GET:/api/v1/grading/grades", {"limit": "50"})
+    redis.store[key] = _entry({"stocks": ["OLD"], "n": 0}, fresh_for=-1)
+
+    async def scenario():
+        responses = await _get_many(app, 5)
+        # Stale bodies went out before the handler finished
+        assert calls == [1]
+        await asyncio.sleep(0.2)
+        return responses
+
+    responses = asyncio.run(scenario())
+    assert all(r.json() == {"stocks": ["OLD"], "n": 0} for r in responses)
+    assert calls == [1]
+    entry = http_cache.CachedBody.unpack(redis.store[key])
+    assert json.loads(entry.decoded()) == {"stocks": ["AAPL"], "n": 1} and not entry.stale
+    assert redis.locks == {}
+
+
+def test_stale_l1_copy_rechecks_redis_before_revalidating(redis):
+    calls = []
+    app = _app(calls)
+    key = http_cache.make_key("httpcache:GET:/api/v1/grading/grades", {"limit": "50"})
+    # Another pod already revalidated; this worker's L1 still has the stale copy
+    redis.l1[key] = _entry({"stocks": ["OLD"], "n": 0}, fresh_for=-1)
+    redis.store[key] = _entry({"stocks": ["NEW"], "n": 0})
+
+    async def scenario():
+        responses = await _get_many(app, 3)
+        await asyncio.sleep(0.1)
+        return responses
+
+    responses = asyncio.run(scenario())
+    assert calls == []
+    assert all(r.json() == {"stocks": ["NEW"], "n": 0} for r in responses)
+    assert redis.locks == {}
+
+
+def test_stale_window_uses_longest_prefix_and_overrides(redis):
+    from apps.api.src.settings import Settings
+
+    settings = Settings(http_cache_stale_seconds={"/api/v1/grading/grades/": 0})
+    assert http_cache._stale_for_path("/api/v1/grading/grades", settings) == 3600
+    assert http_cache._stale_for_path("/api/v1/grading/grades/AAPL", settings) == 0
+    assert http_cache._stale_for_path("/api/v1/backtest/run", settings) == 0
+
+
+def test_large_bodies_stored_gzipped_and_served_as_stored(redis):
+    calls = []
+    app = _app(calls, size=500)
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://t") as client:
+            first = await client.get("/api/v1/grading/grades", headers={"Accept-Encoding": "gzip"})
+            hit = await client.get("/api/v1/grading/grades", headers={"Accept-Encoding": "gzip"})
+            plain = await client.get("/api/v1/grading/grades", headers={"Accept-Encoding": "identity"})
+        return first, hit, plain
+
+    first, hit, plain = asyncio.run(scenario())
+    assert calls == [1]
+    [raw] = redis.store.values()
+    entry = http_cache.CachedBody.unpack(raw)
+    assert entry.encoding == "gzip"
+    assert hit.headers["content-encoding"] == "gzip" and first.headers["content-encoding"] == "gzip"
+    assert hit.content == gzip.decompress(entry.body) == plain.content
+    assert "content-encoding" not in plain.headers
+    assert plain.json()["stocks"] == ["AAPL"] * 500
+
+
+def test_if_none_match_gets_304_from_cache_and_uncached_paths(redis):
+    calls = []
+    app = _app(calls)
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://t") as client:
+            first = await client.get("/api/v1/grading/grades")
+            etag = first.headers["etag"]
+            cached = await client.get("/api/v1/grading/grades", headers={"If-None-Match": etag})
+            bypass = await client.get(
+                "/api/v1/grading/grades", headers={"If-None-Match": etag, "Cache-Control": "no-cache"}
+            )
+            changed = await client.get("/api/v1/grading/grades", headers={"If-None-Match": 'W/"other"'})
+        return etag, cached, bypass, changed
+
+    etag, cached, bypass, changed = asyncio.run(scenario())
+    assert etag.startswith('W/"')
+    # 304 straight from the Redis entry: the handler ran for the fill and the no-cache bypass only
+    assert cached.status_code == 304 and cached.content == b"" and cached.headers["etag"] == etag
+    assert calls == [1, 1]
+    # The bypass recomputed a different body ("n": 2), so its validator no longer matches
+    assert bypass.status_code == 200 and bypass.headers["etag"] != etag
+    assert changed.status_code == 200 and changed.headers["etag"] == etag
+
+
+def test_cors_and_handler_headers_survive_miss_and_hit(redis):
+    async def grades(request):
+        return JSONResponse({"stocks": ["AAPL"]}, headers={"X-Data-As-Of": "2026-01-02"})
+
+    app = Starlette(routes=[Route("/api/v1/grading/grades", grades)])
+    app.add_middleware(http_cache.RedisHTTPCacheMiddleware)
+    # Outermost, as in main.py
+    app.add_middleware(CORSMiddleware, allow_origins=["http://localhost:3000"])
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://t") as client:
+            headers = {"Origin": "http://localhost:3000"}
+            miss = await client.get("/api/v1/grading/grades", headers=headers)
+            hit = await client.get("/api/v1/grading/grades", headers=headers)
+            not_modified = await client.get(
+                "/api/v1/grading/grades", headers={**headers, "If-None-Match": hit.headers["etag"]}
+            )
+        return miss, hit, not_modified
+
+    miss, hit, not_modified = asyncio.run(scenario())
+    assert len(redis.store) == 1
+    for response in (miss, hit, not_modified):
+        assert response.headers["access-control-allow-origin"] == "http://localhost:3000"
+    assert not_modified.status_code == 304
+    assert miss.headers["x-data-as-of"] == hit.headers["x-data-as-of"] == "2026-01-02"
+    entry = http_cache.CachedBody.unpack(next(iter(redis.store.values())))
+    assert not any(k.startswith("access-control-") for k in entry.headers)
+
+
+@pytest.mark.parametrize(
+    "header, accepted",
+    [
+        ("gzip", True),
+        ("gzip;q=0.5, br", True),
+        ("*", True),
+        ("*, gzip;q=0", False),
+        ("gzip;q=0, *", False),
+        ("gzip;q=abc", False),
+        ("gzip; q=2", False),
+        ("identity", False),
+        ("", False),
+    ],
+)
+def test_accept_encoding_negotiation(header, accepted):
+    assert http_cache._accepts(header, "gzip") is accepted
+
+
+def test_malformed_q_value_gets_decoded_body_not_500(redis):
+    calls = []
+    app = _app(calls, size=500)
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://t") as client:
+            await client.get("/api/v1/grading/grades")
+            return await client.get("/api/v1/grading/grades", headers={"Accept-Encoding": "gzip;q=abc"})
+
+    hit = asyncio.run(scenario())
+    assert calls == [1]
+    assert hit.status_code == 200 and "content-encoding" not in hit.headers
+    assert hit.json()["stocks"] == ["AAPL"] * 500
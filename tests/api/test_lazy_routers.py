@@ -0,0 +1,54 @@
+import asyncio
+
+from fastapi import APIRouter, FastAPI
+
+import apps.api.src.lazy_routers as lazy
+
+
+class _Table:
+    def __init__(self, name):
+        self.__tablename__ = name
+
+
+def _fake_build_router(sa_cls):
+    router = APIRouter(prefix=f"/{sa_cls.__tablename__}")
+
+    @router.get("/")
+    def list_items():
+        return [sa_cls.__tablename__]
+
+    return router
+
+
+def _get(app, path):
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        messages.append(message)
+
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": path, "raw_path": path.encode(), "root_path": "",
+        "query_string": b"", "headers": [], "client": ("test", 1), "server": ("test", 80),
+    }
+    asyncio.run(app(scope, receive, send))
+    return messages[0]["status"]
+
+
+def test_routers_are_mounted_on_first_request_and_for_openapi():
+    app = FastAPI()
+    routers = lazy.LazyCrudRouters(app, [_Table("dim_a"), _Table("dim_b"), _Table("dim_c")], _fake_build_router)
+    app.add_middleware(lazy.LazyRouterMiddleware, routers=routers)
+    base_routes = len(app.routes)
+
+    assert _get(app, "/dim_a/") == 200
+    assert routers.pending == 2
+    assert len(app.routes) == base_routes + 1
+    assert _get(app, "/unknown/") == 404
+
+    paths = app.openapi()["paths"]
+    assert routers.pending == 0
+    assert {"/dim_a/", "/dim_b/", "/dim_c/"} <= set(paths)
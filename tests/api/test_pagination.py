@@ -0,0 +1,54 @@
+import uuid
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql
+
+from apps.api.src.pagination import (
+    after_key,
+    date_key_filters,
+    decode_cursor,
+    encode_cursor,
+    parse_fields,
+)
+from apps.common.src.models import FactScoreHistory, FactTechnicalIndicator
+
+
+def _sql(stmt):
+    return str(stmt.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}))
+
+
+def test_cursor_round_trip_restores_column_types():
+    table = FactScoreHistory.__table__
+    keys = [c for c in table.columns if c.primary_key]
+    fact_id = uuid.uuid4()
+    token = encode_cursor([20250110, fact_id])
+    assert decode_cursor(token, keys) == (20250110, fact_id)
+    with pytest.raises(HTTPException):
+        decode_cursor("not-a-cursor", keys)
+    with pytest.raises(HTTPException):
+        decode_cursor(encode_cursor([1]), keys)
+
+
+def test_keyset_query_uses_row_comparison_and_date_bounds():
+    table = FactTechnicalIndicator.__table__
+    keys = [c for c in table.columns if c.primary_key]
+    stmt = (
+        select(table)
+        .where(*date_key_filters(table, (20250101, 20250131)), after_key(keys, (20250110, 42, "rsi_14")))
+        .order_by(*keys)
+    )
+    sql = _sql(stmt)
+    assert "date_key >= 20250101" in sql and "date_key <= 20250131" in sql
+    assert "(rankalpha.fact_technical_indicator.date_key, rankalpha.fact_technical_indicator.stock_key, " in sql
+    assert "> (20250110, 42, 'rsi_14')" in sql
+
+
+def test_parse_fields_validates_names():
+    table = FactTechnicalIndicator.__table__
+    assert [c.name for c in parse_fields("value, stock_key", table)] == ["stock_key", "value"]
+    assert parse_fields(None, table) is None
+    with pytest.raises(HTTPException) as exc:
+        parse_fields("stock_key,nope", table)
+    assert exc.value.status_code == 400
@@ -0,0 +1,82 @@
+import asyncio
+import time
+
+import pytest
+from sqlalchemy import literal, select
+
+from apps.api.src.query_batch import gather_queries
+
+
+class _Result:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def all(self):
+        return list(self.rows)
+
+    def scalar(self):
+        return self.rows[0][0] if self.rows else None
+
+
+class _Session:
+    opened = 0
+
+    async def __aenter__(self):
+        _Session.opened += 1
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def execute(self, stmt):
+        value = stmt.selected_columns[0].value
+        await asyncio.sleep(value / 100)
+        return _Result([(value,)])
+
+
+def test_queries_run_concurrently_on_separate_sessions_in_order():
+    _Session.opened = 0
+    queries = [(select(literal(n)), "scalar") for n in (20, 5, 10)]
+
+    start = time.perf_counter()
+    out = asyncio.run(gather_queries(*queries, (select(literal(1)), "all"), session_factory=_Session))
+    elapsed = time.perf_counter() - start
+
+    assert out == [20, 5, 10, [(1,)]]
+    assert _Session.opened == 4
+    # Bounded by the slowest query (0.2s), not the sum (0.36s)
+    assert elapsed < 0.3
+
+
+def test_unknown_shape_is_rejected_before_any_query():
+    _Session.opened = 0
+    with pytest.raises(ValueError):
+        asyncio.run(gather_queries((select(literal(1)), "rows"), session_factory=_Session))
+    assert _Session.opened == 0
+
+
+def test_fan_out_is_capped_and_request_session_released_first():
+    events = []
+
+    class _Tracked(_Session):
+        active = 0
+        peak = 0
+
+        async def execute(self, stmt):
+            _Tracked.active += 1
+            _Tracked.peak = max(_Tracked.peak, _Tracked.active)
+            try:
+                return await super().execute(stmt)
+            finally:
+                _Tracked.active -= 1
+
+    class _RequestSession:
+        async def commit(self):
+            events.append("commit")
+
+    queries = [(select(literal(1)), "scalar") for _ in range(8)]
+    out = asyncio.run(gather_queries(*queries, session_factory=_Tracked, release=_RequestSession(), max_concurrency=3))
+
+    assert out == [1] * 8
+    assert events == ["commit"]
+    assert _Tracked.peak == 3
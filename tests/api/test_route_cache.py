@@ -0,0 +1,76 @@
+from typing import Optional
+
+import pytest
+from fastapi import APIRouter, Depends, FastAPI, Query
+from fastapi.testclient import TestClient
+from pydantic import BaseModel
+
+from apps.api.src import cache, route_cache
+from apps.api.src.route_cache import cached, honor_no_cache
+
+
+class Grade(BaseModel):
+    symbol: str
+    score: float
+    note: Optional[str] = None
+
+
+@pytest.fixture
+def store(monkeypatch):
+    for key, value in {"DATABASE_NAME": "x", "DB_USERNAME": "x", "PASSWORD": "x", "HOST": "x", "PORT": "5432"}.items():
+        monkeypatch.setenv(key, value)
+    data: dict[str, bytes] = {}
+    generations: dict[str, int] = {}
+
+    def bump(namespace):
+        generations[namespace] = generations.get(namespace, 0) + 1
+        return generations[namespace]
+
+    monkeypatch.setattr(cache, "_cache_disabled", True)  # make_key: no Redis lookups
+    monkeypatch.setattr(route_cache, "get_bytes", data.get)
+    monkeypatch.setattr(route_cache, "set_bytes", lambda key, value, ttl_secs=None: data.__setitem__(key, value))
+    monkeypatch.setattr(route_cache, "namespace_generation", lambda namespace: generations.get(namespace, 0))
+    monkeypatch.setattr(route_cache, "invalidate_namespace", bump)
+    monkeypatch.setattr(route_cache, "_stats", route_cache.defaultdict(route_cache.Counter))
+    return data
+
+
+def test_routes_cache_by_validated_params_and_tags(store):
+    calls = []
+
+    def get_db():
+        return object()  # a fresh "session" per request must not change the key
+
+    router = APIRouter(dependencies=[Depends(honor_no_cache)])
+
+    @router.get("/grades/{symbol}", response_model=Grade)
+    @cached("grade", model=Grade, tags=("scores",), normalize={"symbol": str.upper})
+    async def get_grade(symbol: str, db=Depends(get_db), days: int = Query(90, ge=1)):
+        calls.append((symbol, days))
+        return {"symbol": symbol.upper(), "score": 1.5}
+
+    @router.get("/detail/{symbol}")
+    async def detail(symbol: str, db=Depends(get_db)):
+        # Direct call from another handler, as get_asset_detail does with get_stock_grade
+        grade = await get_grade(symbol, db)
+        return {"grade": grade.model_dump(), "typed": isinstance(grade, Grade)}
+
+    app = FastAPI()
+    app.include_router(router)
+    client = TestClient(app)
+
+    assert client.get("/grades/aapl").json() == {"symbol": "AAPL", "score": 1.5, "note": None}
+    assert client.get("/grades/AAPL?days=90").status_code == 200
+    assert client.get("/detail/Aapl").json() == {"grade": {"symbol": "AAPL", "score": 1.5, "note": None}, "typed": True}
+    assert calls == [("aapl", 90)]
+    assert client.get("/grades/AAPL?days=30").status_code == 200
+    assert client.get("/grades/days0?days=0").status_code == 422
+    assert len(calls) == 2
+
+    client.get("/grades/AAPL", headers={"Cache-Control": "no-cache"})
+    assert len(calls) == 3
+
+    assert route_cache.invalidate_tags("scores") == {"scores": 1}
+    client.get("/grades/AAPL")
+    assert len(calls) == 4
+    assert route_cache.cache_stats()["grade"] == {"hit": 2, "miss": 3, "bypass": 1}
@@ -0,0 +1,66 @@
+import asyncio
+from datetime import date, timedelta
+
+from apps.sentiment.src.analysis_scheduler import (
+    AnalysisJob,
+    AnalysisScheduler,
+    TIER_CONSENSUS,
+    TIER_INITIAL,
+    TIER_SCHEDULED,
+)
+
+
+def test_priority_order():
+    today = date(2024, 6, 1)
+    jobs = [
+        AnalysisJob("LOW", "Low", consensus_score=1.0, tier=TIER_CONSENSUS),
+        AnalysisJob("HIGH", "High", consensus_score=9.0, tier=TIER_CONSENSUS),
+        AnalysisJob("FAR", "Far", catalyst_date=today + timedelta(days=20), tier=TIER_SCHEDULED),
+        AnalysisJob("NEAR", "Near", catalyst_date=today + timedelta(days=2), tier=TIER_SCHEDULED),
+        AnalysisJob("NEW", "New", tier=TIER_INITIAL),
+    ]
+    ordered = sorted(jobs, key=lambda j: j.priority(today))
+    assert [j.symbol for j in ordered] == ["NEW", "NEAR", "FAR", "HIGH", "LOW"]
+
+
+def test_concurrency_is_bounded():
+    in_flight = 0
+    peak = 0
+
+    async def handler(job):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return True
+
+    jobs = [AnalysisJob(f"S{i}", f"Co {i}") for i in range(10)]
+    results = asyncio.run(AnalysisScheduler(concurrency=3).run(jobs, handler))
+    assert peak == 3
+    assert len(results) == 10
+    assert all(r.success for r in results)
+
+
+def test_timeout_is_recorded_not_raised():
+    async def handler(job):
+        if job.symbol == "SLOW":
+            await asyncio.sleep(1)
+        return True
+
+    jobs = [AnalysisJob("SLOW", "Slow"), AnalysisJob("FAST", "Fast")]
+    results = asyncio.run(AnalysisScheduler(concurrency=2, job_timeout_seconds=0.05).run(jobs, handler))
+    by_symbol = {r.job.symbol: r for r in results}
+    assert by_symbol["SLOW"].timed_out and not by_symbol["SLOW"].success
+    assert by_symbol["FAST"].success
+
+
+def test_deadline_cancels_outstanding_jobs():
+    async def handler(job):
+        await asyncio.sleep(1)
+        return True
+
+    jobs = [AnalysisJob(f"S{i}", f"Co {i}") for i in range(4)]
+    results = asyncio.run(AnalysisScheduler(concurrency=1, deadline_seconds=0.05).run(jobs, handler))
+    assert len(results) == 4
+    assert all(r.cancelled for r in results)
@@ -0,0 +1,45 @@
+from apps.sentiment.src.llm.context_compactor import ContextCompactor, fair_shares, select_chunks
+from apps.sentiment.src.llm.rate_limit import estimate_tokens
+
+
+def _filing() -> str:
+    filler = [f"Section {i}. " + "Boilerplate about corporate governance and office leases. " * 20 for i in range(30)]
+    filler[17] = "Revenue grew 12% on strong iPhone demand; gross margin expanded to 46%. " * 10
+    return "Acme Corp Form 10-K\n\n" + "\n\n".join(filler)
+
+
+def test_select_chunks_keeps_lead_and_relevant_sections():
+    text, kept, total = select_chunks(_filing(), "revenue gross margin demand", budget_tokens=600)
+    assert text.startswith("Acme Corp Form 10-K")
+    assert "gross margin expanded" in text
+    assert kept < total
+    assert estimate_tokens(text) <= 600 + 20
+
+
+def test_fair_shares_never_exceeds_budget():
+    shares = fair_shares([100, 5000, 20000, 0], 6000)
+    assert shares[0] == 100 and shares[3] == 0
+    assert sum(shares) <= 6000
+    assert shares[1] == shares[2] == 2950
+
+
+def test_turn_is_deduplicated_and_held_to_budget():
+    c = ContextCompactor(query="Acme revenue and margins", turn_token_budget=1500)
+    doc = {"text": _filing(), "isError": False}
+    calls = [("c1", "fetch", {"url": "https://a"}), ("c2", "fetch", {"url": "https://b"}), ("c3", "search", {"q": "acme"})]
+    out = c.compact_turn(calls, [doc, dict(doc), {"text": "short", "isError": False}])
+
+    assert out[0]["compacted"] and "gross margin expanded" in out[0]["text"]
+    assert out[1]["deduplicated"] and "fetch (c1)" in out[1]["text"]
+    assert out[2]["text"] == "short"
+    assert sum(estimate_tokens(p["text"]) for p in out) <= 1500 + 40
+    assert c.stats["deduplicated"] == 1
+
+
+def test_message_head_survives_compaction():
+    c = ContextCompactor(query="", message_token_budget=800)
+    msg = "TASK: analyze Acme for the report_writer step.\n\n" + _filing()
+    out = c.compact_message(msg, head_chars=200)
+    assert out.startswith("TASK: analyze Acme")
+    assert estimate_tokens(out) <= 800
+    assert c.compact_message("small") == "small"
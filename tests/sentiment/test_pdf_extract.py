@@ -0,0 +1,163 @@
+import asyncio
+import sys
+import types
+
+from apps.sentiment.src.llm.pdf_extract import PdfExtractor, extract_markdown, page_plan
+
+
+class _FakeDoc:
+    page_count = 40
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+def test_extraction_stops_at_char_budget(monkeypatch):
+    requested: list[list[int]] = []
+
+    def to_markdown(doc, pages, **_kw):
+        requested.append(pages)
+        return "x" * (100 * len(pages))
+
+    monkeypatch.setitem(sys.modules, "pymupdf", types.SimpleNamespace(open=lambda _p: _FakeDoc()))
+    monkeypatch.setitem(sys.modules, "pymupdf4llm", types.SimpleNamespace(to_markdown=to_markdown))
+
+    md = extract_markdown("filing.pdf", max_chars=1000)
+    # 8 pages per chunk at 100 chars/page: the second chunk crosses the budget
+    assert len(requested) == 2
+    assert md.endswith("[Truncated at 1000 chars]")
+    assert md.startswith("x" * 1000)
+
+
+def test_cached_markdown_skips_the_pool(tmp_path, monkeypatch):
+    ex = PdfExtractor(cache_dir=str(tmp_path))
+    (tmp_path / "abc123_5000_sections.md").write_text("# cached", encoding="utf-8")
+    monkeypatch.setattr(ex, "_get_pool", lambda: (_ for _ in ()).throw(AssertionError("pool used")))
+
+    assert asyncio.run(ex.extract("missing.pdf", content_hash="abc123", max_chars=5000)) == "# cached"
+
+
+def test_worker_failure_returns_none(tmp_path):
+    bogus = tmp_path / "not_a.pdf"
+    bogus.write_bytes(b"plain text")
+    ex = PdfExtractor(max_workers=1, timeout_seconds=60, cache_dir=str(tmp_path / "cache"))
+    try:
+        assert asyncio.run(ex.extract(str(bogus), content_hash="h", max_chars=100)) is None
+    finally:
+        ex.shutdown()
+    assert not (tmp_path / "cache").exists()
+
+
+class _Page:
+    def __init__(self, text):
+        self.text = text
+
+    def get_text(self, _kind):
+        return self.text
+
+
+class _OutlineDoc:
+    def __init__(self, page_count, toc=None, texts=None):
+        self.page_count = page_count
+        self._toc = toc or []
+        self._texts = texts or {}
+
+    def get_toc(self, simple=True):
+        return self._toc
+
+    def __getitem__(self, pno):
+        return _Page(self._texts.get(pno, "body text"))
+
+
+def test_page_plan_uses_outline_sections_first():
+    toc = [
+        [1, "Item 1A. Risk Factors", 5],
+        [1, "Item 2. Properties", 9],
+        [1, "Item 7. Management's Discussion and Analysis", 12],
+        [2, "Liquidity", 14],
+        [1, "Item 8. Financial Statements and Supplementary Data", 16],
+        [1, "Item 9. Changes in Accountants", 19],
+    ]
+    plan = page_plan(_OutlineDoc(20, toc=toc))
+    assert [label for label, _ in plan] == [
+        "Cover", "Management's Discussion and Analysis", "Risk Factors", "Financial Statements", "Other pages",
+    ]
+    assert plan[1][1] == [11, 12, 13, 14]
+    assert plan[2][1] == [4, 5, 6, 7]
+    assert plan[3][1] == [15, 16, 17]
+    assert sorted(p for _, pages in plan for p in pages) == list(range(20))
+
+
+def test_page_plan_heading_scan_skips_contents_page():
+    texts = {
+        1: "Table of Contents\nRisk Factors 3\nManagement's Discussion and Analysis 6",
+        3: "Item 1A. Risk Factors\nOur business...",
+        5: "Item 2. Properties",
+        6: "Item 7. Management's Discussion and Analysis of Financial Condition",
+        8: "Item 9. Controls",
+    }
+    plan = dict(page_plan(_OutlineDoc(10, texts=texts)))
+    assert plan["Risk Factors"] == [3, 4]
+    assert plan["Management's Discussion and Analysis"] == [6, 7]
+    assert page_plan(_OutlineDoc(10, texts=texts), prioritize=False) == [("", list(range(10)))]
+
+
+def test_timeout_leaves_other_extractions_in_the_pool_running(monkeypatch):
+    import time
+    from concurrent.futures import ThreadPoolExecutor
+
+    import apps.sentiment.src.llm.pdf_extract as pdf_extract
+
+    def fake_extract(path, *_args):
+        time.sleep(0.6 if path == "stuck.pdf" else 0.2)
+        return f"# {path}"
+
+    # Threads stand in for the spawn workers (the patched function is visible to them)
+    monkeypatch.setattr(pdf_extract, "ProcessPoolExecutor", lambda max_workers, mp_context: ThreadPoolExecutor(max_workers))
+    monkeypatch.setattr(pdf_extract, "extract_markdown", fake_extract)
+    terminated = []
+    monkeypatch.setattr(PdfExtractor, "_terminate", staticmethod(terminated.append))
+    ex = PdfExtractor(max_workers=2, timeout_seconds=0.3)
+
+    async def scenario():
+        stuck = asyncio.create_task(ex.extract("stuck.pdf"))
+        await asyncio.sleep(0.2)
+        pool = ex._pool
+        other = asyncio.create_task(ex.extract("other.pdf"))
+        assert await stuck is None
+        # other.pdf is still running in the same pool: not torn down yet, but no new work goes there
+        assert terminated == [] and ex._pool is None
+        assert await other == "# other.pdf"
+        return pool
+
+    pool = asyncio.run(scenario())
+    assert terminated == [pool]
+
+
+def test_extract_is_usable_from_successive_event_loops(monkeypatch):
+    import time
+    from concurrent.futures import ThreadPoolExecutor
+
+    from apps.sentiment.src.llm import pdf_extract
+
+    def fake_extract(pdf_path, max_chars, max_pages, prioritize):
+        time.sleep(0.02)
+        return f"# {pdf_path}"
+
+    monkeypatch.setattr(pdf_extract, "ProcessPoolExecutor", lambda max_workers, mp_context: ThreadPoolExecutor(max_workers))
+    monkeypatch.setattr(pdf_extract, "extract_markdown", fake_extract)
+    ex = PdfExtractor(max_workers=1, timeout_seconds=5)
+
+    async def _burst():
+        # With one slot the second call waits on the semaphore, binding it to this loop
+        return await asyncio.gather(ex.extract("a.pdf"), ex.extract("b.pdf"))
+
+    try:
+        assert asyncio.run(_burst()) == ["# a.pdf", "# b.pdf"]
+        assert asyncio.run(_burst()) == ["# a.pdf", "# b.pdf"]
+    finally:
+        if ex._pool is not None:
+            ex._pool.shutdown(wait=True)
@@ -0,0 +1,16 @@
+import asyncio
+
+from apps.sentiment.src.llm.rate_limit import ProviderRateLimiter
+
+
+def test_limiter_is_usable_from_successive_event_loops():
+    limiter = ProviderRateLimiter(tokens_per_minute=60000)  # 1000 tokens/s
+
+    async def _burst(first):
+        # The later acquires wait for budget while holding the lock, so the
+        # others contend for it and bind it to this loop
+        await asyncio.gather(limiter.acquire(tokens=first), limiter.acquire(tokens=5), limiter.acquire(tokens=5))
+
+    asyncio.run(_burst(60000))
+    asyncio.run(_burst(5))
+    assert limiter._tok_level < 5
@@ -0,0 +1,105 @@
+from datetime import date, timedelta
+
+from apps.sentiment.src.llm.research_snapshot import (
+    EXCERPT_CHARS,
+    ResearchLog,
+    ResearchSnapshot,
+    ResearchSnapshotStore,
+)
+from apps.sentiment.src.llm.tool_cache import make_cache_key
+
+REPORT = {
+    "ticker": "ACME",
+    "as_of_date": "2025-01-10",
+    "overall_rating": "buy",
+    "confidence": "high",
+    "analyst_summary": "Margins expanding on pricing.",
+    "market_cap_usd": 1.2e9,
+    "fundamental": {"revenue_cagr_3y_pct": 14.0},
+    "catalysts": {"short_term": [{"title": "Q4 earnings", "expected_date": "2025-02-01"}]},
+}
+
+
+def test_log_dedupes_calls_and_snapshot_merges_previous_documents():
+    log = ResearchLog()
+    log.record("fetch_fetch", {"url": "https://example.com/10q"}, "# ACME 10-Q\nbody")
+    log.record("fetch_fetch", {"url": "https://example.com/10q"}, "# ACME 10-Q\nbody")
+    log.record("g-search_search", {"query": "ACME news"}, "")
+    assert len(log.documents) == 1
+
+    first = ResearchSnapshot.from_report("acme", REPORT, documents=list(log.documents.values()))
+    second_log = ResearchLog()
+    second_log.record("g-search_search", {"query": "ACME guidance"}, "ACME raises guidance")
+    second = ResearchSnapshot.from_report("ACME", REPORT, documents=list(second_log.documents.values()), previous=first)
+
+    assert first.symbol == "ACME"
+    assert [d.get("query") or d.get("url") for d in second.documents] == ["ACME guidance", "https://example.com/10q"]
+    assert second.facts == {"market_cap_usd": 1.2e9, "revenue_cagr_3y_pct": 14.0}
+
+
+def test_brief_asks_for_delta_since_prior_run():
+    snap = ResearchSnapshot.from_report("ACME", REPORT)
+    snap.taken_at = "2025-01-10T09:00:00"
+    text = snap.brief(today=date(2025, 1, 17), price_then=100.0, price_now=110.0)
+    assert "7 days ago" in text
+    assert "overall_rating=buy" in text
+    assert "Q4 earnings" in text
+    assert "+10.0%" in text
+    assert "Research only what changed since 2025-01-10" in text
+
+
+def test_store_round_trip_and_max_age(tmp_path):
+    store = ResearchSnapshotStore(str(tmp_path), max_age_days=30)
+    snap = ResearchSnapshot.from_report("ACME", REPORT)
+    store.save(snap)
+
+    loaded = store.load("acme")
+    assert loaded == snap
+    assert store.load("acme", today=snap.taken_date + timedelta(days=31)) is None
+    assert store.load("OTHER") is None
+
+
+def test_facts_and_risks_follow_report_schema():
+    report = {
+        "ticker": "ACME",
+        "as_of_date": "2025-01-10",
+        "market_cap_usd": 1.2e9,
+        "fundamental": {
+            "revenue_cagr_3y_pct": 14.0,
+            "valuation_vs_peers": {"pe_forward": 18.5, "ev_ebitda_forward": 11.2, "pe_percentile_in_sector": 40.0},
+        },
+        "sentiment": {"news_sentiment_30d": 0.3, "short_interest_pct_float": 2.1},
+        "analyst_summary": {
+            "bull_case": "Pricing power",
+            "bear_case": "Input costs",
+            "headline_risks": ["Tariffs", "Key customer concentration"],
+        },
+    }
+    snap = ResearchSnapshot.from_report("ACME", report)
+
+    assert snap.facts == {
+        "market_cap_usd": 1.2e9,
+        "revenue_cagr_3y_pct": 14.0,
+        "pe_forward": 18.5,
+        "ev_ebitda_forward": 11.2,
+        "short_interest_pct_float": 2.1,
+        "news_sentiment_30d": 0.3,
+    }
+    assert snap.conclusions["headline_risks"] == ["Tariffs", "Key customer concentration"]
+
+
+def test_brief_carries_document_excerpts_within_budget():
+    log = ResearchLog()
+    log.record("fetch_fetch", {"url": "https://example.com/10q"}, "# ACME 10-Q\n\nRevenue   grew 12% to $1.1B.\n" + "x" * 2000)
+    log.record("g-search_search", {"query": "ACME guidance"}, "ACME raises FY guidance to $4.5B")
+    doc = log.documents[make_cache_key("fetch_fetch", {"url": "https://example.com/10q"})]
+    assert doc["cache_key"] == make_cache_key("fetch_fetch", {"url": "https://example.com/10q"})
+    assert doc["excerpt"].startswith("# ACME 10-Q Revenue grew 12% to $1.1B.")
+    assert len(doc["excerpt"]) == EXCERPT_CHARS
+
+    snap = ResearchSnapshot.from_report("ACME", REPORT, documents=list(log.documents.values()))
+    text = snap.brief(max_excerpt_chars=EXCERPT_CHARS + 14)
+    assert "previously consulted" in text and "do not fetch" not in text
+    assert "> # ACME 10-Q Revenue grew 12%" in text
+    # The second excerpt is cut to what is left of the budget
+    assert "\n  > ACME raises FY\n" in text
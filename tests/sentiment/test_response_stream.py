@@ -0,0 +1,139 @@
+import asyncio
+import json
+from types import SimpleNamespace
+
+from apps.sentiment.src.llm.response_stream import (
+    CallDispatcher,
+    JsonStreamValidator,
+    MalformedOutputError,
+    consume_response_stream,
+    report_write_errors,
+    validate_report,
+)
+
+REPORT = {
+    "as_of_date": "2025-01-10",
+    "ticker": "ACME",
+    "fundamental": {},
+    "macro_sensitivity": {},
+    "sentiment": {},
+}
+
+
+def _chunks(text, size=7):
+    return [text[i : i + size] for i in range(0, len(text), size)]
+
+
+def test_validator_accepts_fenced_report_split_across_chunks():
+    v = JsonStreamValidator(schema=validate_report)
+    for chunk in _chunks("Here you go\n'''json\n" + json.dumps(REPORT) + "\n'''\nSAVED"):
+        v.feed(chunk)
+    assert v.done and v.error is None
+    assert v.data["ticker"] == "ACME"
+
+
+def test_validator_flags_mismatched_bracket_before_the_end():
+    v = JsonStreamValidator()
+    v.feed('{"a": [1, 2}')
+    assert not v.done
+    assert v.error == "unexpected '}' at offset 11"
+    v.feed(', "b": 3}')  # ignored once an error is known
+    assert v.error == "unexpected '}' at offset 11"
+
+
+def test_validator_ignores_text_without_json():
+    v = JsonStreamValidator()
+    v.feed("SAVED: /data/company_reports/acme.md")
+    assert not v.started and v.error is None
+
+
+def test_report_write_errors():
+    good = {"path": "/x.md", "content": "'''json\n" + json.dumps(REPORT) + "\n'''"}
+    assert report_write_errors(good) == []
+    missing = {"content": "'''json\n" + json.dumps({**REPORT, "sentiment": None}) + "\n'''"}
+    assert report_write_errors(missing) == ["missing required field 'sentiment'"]
+    assert report_write_errors({"content": json.dumps(REPORT)})[0].startswith("content must contain")
+    assert report_write_errors({"path": "/x.md"}) == []
+
+
+def _call(call_id, name, args):
+    return SimpleNamespace(type="function_call", call_id=call_id, name=name, arguments=json.dumps(args))
+
+
+def _collect(items):
+    return [(i.call_id, i.name, json.loads(i.arguments)) for i in items if i.type == "function_call"]
+
+
+def test_stream_dispatches_calls_before_the_response_completes():
+    started = []
+
+    async def execute(call_id, name, args):
+        started.append(call_id)
+        await asyncio.sleep(0)
+        return {"text": name, "isError": False}
+
+    async def events(dispatcher, seen_before_completion):
+        yield SimpleNamespace(type="response.output_item.done", item=_call("c1", "fetch_fetch", {"url": "u"}))
+        yield SimpleNamespace(type="response.output_text.delta", delta="thinking")
+        yield SimpleNamespace(type="response.output_item.done", item=_call("c2", "fetch_fetch", {"url": "u"}))
+        await asyncio.sleep(0)
+        seen_before_completion.extend(started)
+        final = SimpleNamespace(output=[_call("c1", "fetch_fetch", {"url": "u"}), _call("c2", "fetch_fetch", {"url": "u"})])
+        yield SimpleNamespace(type="response.completed", response=final)
+
+    async def main():
+        dispatcher = CallDispatcher(execute, _collect)
+        text = []
+        seen = []
+        final = await consume_response_stream(
+            events(dispatcher, seen), on_output_item=dispatcher.on_output_item, on_text_delta=text.append
+        )
+        payloads = await asyncio.gather(*dispatcher.futures_for(_collect(final.output)))
+        return dispatcher, text, seen, payloads
+
+    dispatcher, text, seen, payloads = asyncio.run(main())
+    assert seen == ["c1"]  # running before response.completed; identical c2 shares it
+    assert started == ["c1"]
+    assert dispatcher.early == 1
+    assert text == ["thinking"]
+    assert [p["text"] for p in payloads] == ["fetch_fetch", "fetch_fetch"]
+
+
+def test_malformed_output_stops_the_stream_at_the_bad_chunk():
+    errors = []
+    consumed = []
+    closed = []
+
+    def _on_error(error):
+        errors.append(error)
+        raise MalformedOutputError(error)
+
+    v = JsonStreamValidator(on_error=_on_error)
+
+    class _Events:
+        def __init__(self, deltas):
+            self._it = iter(deltas)
+
+        def __aiter__(self):
+            return self
+
+        async def __anext__(self):
+            try:
+                delta = next(self._it)
+            except StopIteration:
+                raise StopAsyncIteration
+            consumed.append(delta)
+            return SimpleNamespace(type="response.output_text.delta", delta=delta)
+
+        async def close(self):
+            closed.append(True)
+
+    deltas = ['{"a": ', "[1, 2}", ', "b": 3}', "never read"]
+    try:
+        asyncio.run(consume_response_stream(_Events(deltas), on_text_delta=v.feed))
+    except MalformedOutputError as e:
+        assert str(e) == "unexpected '}' at offset 11"
+    else:
+        raise AssertionError("stream was not abandoned")
+    assert errors == ["unexpected '}' at offset 11"]
+    assert consumed == deltas[:2] and closed == [True]
@@ -0,0 +1,77 @@
+import asyncio
+import json
+from datetime import date
+
+from apps.sentiment.src.schedule_store import ScheduleStore
+
+
+class FakeDB:
+    def __init__(self, rows=None):
+        self.rows = rows or []
+        self.calls = []
+        self.cursor = object()
+
+    async def fetchall(self, query, params=()):
+        self.calls.append((query, tuple(params)))
+        return self.rows
+
+    async def fetchone(self, query, params=()):
+        self.calls.append((query, tuple(params)))
+        return self.rows[0] if self.rows else None
+
+    async def run(self, fn, *args):
+        return fn(self.cursor, *args)
+
+
+def test_claim_is_conditional_update():
+    db = FakeDB(rows=[(7,)])
+    store = ScheduleStore(db, worker_id="w1", claim_ttl_seconds=900)
+    assert asyncio.run(store.claim(42, date(2024, 6, 1))) is True
+    query, params = db.calls[0]
+    assert "status = 'pending'" in query and "RETURNING" in query
+    assert params == ("w1", 42, date(2024, 6, 1), 900)
+
+    db.rows = []
+    assert asyncio.run(store.claim(42, date(2024, 6, 1))) is False
+
+
+def test_import_json_keeps_future_dates_and_renames(tmp_path, monkeypatch):
+    path = tmp_path / "analysis_schedule.json"
+    path.write_text(
+        json.dumps(
+            {
+                "1": {"company_name": "A", "symbol": "A", "analysis_dates": ["2024-05-01", "2024-06-03", "2024-06-03"]},
+                "2": {"company_name": "B", "symbol": "B", "analysis_dates": ["2024-06-10"]},
+            }
+        )
+    )
+    inserted = []
+    monkeypatch.setattr(
+        "apps.sentiment.src.schedule_store.execute_values",
+        lambda cur, sql, values: inserted.extend(values),
+    )
+    store = ScheduleStore(FakeDB(), worker_id="w1")
+    count = asyncio.run(store.import_json(path, today=date(2024, 6, 1)))
+    assert count == 2
+    assert sorted(inserted) == [(1, date(2024, 6, 3), "imported"), (2, date(2024, 6, 10), "imported")]
+    assert not path.exists()
+    assert (tmp_path / "analysis_schedule.json.migrated").exists()
+
+
+def test_scheduled_stock_keys_reads_open_future_rows_and_init_markers():
+    db = FakeDB(rows=[(1,), (2,)])
+    store = ScheduleStore(db, worker_id="w1")
+    assert asyncio.run(store.scheduled_stock_keys(date(2024, 6, 1))) == {1, 2}
+    query, params = db.calls[0]
+    assert "status IN ('pending', 'claimed')" in query and "scheduled_date >= %s" in query
+    assert "fact_ai_analysis_schedule_init" in query
+    assert params == (date(2024, 6, 1),)
+
+
+def test_add_from_catalysts_marks_stock_initialised_without_dates():
+    db = FakeDB(rows=[])
+    store = ScheduleStore(db, worker_id="w1")
+    assert asyncio.run(store.add_from_catalysts(42, "a-1", today=date(2024, 6, 1))) == 0
+    query, params = db.calls[-1]
+    assert "INSERT INTO fact_ai_analysis_schedule_init" in query
+    assert params == (42, "a-1")
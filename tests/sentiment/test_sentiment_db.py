@@ -0,0 +1,102 @@
+import asyncio
+from datetime import date
+from types import SimpleNamespace
+
+import psycopg2
+import pytest
+
+from apps.sentiment.src.sentiment_db import SentimentDB
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def execute(self, query, params=()):
+        self.conn.executed.append((query, params))
+
+    def fetchone(self):
+        return (42, "Acme")
+
+    def close(self):
+        pass
+
+
+class FakeConn:
+    def __init__(self):
+        self.closed = 0
+        self.executed = []
+        self.commits = 0
+        self.rollbacks = 0
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        self.rollbacks += 1
+
+
+class FakePool:
+    def __init__(self):
+        self.conn = FakeConn()
+        self.returned = []
+
+    def getconn(self):
+        return self.conn
+
+    def putconn(self, conn, close=False):
+        self.returned.append(close)
+
+
+def _db():
+    db = SentimentDB(SimpleNamespace(), minconn=1, maxconn=2)
+    db._pool = FakePool()
+    return db
+
+
+def test_async_helper_reuses_pooled_connection():
+    db = _db()
+    assert asyncio.run(db.get_stock("acme")) == (42, "Acme")
+    assert asyncio.run(db.get_stock_key("ACME")) == 42
+    conn = db._pool.conn
+    assert conn.commits == 2
+    assert conn.executed[0][1] == ("ACME",)
+    assert db._pool.returned == [False, False]
+
+
+def test_broken_connection_is_discarded_and_rolled_back():
+    db = _db()
+
+    def _boom(cur):
+        raise psycopg2.OperationalError("server closed the connection")
+
+    with pytest.raises(psycopg2.OperationalError):
+        db.run_sync(_boom)
+    assert db._pool.conn.rollbacks == 1
+    assert db._pool.returned == [True]
+
+
+def test_consensus_candidates_filter_in_one_query():
+    db = _db()
+    captured = {}
+
+    async def _fetchall(query, params=()):
+        captured["query"] = query
+        captured["params"] = list(params)
+        return []
+
+    db.fetchall = _fetchall
+    asyncio.run(
+        db.get_consensus_candidates(
+            25, skip_if_within_days=3, min_appearances=2, today=date(2024, 6, 10)
+        )
+    )
+    assert "LEFT JOIN LATERAL" in captured["query"]
+    assert "UPPER(ds.symbol) = UPPER(c.symbol)" in captured["query"]
+    assert "is_active" not in captured["query"]
+    assert "styles_distinct" not in captured["query"]
+    # analyzed on or before 2024-06-07 is outside a 3-day window
+    assert captured["params"] == [20240607, 2, 25]
@@ -0,0 +1,47 @@
+import asyncio
+import json
+from types import SimpleNamespace
+
+from apps.sentiment.src.llm.telemetry import append_jsonl, current_telemetry, insert_telemetry, start_telemetry
+
+
+class _Cursor:
+    def __init__(self):
+        self.calls = []
+
+    def execute(self, sql, params):
+        self.calls.append((sql, params))
+
+
+def test_child_tasks_share_the_analysis_record(tmp_path):
+    async def _tool_call(server, seconds, error=False):
+        current_telemetry().record_tool(server, seconds, error=error)
+
+    async def _analysis():
+        t = start_telemetry("AAPL")
+        usage = SimpleNamespace(input_tokens=1000, output_tokens=200, output_tokens_details=SimpleNamespace(reasoning_tokens=150))
+        t.record_openai(2.5, SimpleNamespace(usage=usage))
+        await asyncio.gather(_tool_call("edgar", 1.0), _tool_call("edgar", 3.0, error=True), _tool_call("fetch", 0.5))
+        t.record_cache(True)
+        t.record_cache(False)
+        t.record_step("financial_analyst", 12.0)
+        t.record_pdf(4.0)
+        t.finish(True, analysis_id="a-1")
+        return t
+
+    t = asyncio.run(_analysis())
+    assert current_telemetry() is None  # context did not leak out of the analysis task
+    d = t.to_dict()
+    assert d["openai"]["reasoning_tokens"] == 150
+    assert d["tools"]["edgar"] == {"calls": 2, "errors": 1, "seconds": 4.0, "max_seconds": 3.0}
+    assert d["cache"]["hit_ratio"] == 0.5
+
+    cur = _Cursor()
+    insert_telemetry(cur, d)
+    params = cur.calls[0][1]
+    assert params[0] == "a-1" and params[10:13] == (3, 1, 4.5)
+    assert "INSERT INTO rankalpha.fact_ai_analysis_telemetry" in cur.calls[0][0]
+
+    path = tmp_path / "t" / "telemetry.jsonl"
+    append_jsonl(str(path), d)
+    assert json.loads(path.read_text())["steps"]["financial_analyst"]["seconds"] == 12.0
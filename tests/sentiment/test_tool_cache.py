@@ -0,0 +1,58 @@
+import asyncio
+
+from apps.sentiment.src.llm.tool_cache import ToolResultCache, make_cache_key
+
+
+def test_key_ignores_runtime_args_and_order():
+    a = make_cache_key("fetch", {"url": "https://x", "max_length": 5000, "timeout": 10})
+    b = make_cache_key("fetch", {"max_length": 5000, "url": "https://x"})
+    assert a == b
+    assert a != make_cache_key("fetch", {"url": "https://y"})
+
+
+def test_memory_lru_is_byte_bounded():
+    cache = ToolResultCache(memory_max_bytes=200)
+
+    async def _run():
+        for i in range(5):
+            await cache.set("fetch", {"url": f"u{i}"}, {"text": "x" * 60, "isError": False})
+        return [await cache.get("fetch", {"url": f"u{i}"}) for i in range(5)]
+
+    got = asyncio.run(_run())
+    assert cache._mem_bytes <= 200
+    assert got[0] is None and got[-1] is not None
+    assert cache.stats["evictions_memory"] >= 1
+
+
+def test_disk_tier_survives_restart_and_skips_errors(tmp_path):
+    path = tmp_path / "tool_cache.sqlite"
+    first = ToolResultCache(disk_path=str(path))
+    asyncio.run(first.set("get_filing", {"cik": "1"}, {"text": "10-K body", "isError": False}))
+    asyncio.run(first.set("search", {"q": "boom"}, {"text": "oops", "isError": True}))
+
+    second = ToolResultCache(disk_path=str(path))
+    assert asyncio.run(second.get("get_filing", {"cik": "1"})) == {"text": "10-K body", "isError": False}
+    assert asyncio.run(second.get("search", {"q": "boom"})) is None
+    assert second.stats["hits_disk"] == 1 and second.stats["misses"] == 1
+
+
+def test_ttl_policy_by_tool():
+    cache = ToolResultCache(default_ttl=100, search_ttl=10, filing_ttl=1000)
+    assert cache.ttl_for("brave_web_search") == 10
+    assert cache.ttl_for("fetch", {"url": "https://www.sec.gov/Archives/x.htm"}) == 1000
+    assert cache.ttl_for("fetch", {"url": "https://example.com"}) == 100
+
+
+def test_memory_hits_are_independent_copies():
+    cache = ToolResultCache()
+    payload = {"text": "10-K body", "isError": False, "meta": {"pages": 3}}
+
+    async def _run():
+        await cache.set("get_filing", {"cik": "1"}, payload)
+        payload["meta"]["pages"] = 99  # caller keeps mutating its own dict
+        first = await cache.get("get_filing", {"cik": "1"})
+        first["meta"]["pages"] = 0
+        return await cache.get("get_filing", {"cik": "1"})
+
+    assert asyncio.run(_run())["meta"] == {"pages": 3}
+    assert cache.stats["hits_memory"] == 2
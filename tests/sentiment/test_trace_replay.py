@@ -0,0 +1,58 @@
+import asyncio
+import time
+
+import pytest
+
+from apps.sentiment.src.llm.trace_replay import TraceMiss, Tracer, set_trace_run
+
+
+def _record(path):
+    rec = Tracer(str(path), mode="record")
+
+    async def _run():
+        set_trace_run("AAPL")
+        request = {"model": "gpt-5", "input": "Save to /data/apple_report_20250101_120000.md"}
+        resp = {"id": "resp_1", "output_text": "hello", "usage": {"total_tokens": 42}}
+        await rec.call("responses.create", "financial_analyst", request, lambda: asyncio.sleep(0, resp))
+        tool = {"content": [{"type": "text", "text": "10-K"}], "isError": False}
+        await rec.call("call_tool", "financial_analyst", {"name": "fetch", "arguments": {"url": "u"}}, lambda: asyncio.sleep(0, tool))
+
+    asyncio.run(_run())
+
+
+def test_replay_matches_requests_with_masked_timestamps(tmp_path):
+    path = tmp_path / "trace.jsonl"
+    _record(path)
+    rep = Tracer(str(path), mode="replay")
+
+    async def _run():
+        set_trace_run("AAPL")
+        live = lambda: pytest.fail("live call during replay")  # noqa: E731
+        request = {"model": "gpt-5", "input": "Save to /data/apple_report_20260301_090000.md"}
+        resp = await rep.call("responses.create", "financial_analyst", request, live)
+        tool = await rep.call("call_tool", "financial_analyst", {"name": "fetch", "arguments": {"url": "u"}}, live)
+        return resp, tool
+
+    resp, tool = asyncio.run(_run())
+    assert resp.output_text == "hello" and resp.usage.total_tokens == 42
+    assert tool.content[0].text == "10-K" and tool.isError is False
+
+
+def test_replay_falls_back_to_sequence_then_misses(tmp_path):
+    path = tmp_path / "trace.jsonl"
+    _record(path)
+    rep = Tracer(str(path), mode="replay", latency_ms=50)
+
+    async def _run():
+        set_trace_run("AAPL")
+        start = time.monotonic()
+        resp = await rep.call("responses.create", "financial_analyst", {"input": "edited prompt"}, None)
+        waited = time.monotonic() - start
+        with pytest.raises(TraceMiss):
+            await rep.call("responses.create", "financial_analyst", {"input": "edited prompt"}, None)
+        return resp, waited
+
+    resp, waited = asyncio.run(_run())
+    assert resp.id == "resp_1"
+    assert waited >= 0.04
+    assert list(rep.runs()) == ["AAPL"]